@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hitsz_annotation_store import open_store, store_path_for
+from bench_search import random_text
+
+
+def generate_annotations(node_count, description_chars, seed=0):
+    """每个节点一段描述和一两张照片路径"""
+    rng = random.Random(seed)
+    annotations = {}
+    for i in range(node_count):
+        annotations[f"node_{i}"] = {
+            "description": random_text(rng, description_chars // 2, description_chars),
+            "photo_paths": [f"photo_{i}_{k}.jpg" for k in range(rng.randint(1, 2))],
+        }
+    return annotations
+
+
+def measure(func):
+    """返回 (结果, 耗时秒, 峰值新分配字节)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def bench(node_count, description_chars, views, seed):
+    workdir = tempfile.mkdtemp(prefix="hitsz_store_")
+    json_path = os.path.join(workdir, "node_annotations.json")
+    annotations = generate_annotations(node_count, description_chars, seed)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(annotations, f, ensure_ascii=False, indent=4)
+    del annotations
+    rng = random.Random(seed + 1)
+    viewed = [f"node_{rng.randrange(node_count)}" for _ in range(views)]
+
+    def load_json():
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return [data[node_id]["description"] for node_id in viewed]
+
+    def load_store():
+        store = open_store(json_path)
+        # 启动时需要的照片字段，加上会话中查看的几个描述
+        for node_id in viewed:
+            store.fields(node_id)
+        return [store.description(node_id) for node_id in viewed]
+
+    expected, json_time, json_peak = measure(load_json)
+    _, build_time, _ = measure(load_store)
+    result, warm_time, warm_peak = measure(load_store)
+    assert result == expected
+
+    print(f"{node_count:>8} 个节点 JSON {os.path.getsize(json_path) / 1e6:6.1f} MB | "
+          f"json.load {json_time * 1000:8.1f} ms 峰值 {json_peak / 1e6:7.1f} MB | "
+          f"首次构建存储 {build_time * 1000:8.1f} ms | "
+          f"映射存储并查看{views}个节点 {warm_time * 1000:6.2f} ms 峰值 {warm_peak / 1e6:6.2f} MB | "
+          f"存储 {os.path.getsize(store_path_for(json_path)) / 1e6:6.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="标注存储性能测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--description-chars", type=int, default=3000, help="每段描述的最大字数")
+    parser.add_argument("--views", type=int, default=10, help="一次会话中查看的节点数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for size in args.sizes:
+        bench(size, args.description_chars, args.views, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""图概览画布的布局时间和平移帧时间，可以在无显示环境下运行：
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_canvas.py --edges 200000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PyQt5.QtWidgets import QApplication
+from hitsz_graph import GraphModel
+from hitsz_layout import compute_layout
+from hitsz_canvas import GraphCanvas
+
+
+def generate_layered_model(edge_count, layers, seed=0):
+    """近似分层的合成图：节点均分到各层，边大多指向后面一到三层，少量回边形成环"""
+    rng = random.Random(seed)
+    model = GraphModel()
+    node_count = max(2, edge_count // 4)
+    per_layer = max(1, node_count // layers)
+    model.graph_attrs["rankdir"] = "LR"
+    for i in range(node_count):
+        model.add_node(f"n{i}", {"label": f"节点{i}"})
+    for _ in range(edge_count):
+        a = rng.randrange(node_count)
+        if rng.random() < 0.01:
+            b = rng.randrange(node_count)
+        else:
+            b = min(node_count - 1, a + per_layer * rng.randint(1, 3) + rng.randrange(-per_layer // 2, per_layer // 2 + 1))
+        model.add_edge(a, b)
+    return model
+
+
+def pan_frames(app, canvas, steps, dx, dy):
+    """每步平移后同步更新图元并重绘视口，返回每帧耗时（毫秒）"""
+    hbar = canvas.horizontalScrollBar()
+    vbar = canvas.verticalScrollBar()
+    times = []
+    for _ in range(steps):
+        start = time.perf_counter()
+        hbar.setValue(hbar.value() + dx)
+        vbar.setValue(vbar.value() + dy)
+        canvas.update_visible()
+        canvas.viewport().repaint()
+        times.append((time.perf_counter() - start) * 1000)
+        app.processEvents()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图概览画布性能测试")
+    parser.add_argument("--edges", type=int, default=200000, help="边数，节点数为边数的四分之一")
+    parser.add_argument("--layers", type=int, default=200, help="合成图的层数")
+    parser.add_argument("--steps", type=int, default=200, help="每个缩放级别的平移步数")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    model = generate_layered_model(args.edges, args.layers)
+    model.build_adjacency()
+    start = time.perf_counter()
+    layout = compute_layout(model)
+    x0, y0, x1, y1 = layout.bounds()
+    print(f"{model.node_count()} 个节点 {model.edge_count()} 条边，分层布局 {time.perf_counter() - start:.2f} s，"
+          f"场景大小 {x1 - x0:.0f} x {y1 - y0:.0f}")
+
+    canvas = GraphCanvas(lambda node_id: None)
+    canvas.resize(1200, 800)
+    canvas.show()
+    start = time.perf_counter()
+    canvas.set_model(model, layout=layout)
+    while canvas.graph_layout is None:
+        app.processEvents()
+    print(f"空间索引和概览图（后台线程） {time.perf_counter() - start:.2f} s")
+
+    for scale in (1.0, 0.3, 0.15, 0.05):
+        canvas.resetTransform()
+        canvas.scale(scale, scale)
+        canvas.centerOn((x0 + x1) / 2, (y0 + y1) / 2)
+        canvas.update_visible()
+        # 来回平移，停留在图的范围内
+        times = pan_frames(app, canvas, args.steps // 2, 40, 25) + pan_frames(app, canvas, args.steps // 2, -40, -25)
+        times.sort()
+        mode = "概览图" if canvas.overview_mode else f"{len(canvas.node_items)} 个图元 {len(canvas.edge_lines)} 条边"
+        print(f"缩放 {scale:4.2f}（{mode}）: 每帧中位数 {statistics.median(times):6.1f} ms"
+              f"   95分位 {times[int(len(times) * 0.95)]:6.1f} ms   最大 {times[-1]:6.1f} ms")
+    print(f"累计创建图元 {len(canvas.node_items) + len(canvas.pool)} 个（共 {model.node_count()} 个节点）")
+
+
+if __name__ == "__main__":
+    main()
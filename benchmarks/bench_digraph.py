@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from hitsz_digraph import DiGraph
+from hitsz_viewer import node_attributes
+from bench_node_graph import generate_model
+
+
+def import_time(module, repeat):
+    """在新进程中导入模块的耗时中位数（秒），不含解释器自身启动"""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+        if out.returncode != 0:
+            return None
+        times.append(float(out.stdout))
+    return statistics.median(times)
+
+
+def build_networkx(model):
+    """原来 build_graph_from_dot 的做法：逐个 add_node / add_edge"""
+    import networkx as nx
+    G = nx.DiGraph()
+    for i, node_id in enumerate(model.ids):
+        G.add_node(node_id, **node_attributes(model, i))
+    for source, target, edge_label in model.iter_edges():
+        G.add_edge(source, target, label=edge_label)
+    return G
+
+
+def relations(G, node_ids):
+    """RelationListModel 显示一个节点时的查询：相邻节点、标签和边标签"""
+    for node_id in node_ids:
+        for neighbor in G.successors(node_id):
+            G.nodes[neighbor].get("label")
+            G.get_edge_data(node_id, neighbor)
+        for neighbor in G.predecessors(node_id):
+            G.nodes[neighbor].get("label")
+            G.get_edge_data(neighbor, node_id)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def bench(edge_count, has_networkx):
+    model = generate_model(edge_count, hubs=10, hub_share=0.02)
+    sample = model.ids[:1000]
+    graph, build = timed(DiGraph.from_model, model, node_attributes)
+    _, query = timed(relations, graph, sample)
+    line = f"{edge_count:>9} 条边 | DiGraph 构建 {build * 1000:8.1f} ms 查询{len(sample)}个节点 {query * 1000:7.1f} ms"
+    if has_networkx:
+        nx_graph, nx_build = timed(build_networkx, model)
+        _, nx_query = timed(relations, nx_graph, sample)
+        assert [graph.successors(n) for n in sample] == [list(nx_graph.successors(n)) for n in sample]
+        line += f" | networkx 构建 {nx_build * 1000:8.1f} ms 查询 {nx_query * 1000:7.1f} ms"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查看器图结构（内置DiGraph 与 networkx）导入和构建时间测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=5, help="导入时间测量次数")
+    args = parser.parse_args()
+
+    nx_import = import_time("networkx", args.repeat)
+    print(f"导入 hitsz_digraph {import_time('hitsz_digraph', args.repeat) * 1000:7.1f} ms")
+    if nx_import is None:
+        print("未安装 networkx，只测试内置 DiGraph")
+    else:
+        print(f"导入 networkx     {nx_import * 1000:7.1f} ms")
+        # 先导入一次，构建时间不含导入
+        import networkx
+    for size in args.sizes:
+        bench(size, nx_import is not None)
+
+
+if __name__ == "__main__":
+    main()
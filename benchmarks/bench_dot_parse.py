@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hitsz_graph import tokenize, DotParser, GraphModel
+
+PREFIXES = ["t", "place_", "org_", "person_", "concept_", "course_", "tech_", "event_", "lesson"]
+
+
+def generate_dot(edge_count, seed=0):
+    """生成与hitsz_flow.dot风格一致的合成DOT文本"""
+    rng = random.Random(seed)
+    node_count = max(2, edge_count // 4)
+    lines = [
+        "digraph G {",
+        "  rankdir=LR;",
+        '  node [shape=box, style=filled, fillcolor=lightblue, fontname="SimSun"];',
+        '  edge [fontname="SimSun"];',
+    ]
+    for i in range(node_count):
+        prefix = PREFIXES[i % len(PREFIXES)]
+        lines.append(f'  {prefix}{i} [label="节点{i}\\n(说明 \\"{i}\\")", shape=oval, fillcolor=lightgreen];')
+    names = [f"{PREFIXES[i % len(PREFIXES)]}{i}" for i in range(node_count)]
+    for e in range(edge_count):
+        a = names[rng.randrange(node_count)]
+        b = names[rng.randrange(node_count)]
+        if e % 5 == 0:
+            lines.append(f'  {a} -> {b} [label="关系{e % 37}"];')
+        else:
+            lines.append(f"  {a} -> {b};")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def bench(edge_count, repeat):
+    text = generate_dot(edge_count)
+    path = os.path.join(tempfile.gettempdir(), f"bench_{edge_count}.dot")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+    best_read = best_tokenize = best_parse = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        t_read = time.perf_counter()
+        tokens = tokenize(content)
+        t_tok = time.perf_counter()
+        model = DotParser(tokens, GraphModel()).parse()
+        t_parse = time.perf_counter()
+        best_read = min(best_read, t_read - start)
+        best_tokenize = min(best_tokenize, t_tok - t_read)
+        best_parse = min(best_parse, t_parse - t_tok)
+
+    os.remove(path)
+    total = best_read + best_tokenize + best_parse
+    print(f"{edge_count:>9} 条边 {model.node_count():>8} 个节点 {len(text) / 1e6:7.1f} MB | "
+          f"读取 {best_read * 1000:8.1f} ms  分词 {best_tokenize * 1000:8.1f} ms  "
+          f"解析 {best_parse * 1000:8.1f} ms  合计 {total * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DOT解析性能测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for size in args.sizes:
+        bench(size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
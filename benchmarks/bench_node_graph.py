@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hitsz_graph import GraphModel, NeighborGraph
+from bench_dot_parse import PREFIXES
+
+
+def generate_model(edge_count, hubs, hub_share, seed=0):
+    """合成图模型；hub_share 比例的边连到少数几个枢纽节点，模拟高度数节点"""
+    rng = random.Random(seed)
+    model = GraphModel()
+    node_count = max(2, edge_count // 4)
+    for i in range(node_count):
+        model.add_node(f"{PREFIXES[i % len(PREFIXES)]}{i}", {"label": f"节点{i}"})
+    for _ in range(edge_count):
+        a = rng.randrange(node_count)
+        b = rng.randrange(node_count)
+        if hubs and rng.random() < hub_share:
+            hub = rng.randrange(hubs)
+            if rng.random() < 0.5:
+                a = hub
+            else:
+                b = hub
+        model.add_edge(a, b)
+    return model
+
+
+def build_dict_of_lists(model):
+    """原来 NodeViewer.parse_dot_file 的结构：每个节点一个字典，相邻节点用列表线性查重"""
+    nodes = {}
+    for i, node_id in enumerate(model.ids):
+        if node_id not in nodes:
+            nodes[node_id] = {
+                "id": node_id,
+                "label": model.label(i),
+                "forward": [],
+                "backward": []
+            }
+    for from_node, to_node, _ in model.iter_edges():
+        if to_node not in nodes[from_node]["forward"]:
+            nodes[from_node]["forward"].append(to_node)
+        if from_node not in nodes[to_node]["backward"]:
+            nodes[to_node]["backward"].append(from_node)
+    return nodes
+
+
+def measure(func, model):
+    """返回 (结果, 耗时秒, 构建峰值字节, 保留字节)；tracemalloc 会拖慢分配，计时和内存分两次测"""
+    start = time.perf_counter()
+    func(model)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = func(model)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak, current
+
+
+def same_neighbors(nodes, graph):
+    """两种结构的相邻节点及其顺序一致"""
+    for node_id, node in nodes.items():
+        record = graph.record(node_id)
+        if [graph.ids[j] for j in record.forward] != node["forward"]:
+            return False
+        if [graph.ids[j] for j in record.backward] != node["backward"]:
+            return False
+    return True
+
+
+def bench(edge_count, hubs, hub_share):
+    model = generate_model(edge_count, hubs, hub_share)
+    # 标签先解码一遍，两边都不计入字符串本身
+    for i in range(model.node_count()):
+        model.label(i)
+
+    nodes, old_time, old_peak, old_kept = measure(build_dict_of_lists, model)
+    graph, new_time, new_peak, new_kept = measure(NeighborGraph.from_model, model)
+    assert same_neighbors(nodes, graph)
+
+    print(f"{edge_count:>9} 条边 {model.node_count():>7} 个节点 | "
+          f"字典+列表 {old_time * 1000:9.1f} ms 保留 {old_kept / 1e6:7.1f} MB 峰值 {old_peak / 1e6:7.1f} MB | "
+          f"编号+数组 {new_time * 1000:9.1f} ms 保留 {new_kept / 1e6:7.1f} MB 峰值 {new_peak / 1e6:7.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NodeViewer 相邻结构构建时间和内存测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--hubs", type=int, default=10, help="枢纽节点数")
+    parser.add_argument("--hub-share", type=float, default=0.02, help="连到枢纽节点的边的比例")
+    args = parser.parse_args()
+    for size in args.sizes:
+        bench(size, args.hubs, args.hub_share)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hitsz_graph import GraphModel
+from hitsz_query import GraphQuery
+from bench_node_graph import generate_model
+
+
+def generate_dag_model(edge_count, seed=0):
+    """边都从编号小的节点指向编号大的节点，缩点后分量数等于节点数，走区间标签"""
+    rng = random.Random(seed)
+    model = GraphModel()
+    node_count = max(2, edge_count // 4)
+    for i in range(node_count):
+        model.add_node(f"n{i}", {"label": f"节点{i}"})
+    for _ in range(edge_count):
+        a = rng.randrange(node_count - 1)
+        # 大多数边指向附近的节点，形成较长的链
+        b = min(node_count - 1, a + 1 + int(rng.expovariate(1 / 50)))
+        model.add_edge(a, b)
+    return model
+
+
+def bfs_reachable(query, s, t):
+    """不用预处理结构的可达性判断：从起点做一次BFS"""
+    offsets, succ = query.out_offsets, query.succ
+    seen = {s}
+    frontier = [s]
+    while frontier:
+        next_frontier = []
+        for v in frontier:
+            for e in range(offsets[v], offsets[v + 1]):
+                w = succ[e]
+                if w == t:
+                    return True
+                if w not in seen:
+                    seen.add(w)
+                    next_frontier.append(w)
+        frontier = next_frontier
+    return s == t
+
+
+def per_query(func, pairs):
+    """每次查询的耗时（微秒），返回 (中位数, 95分位)"""
+    times = []
+    for s, t in pairs:
+        start = time.perf_counter()
+        func(s, t)
+        times.append((time.perf_counter() - start) * 1e6)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.95)]
+
+
+def bench(name, model, queries, max_length, baseline):
+    start = time.perf_counter()
+    query = GraphQuery(model)
+    build = time.perf_counter() - start
+    mode = "位集" if query.bitsets is not None else "区间标签"
+    print(f"{name}: {model.node_count()} 个节点 {model.edge_count()} 条边，"
+          f"{query.count} 个强连通分量（{mode}），预处理 {build:.2f} s")
+
+    rng = random.Random(1)
+    ids = model.ids
+    pairs = [(ids[rng.randrange(len(ids))], ids[rng.randrange(len(ids))]) for _ in range(queries)]
+    hits = sum(query.reachable(s, t) for s, t in pairs)
+    print(f"  随机 {queries} 对节点，可达 {hits} 对")
+    rows = [
+        ("可达性", lambda s, t: query.reachable(s, t)),
+        ("最短路径", lambda s, t: query.shortest_path(s, t)),
+        (f"{max_length}步以内简单路径", lambda s, t: query.simple_paths(s, t, max_length, limit=100)),
+    ]
+    if baseline:
+        index = model.index
+        rows.append(("可达性（无预处理BFS）", lambda s, t: bfs_reachable(query, index[s], index[t])))
+    for label, func in rows:
+        median, p95 = per_query(func, pairs)
+        print(f"  {label:<16} 中位数 {median:10.1f} us   95分位 {p95:10.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="路径查询（可达性、最短路径、k步以内简单路径）性能测试")
+    parser.add_argument("--edges", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--max-length", type=int, default=4)
+    parser.add_argument("--baseline", action="store_true", help="同时测不用预处理结构的BFS可达性（很慢）")
+    args = parser.parse_args()
+
+    bench("随机图", generate_model(args.edges, hubs=10, hub_share=0.02), args.queries, args.max_length, args.baseline)
+    bench("近似DAG", generate_dag_model(args.edges), args.queries, args.max_length, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hitsz_search import build_index
+
+# 合成语料使用的常用汉字
+CHARS = ("哈尔滨工业大学深圳校区研究生院创办学科部机器人自动化控制智能制造材料能源"
+         "计算机科学技术电子信息通信工程建筑土木环境经济管理人文社会教授院士团队实验室"
+         "项目成果奖励国家重点合作企业产业园区城市发展历史年份时间地点人物事件课程理念")
+
+
+def random_text(rng, low, high):
+    return "".join(rng.choice(CHARS) for _ in range(rng.randint(low, high)))
+
+
+def generate_corpus(node_count, seed=0):
+    """生成 (节点ID, 标签, 描述)，标签4~10字，三分之一的节点带40~120字描述"""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(node_count):
+        description = random_text(rng, 40, 120) if i % 3 == 0 else ""
+        corpus.append((f"node_{i}", random_text(rng, 4, 10), description))
+    return corpus
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def bench(node_count, queries, seed):
+    corpus = generate_corpus(node_count, seed)
+    rng = random.Random(seed + 1)
+
+    start = time.perf_counter()
+    index = build_index(corpus)
+    build_time = time.perf_counter() - start
+
+    # 模拟逐字输入：取某个节点标签或描述中的一段，按前缀逐个查询
+    keystrokes = []
+    truncated = 0
+    for _ in range(queries):
+        _, label, description = corpus[rng.randrange(node_count)]
+        text = description if description and rng.random() < 0.5 else label
+        begin = rng.randrange(max(1, len(text) - 4))
+        word = text[begin:begin + rng.randint(2, 5)]
+        for end in range(1, len(word) + 1):
+            start = time.perf_counter()
+            index.search(word[:end])
+            keystrokes.append(time.perf_counter() - start)
+            truncated += index.truncated
+
+    # 增量更新：改写描述
+    updates = []
+    for _ in range(queries):
+        node_id, _, _ = corpus[rng.randrange(node_count)]
+        description = random_text(rng, 40, 120)
+        start = time.perf_counter()
+        index.update(node_id, description=description)
+        updates.append(time.perf_counter() - start)
+
+    print(f"{node_count:>8} 个节点 {len(index.postings):>8} 个n元组 | 建索引 {build_time:6.2f} s | "
+          f"按键 p50 {percentile(keystrokes, 0.5) * 1000:6.2f} ms  p95 {percentile(keystrokes, 0.95) * 1000:6.2f} ms  "
+          f"最大 {max(keystrokes) * 1000:6.2f} ms  超时截断 {truncated}/{len(keystrokes)} | "
+          f"更新 p50 {percentile(updates, 0.5) * 1000:6.3f} ms  p95 {percentile(updates, 0.95) * 1000:6.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="全文搜索索引性能测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for size in args.sizes:
+        bench(size, args.queries, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""本地HTTP服务的请求延迟：多个展台并发浏览节点（节点JSON、相邻节点、缩略图）
+
+    python benchmarks/bench_server.py --nodes 20000 --kiosks 4 --visits 300
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import http.client
+from urllib.parse import quote
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_search import percentile
+from bench_suite import generate_corpus
+from hitsz_server import ServerThread
+
+
+def kiosk(port, node_ids, photos, visits, seed, samples, traffic, revalidate):
+    """一个展台：每次随机打开一个节点，请求节点数据、相邻节点和第一张照片的缩略图"""
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    etags = {}
+    for _ in range(visits):
+        node_id = rng.choice(node_ids)
+        paths = [f"/api/nodes/{quote(node_id, safe='')}", f"/api/nodes/{quote(node_id, safe='')}/neighbors"]
+        if photos.get(node_id):
+            paths.append(f"/thumb/640/{quote(photos[node_id][0])}")
+        for path in paths:
+            headers = {"Accept-Encoding": "gzip"}
+            if revalidate and path in etags:
+                headers["If-None-Match"] = etags[path]
+            start = time.perf_counter()
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            body = response.read()
+            elapsed = (time.perf_counter() - start) * 1000
+            kind = "缩略图" if path.startswith("/thumb/") else "节点数据"
+            samples.setdefault(kind, []).append(elapsed)
+            traffic[0] += len(body)
+            if response.status == 200:
+                etags[path] = response.getheader("ETag")
+    conn.close()
+
+
+def run_round(port, node_ids, photos, kiosks, visits, seed, revalidate=False):
+    samples = {}
+    traffic = [0]
+    threads = [threading.Thread(target=kiosk, args=(port, node_ids, photos, visits, seed + k, samples, traffic,
+                                                    revalidate))
+               for k in range(kiosks)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, traffic[0], time.perf_counter() - start
+
+
+def report(title, samples, traffic, elapsed):
+    total = sum(len(values) for values in samples.values())
+    print(f"{title}: {total} 个请求 {elapsed:.2f} s（{total / elapsed:.0f} 请求/秒），传输 {traffic / 1024:.0f} KB")
+    for kind, values in sorted(samples.items()):
+        print(f"    {kind}: 中位数 {percentile(values, 0.5):7.2f} ms   90分位 {percentile(values, 0.9):7.2f} ms"
+              f"   99分位 {percentile(values, 0.99):7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地HTTP服务性能测试")
+    parser.add_argument("--nodes", type=int, default=20000)
+    parser.add_argument("--photos", type=int, default=40, help="生成的照片数")
+    parser.add_argument("--kiosks", type=int, default=4, help="并发的展台数")
+    parser.add_argument("--visits", type=int, default=300, help="每个展台浏览的节点数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="hitsz_server_bench_")
+    try:
+        dot_path, annotations_path = generate_corpus(workdir, args.nodes, 3, "uniform", 200, args.photos, 2, 0.3,
+                                                     args.seed)
+        with open(annotations_path, encoding="utf-8") as f:
+            annotations = json.load(f)
+        node_ids = list(annotations)
+        photos = {node_id: data.get("photo_paths") for node_id, data in annotations.items()}
+        print(f"{args.nodes} 个节点，{len(node_ids)} 条标注，完整标注文件 {os.path.getsize(annotations_path) / 1024:.0f} KB")
+
+        start = time.perf_counter()
+        server = ServerThread(port=0, dot_path=dot_path, annotations_path=annotations_path,
+                              photos_dir=os.path.join(workdir, "photo_HITSZ"), root=workdir)
+        server.start()
+        server.ready.wait()
+        if server.error is not None:
+            print(f"启动服务出错: {server.error}")
+            return 1
+        print(f"服务启动（加载图和标注） {time.perf_counter() - start:.2f} s")
+
+        report("冷缓存", *run_round(server.port, node_ids, photos, args.kiosks, args.visits, args.seed))
+        report("热缓存", *run_round(server.port, node_ids, photos, args.kiosks, args.visits, args.seed))
+        report("带ETag重新验证", *run_round(server.port, node_ids, photos, args.kiosks, args.visits, args.seed, True))
+        server.stop()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""查看器热点路径的基准测试套件，在无显示环境下运行，结果输出为JSON：
+
+    python benchmarks/bench_suite.py --nodes 20000 --output result.json
+    python benchmarks/bench_suite.py --nodes 20000 --baseline result.json
+
+先在临时目录生成DOT文件、标注JSON和照片，再分别计时 build_graph_from_dot、
+NodeViewer.parse_dot_file、HITSZFlowViewer.load_annotations / save_annotations、
+on_category_changed、show_node_detail 和 NodeViewer.display_node。
+带 --baseline 时与之前的结果比较，中位数或90分位变慢超过阈值时以非零状态退出。
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import contextlib
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QImage, QColor
+from PyQt5.QtCore import QT_VERSION_STR
+from bench_dot_parse import PREFIXES
+from bench_search import random_text, percentile
+
+# 每次保存前修改描述的节点数
+EDITS_PER_SAVE = 10
+# 结果中的分位数
+PERCENTILES = [("p50", 0.50), ("p90", 0.90), ("p99", 0.99)]
+
+
+def node_name(i):
+    return f"{PREFIXES[i % len(PREFIXES)]}{i}"
+
+
+def pick_endpoint(rng, node_count, degree):
+    """uniform：均匀选取；powerlaw：按帕累托分布选取，少数节点度数很高"""
+    if degree == "powerlaw":
+        return min(node_count - 1, int(rng.paretovariate(1.2)) - 1)
+    return rng.randrange(node_count)
+
+
+def generate_corpus(workdir, nodes, avg_degree, degree, description_chars, photos, photos_per_node,
+                    annotated, seed=0):
+    """在 workdir 下生成 hitsz_flow.dot、node_annotations.json 和 photo_HITSZ/ 照片"""
+    rng = random.Random(seed)
+    # 幂律分布下把高度数节点打散到各个编号上
+    shuffle = list(range(nodes))
+    rng.shuffle(shuffle)
+    lines = [
+        "digraph G {",
+        "  rankdir=LR;",
+        '  node [shape=box, style=filled, fillcolor=lightblue, fontname="SimSun"];',
+        '  edge [fontname="SimSun"];',
+    ]
+    for i in range(nodes):
+        lines.append(f'  {node_name(i)} [label="{random_text(rng, 4, 12)}\\n{i}"];')
+    for e in range(nodes * avg_degree):
+        a = node_name(shuffle[pick_endpoint(rng, nodes, degree)])
+        b = node_name(shuffle[pick_endpoint(rng, nodes, degree)])
+        if e % 5 == 0:
+            lines.append(f'  {a} -> {b} [label="关系{e % 37}"];')
+        else:
+            lines.append(f"  {a} -> {b};")
+    lines.append("}")
+    dot_path = os.path.join(workdir, "hitsz_flow.dot")
+    with open(dot_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+    photo_dir = os.path.join(workdir, "photo_HITSZ")
+    os.makedirs(photo_dir, exist_ok=True)
+    photo_names = []
+    for k in range(photos):
+        image = QImage(640, 480, QImage.Format_RGB32)
+        image.fill(QColor.fromHsv(k * 37 % 360, 120, 200))
+        name = f"photo_{k}.jpg"
+        image.save(os.path.join(photo_dir, name), "JPG")
+        photo_names.append(name)
+
+    annotations = {}
+    for i in range(nodes):
+        if rng.random() >= annotated:
+            continue
+        node_data = {"description": random_text(rng, description_chars // 2, description_chars)}
+        if photo_names and photos_per_node:
+            node_data["photo_paths"] = rng.sample(photo_names, min(len(photo_names), rng.randint(1, photos_per_node)))
+        annotations[node_name(i)] = node_data
+    annotations_path = os.path.join(workdir, "node_annotations.json")
+    with open(annotations_path, "w", encoding="utf-8") as f:
+        json.dump(annotations, f, ensure_ascii=False, indent=4)
+    return dot_path, annotations_path
+
+
+def summarize(samples):
+    """毫秒样本 -> 次数、平均、最小、分位数、最大"""
+    result = {"count": len(samples), "mean_ms": sum(samples) / len(samples),
+              "min_ms": min(samples), "max_ms": max(samples)}
+    for name, p in PERCENTILES:
+        result[f"{name}_ms"] = percentile(samples, p)
+    return result
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def log(text):
+    """进度输出到标准错误，标准输出只留给JSON"""
+    print(text, file=sys.stderr)
+
+
+def drain(app):
+    """处理排队的事件（分批插入的列表行、缩略图回调），不计入测量"""
+    for _ in range(20):
+        app.processEvents()
+
+
+def run_suite(app, args, workdir):
+    import hitsz_viewer
+    import hitsz_node_viewer
+    from hitsz_graph_cache import invalidate_compiled, cache_path_for
+
+    start = time.perf_counter()
+    dot_path, annotations_path = generate_corpus(
+        workdir, args.nodes, args.degree, args.distribution, args.description_chars,
+        args.photos, args.photos_per_node, args.annotated, args.seed)
+    log(f"生成语料 {time.perf_counter() - start:.1f} s: DOT {os.path.getsize(dot_path) / 1e6:.1f} MB，"
+        f"标注 {os.path.getsize(annotations_path) / 1e6:.1f} MB")
+    results = {}
+
+    def record(name, samples):
+        results[name] = summarize(samples)
+        log(f"{name:<40} p50 {results[name]['p50_ms']:9.2f} ms   p90 {results[name]['p90_ms']:9.2f} ms")
+
+    def cold_build():
+        invalidate_compiled(dot_path)
+        if os.path.exists(cache_path_for(dot_path)):
+            os.remove(cache_path_for(dot_path))
+        return hitsz_viewer.build_graph_from_dot(dot_path, annotations_path)
+
+    def cached_build():
+        invalidate_compiled(dot_path)
+        return hitsz_viewer.build_graph_from_dot(dot_path, annotations_path)
+
+    record("build_graph_from_dot（解析DOT）", [timed(cold_build) for _ in range(args.heavy_repeat)])
+    record("build_graph_from_dot（编译缓存）", [timed(cached_build) for _ in range(args.repeat)])
+
+    # 标注文件放在语料目录里，不碰仓库中的 node_annotations.json
+    class BenchFlowViewer(hitsz_viewer.HITSZFlowViewer):
+        def get_annotations_file_path(self):
+            return annotations_path
+
+    graph = cached_build()
+    viewer = BenchFlowViewer(graph)
+    viewer.show()
+    viewer.build_detail_panels()
+    drain(app)
+
+    record("HITSZFlowViewer.load_annotations", [timed(viewer.load_annotations) for _ in range(args.repeat)])
+
+    rng = random.Random(args.seed + 1)
+    node_ids = [node_id for node_id in graph if node_id in viewer.types.node_type]
+    save_samples = []
+    for k in range(args.heavy_repeat):
+        for node_id in rng.sample(node_ids, min(EDITS_PER_SAVE, len(node_ids))):
+            graph.nodes[node_id]["description"] = f"编辑{k} " + random_text(rng, 10, 40)
+            viewer.autosaver.mark_dirty(node_id)
+        save_samples.append(timed(viewer.save_annotations))
+    record(f"HITSZFlowViewer.save_annotations（{EDITS_PER_SAVE}处编辑）", save_samples)
+
+    category_samples = []
+    for k in range(args.repeat):
+        item = viewer.category_list.item(k % viewer.category_list.count())
+        category_samples.append(timed(viewer.on_category_changed, item, None))
+        drain(app)
+    record("HITSZFlowViewer.on_category_changed", category_samples)
+
+    detail_samples = []
+    for node_id in rng.sample(node_ids, min(args.repeat, len(node_ids))):
+        detail_samples.append(timed(viewer.show_node_detail, node_id))
+        drain(app)
+    record("HITSZFlowViewer.show_node_detail", detail_samples)
+    viewer.autosaver.shutdown(compact=False)
+
+    # NodeViewer 按相对路径读取数据文件和照片目录
+    os.chdir(workdir)
+    invalidate_compiled(hitsz_node_viewer.DOT_FILE)
+    node_viewer = hitsz_node_viewer.NodeViewer()
+    node_viewer.show()
+    drain(app)
+
+    def parse_dot():
+        invalidate_compiled(hitsz_node_viewer.DOT_FILE)
+        node_viewer.parse_dot_file(hitsz_node_viewer.DOT_FILE)
+
+    record("NodeViewer.parse_dot_file（编译缓存）", [timed(parse_dot) for _ in range(args.repeat)])
+
+    display_samples = []
+    all_ids = [node_id for node_id in node_viewer.graph]
+    for node_id in rng.sample(all_ids, min(args.repeat, len(all_ids))):
+        display_samples.append(timed(node_viewer.display_node, node_id))
+        # 等后台缩略图解码和预取结束，不干扰下一次测量
+        node_viewer.thumbnails.pool.waitForDone()
+        node_viewer.thumbnails.prefetch_pool.waitForDone()
+        drain(app)
+    record("NodeViewer.display_node", display_samples)
+    return results
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """与基线比较中位数和90分位，返回变慢超过阈值的测量项；差值小于 min_delta_ms 的抖动不算"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        for key in ("p50_ms", "p90_ms"):
+            before, after = previous[key], current[key]
+            if after - before >= min_delta_ms and after > before * threshold:
+                regressions.append((name, key, before, after))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查看器热点路径基准测试（JSON输出）")
+    parser.add_argument("--nodes", type=int, default=5000, help="节点数")
+    parser.add_argument("--degree", type=int, default=4, help="平均出度")
+    parser.add_argument("--distribution", choices=["uniform", "powerlaw"], default="powerlaw", help="度数分布")
+    parser.add_argument("--description-chars", type=int, default=400, help="每段描述的最大字数")
+    parser.add_argument("--annotated", type=float, default=0.5, help="有标注的节点比例")
+    parser.add_argument("--photos", type=int, default=20, help="生成的照片文件数")
+    parser.add_argument("--photos-per-node", type=int, default=2, help="每个标注节点最多引用的照片数")
+    parser.add_argument("--repeat", type=int, default=50, help="轻量操作的测量次数")
+    parser.add_argument("--heavy-repeat", type=int, default=5, help="解析DOT、保存标注的测量次数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON结果文件，默认输出到标准输出")
+    parser.add_argument("--baseline", help="之前的JSON结果，用于发现性能回归")
+    parser.add_argument("--threshold", type=float, default=1.25, help="变慢超过这个倍数算回归")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="变慢不到这个毫秒数的不算回归")
+    parser.add_argument("--keep", action="store_true", help="保留生成的语料目录")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv[:1])
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="hitsz_bench_")
+    try:
+        # 查看器自己的提示信息也转到标准错误
+        with contextlib.redirect_stdout(sys.stderr):
+            results = run_suite(app, args, workdir)
+    finally:
+        os.chdir(cwd)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "qt": QT_VERSION_STR,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {key: value for key, value in vars(args).items() if key not in ("output", "baseline", "threshold", "min_delta_ms", "keep")},
+        },
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        for name, key, before, after in regressions:
+            log(f"性能回归: {name} {key} {before:.2f} ms -> {after:.2f} ms")
+        if regressions:
+            sys.exit(1)
+        log("没有超过阈值的性能回归")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+// 静态导出站点的前端：清单只记录节点ID到分片文件的映射，
+// 每次只请求正在查看的节点，并在空闲时预取相邻节点
+
+const SHARD_CACHE_LIMIT = 200; // 最多缓存的节点分片数
+let manifest = null;
+const shardCache = new Map(); // 节点ID -> Promise(分片数据)
+
+// 获取节点分片，同一节点只请求一次
+function loadShard(nodeId) {
+    if (shardCache.has(nodeId)) {
+        const cached = shardCache.get(nodeId);
+        // 移到最近使用的一端
+        shardCache.delete(nodeId);
+        shardCache.set(nodeId, cached);
+        return cached;
+    }
+    const shard = manifest.nodes[nodeId];
+    if (!shard) {
+        return Promise.reject(new Error(`未知节点: ${nodeId}`));
+    }
+    const request = fetch(`nodes/${shard}`).then(response => {
+        if (!response.ok) {
+            throw new Error(`加载节点失败: ${response.status}`);
+        }
+        return response.json();
+    });
+    // 请求失败时从缓存中移除，下次重新请求
+    request.catch(() => shardCache.delete(nodeId));
+    shardCache.set(nodeId, request);
+    while (shardCache.size > SHARD_CACHE_LIMIT) {
+        shardCache.delete(shardCache.keys().next().value);
+    }
+    return request;
+}
+
+// 预取相邻节点，不阻塞当前节点的显示
+function prefetchNeighbors(node) {
+    const prefetch = () => {
+        for (const [neighborId] of node.forward.concat(node.backward)) {
+            loadShard(neighborId).catch(() => {});
+        }
+    };
+    if ('requestIdleCallback' in window) {
+        requestIdleCallback(prefetch);
+    } else {
+        setTimeout(prefetch, 200);
+    }
+}
+
+function renderNeighbors(containerId, neighbors, emptyText) {
+    const container = document.querySelector(`#${containerId} .buttons`);
+    container.replaceChildren();
+    if (neighbors.length === 0) {
+        const empty = document.createElement('div');
+        empty.className = 'empty';
+        empty.textContent = emptyText;
+        container.appendChild(empty);
+        return;
+    }
+    for (const [neighborId, label, edgeLabel] of neighbors) {
+        const button = document.createElement('button');
+        button.textContent = edgeLabel ? `${label} (${edgeLabel})` : label;
+        button.addEventListener('click', () => { location.hash = encodeURIComponent(neighborId); });
+        container.appendChild(button);
+    }
+}
+
+function renderPhotos(photos) {
+    const container = document.getElementById('node-photos');
+    container.replaceChildren();
+    for (const photo of photos) {
+        const img = document.createElement('img');
+        // 浏览器按显示宽度从srcset中挑选合适的版本
+        img.src = photo.src;
+        img.srcset = photo.srcset;
+        img.sizes = '(max-width: 800px) 100vw, 50vw';
+        img.width = photo.width;
+        img.height = photo.height;
+        img.loading = 'lazy';
+        img.decoding = 'async';
+        container.appendChild(img);
+    }
+}
+
+async function showNode(nodeId) {
+    try {
+        const node = await loadShard(nodeId);
+        document.title = node.label;
+        document.getElementById('node-label').textContent = node.label;
+        document.getElementById('node-description').textContent = node.description || '';
+        renderPhotos(node.photos);
+        renderNeighbors('forward', node.forward, '无前向节点');
+        renderNeighbors('backward', node.backward, '无后向节点');
+        prefetchNeighbors(node);
+    } catch (error) {
+        console.error('显示节点失败:', error);
+        document.getElementById('node-label').textContent = '节点加载失败';
+    }
+}
+
+function currentNodeId() {
+    const hash = decodeURIComponent(location.hash.slice(1));
+    return hash && manifest.nodes[hash] ? hash : manifest.start;
+}
+
+document.addEventListener('DOMContentLoaded', async function () {
+    try {
+        const response = await fetch(document.body.dataset.manifest);
+        manifest = await response.json();
+    } catch (error) {
+        console.error('加载清单失败:', error);
+        return;
+    }
+    window.addEventListener('hashchange', () => showNode(currentNodeId()));
+    showNode(currentNodeId());
+});
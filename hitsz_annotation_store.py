@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import mmap
+import json
+import struct
+import weakref
+import threading
+from collections.abc import MutableMapping
+from hitsz_graph_cache import file_stamp, stamp_matches, patch_stamp
+
+# 标注存储放在JSON快照旁边，JSON仍是唯一的权威数据，存储文件随时可以删除重建
+STORE_MAGIC = b"HAS1"
+STORE_VERSION = 1
+STORE_SUFFIX = ".store"
+
+# 文件头：魔数、版本、条目数；随后是JSON快照的 (mtime_ns, 大小, sha1)
+HEADER = struct.Struct("<4sII")
+STAMP = struct.Struct("<qq20s")
+# 定宽条目：节点ID、其余字段JSON、描述正文在数据区中的起始偏移。
+# 三段首尾相接，下一条目的节点ID偏移就是本条目描述的结束位置，末尾多一个哨兵条目
+ENTRY = struct.Struct("<QQQ")
+# 按节点ID的UTF-8字节序排好的条目编号，用于二分查找
+SORTED = struct.Struct("<I")
+
+DESCRIPTION = "description"
+
+# 进程内仍映射着存储文件的 AnnotationStore（弱引用），重写存储文件之前先解除它们的映射
+_mapped = {}
+_mapped_lock = threading.Lock()
+
+
+def encode_store(annotations, stamp):
+    """把标注字典编码为存储文件内容，描述以UTF-8原文单独存放，不做JSON转义"""
+    count = len(annotations)
+    index_offset = HEADER.size + STAMP.size
+    sorted_offset = index_offset + (count + 1) * ENTRY.size
+    blob_offset = sorted_offset + count * SORTED.size
+
+    entries = []
+    parts = []
+    keys = []
+    pos = blob_offset
+    for key, node_data in annotations.items():
+        description = node_data.get(DESCRIPTION)
+        if isinstance(description, str):
+            # null 表示描述在正文段里；标注值不会是null（日志用它表示删除字段）
+            node_data = dict(node_data)
+            node_data[DESCRIPTION] = None
+            description = description.encode('utf-8')
+        else:
+            description = b""
+        key_bytes = key.encode('utf-8')
+        meta = json.dumps(node_data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        entries.append(ENTRY.pack(pos, pos + len(key_bytes), pos + len(key_bytes) + len(meta)))
+        parts.extend((key_bytes, meta, description))
+        keys.append(key_bytes)
+        pos += len(key_bytes) + len(meta) + len(description)
+    entries.append(ENTRY.pack(pos, pos, pos))
+    order = sorted(range(count), key=keys.__getitem__)
+
+    head = HEADER.pack(STORE_MAGIC, STORE_VERSION, count) + STAMP.pack(*stamp)
+    return b"".join([head, *entries, *(SORTED.pack(k) for k in order), *parts])
+
+
+class AnnotationStore(MutableMapping):
+    """mmap映射的标注存储，按节点解码；描述正文只在 description() 或取完整条目时才解码
+
+    修改写入覆盖层，不影响存储文件；写盘仍通过标注日志和JSON快照完成。
+    """
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.count = HEADER.unpack_from(buf, 0)[2]
+        self.index_offset = HEADER.size + STAMP.size
+        self.sorted_offset = self.index_offset + (self.count + 1) * ENTRY.size
+        self.overlay = {}
+        self.deleted = set()
+
+    def entry(self, k):
+        """第k个条目的 (节点ID, 字段, 描述, 结束) 偏移"""
+        key_off, meta_off, desc_off = ENTRY.unpack_from(self.buf, self.index_offset + k * ENTRY.size)
+        end = ENTRY.unpack_from(self.buf, self.index_offset + (k + 1) * ENTRY.size)[0]
+        return key_off, meta_off, desc_off, end
+
+    def key_bytes(self, k):
+        key_off, meta_off, _ = ENTRY.unpack_from(self.buf, self.index_offset + k * ENTRY.size)
+        return self.buf[key_off:meta_off]
+
+    def find(self, key):
+        """节点ID -> 条目编号，在排好序的编号上二分查找"""
+        target = key.encode('utf-8')
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            k = SORTED.unpack_from(self.buf, self.sorted_offset + mid * SORTED.size)[0]
+            if self.key_bytes(k) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count:
+            k = SORTED.unpack_from(self.buf, self.sorted_offset + lo * SORTED.size)[0]
+            if self.key_bytes(k) == target:
+                return k
+        return None
+
+    def decode(self, k, with_description=True):
+        _, meta_off, desc_off, end = self.entry(k)
+        node_data = json.loads(str(self.buf[meta_off:desc_off], 'utf-8'))
+        if DESCRIPTION in node_data and node_data[DESCRIPTION] is None:
+            if with_description:
+                node_data[DESCRIPTION] = str(self.buf[desc_off:end], 'utf-8')
+            else:
+                del node_data[DESCRIPTION]
+        return node_data
+
+    def raw(self, key):
+        """条目在文件中的原始字节（字段和描述），覆盖层中的条目或不存在时返回None"""
+        if key in self.overlay or key in self.deleted:
+            return None
+        k = self.find(key)
+        if k is None:
+            return None
+        _, meta_off, _, end = self.entry(k)
+        return bytes(self.buf[meta_off:end])
+
+    def fields(self, key):
+        """除描述以外的字段，不解码描述正文；没有该节点时返回空字典"""
+        if key in self.overlay:
+            return {field: value for field, value in self.overlay[key].items() if field != DESCRIPTION}
+        if key in self.deleted:
+            return {}
+        k = self.find(key)
+        return {} if k is None else self.decode(k, with_description=False)
+
+    def description(self, key, default=None):
+        """只解码这个节点的描述"""
+        if key in self.overlay:
+            return self.overlay[key].get(DESCRIPTION, default)
+        if key in self.deleted:
+            return default
+        k = self.find(key)
+        if k is None:
+            return default
+        return self.decode(k).get(DESCRIPTION, default)
+
+    def __getitem__(self, key):
+        if key in self.overlay:
+            return self.overlay[key]
+        if key in self.deleted:
+            raise KeyError(key)
+        k = self.find(key)
+        if k is None:
+            raise KeyError(key)
+        # 解码后放入覆盖层，调用方对返回字典的修改会被保留
+        node_data = self.decode(k)
+        self.overlay[key] = node_data
+        return node_data
+
+    def __setitem__(self, key, value):
+        self.deleted.discard(key)
+        self.overlay[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.overlay.pop(key, None)
+        if self.find(key) is not None:
+            self.deleted.add(key)
+
+    def __contains__(self, key):
+        if key in self.overlay:
+            return True
+        return key not in self.deleted and self.find(key) is not None
+
+    def __iter__(self):
+        seen = set()
+        for k in range(self.count):
+            key = str(self.key_bytes(k), 'utf-8')
+            seen.add(key)
+            if key not in self.deleted:
+                yield key
+        for key in list(self.overlay):
+            if key not in seen:
+                yield key
+
+    def __len__(self):
+        extra = sum(1 for key in self.overlay if self.find(key) is None)
+        return self.count - len(self.deleted) + extra
+
+    def release(self):
+        """把映射的内容复制到内存并解除映射，存储照常可用
+
+        Windows 上无法替换仍被映射的文件，write_store 重写存储文件之前对同一文件的存储调用。
+        """
+        if not isinstance(self.buf, mmap.mmap):
+            return
+        buf = self.buf
+        self.buf = bytes(buf)
+        try:
+            buf.close()
+        except BufferError as e:
+            # 别处还持有旧的内存视图，映射要等它们释放后才会解除
+            print(f"解除标注存储映射出错: {e}")
+
+    def view(self):
+        """共用同一个映射的快照：只复制覆盖层和删除集合，完整解码（copy）可以留给工作线程；要在存储被 release 之前用完"""
+        snapshot = AnnotationStore(self.buf)
+        snapshot.overlay = {key: dict(value) for key, value in self.overlay.items()}
+        snapshot.deleted = set(self.deleted)
+        return snapshot
+
+    def copy(self):
+        """完整解码为普通字典（用于写回JSON快照），不填充覆盖层"""
+        result = {}
+        for k in range(self.count):
+            key = str(self.key_bytes(k), 'utf-8')
+            if key in self.overlay:
+                result[key] = self.overlay[key]
+            elif key not in self.deleted:
+                result[key] = self.decode(k)
+        for key, value in self.overlay.items():
+            result.setdefault(key, value)
+        return result
+
+
+def empty_store():
+    return AnnotationStore(encode_store({}, file_stamp(None)))
+
+
+def store_path_for(json_path):
+    return json_path + STORE_SUFFIX
+
+
+def register_mapped(store_path, store):
+    with _mapped_lock:
+        refs = _mapped.setdefault(os.path.abspath(store_path), [])
+        refs[:] = [ref for ref in refs if ref() is not None]
+        refs.append(weakref.ref(store))
+
+
+def release_mapped(store_path):
+    """解除进程内对该存储文件的全部映射"""
+    with _mapped_lock:
+        refs = _mapped.pop(os.path.abspath(store_path), [])
+    for ref in refs:
+        store = ref()
+        if store is not None:
+            store.release()
+
+
+def write_store(json_path, annotations):
+    """按当前JSON快照的时间戳写入存储文件，失败时不影响正常使用"""
+    data = encode_store(annotations, file_stamp(json_path))
+    store_path = store_path_for(json_path)
+    tmp_path = store_path + ".tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        release_mapped(store_path)
+        os.replace(tmp_path, store_path)
+    except OSError as e:
+        print(f"写入标注存储失败: {e}")
+    return data
+
+
+def map_store(store_path, json_path):
+    """存储文件与JSON快照一致时映射它，否则返回None"""
+    if not os.path.exists(store_path) or os.path.getsize(store_path) < HEADER.size + STAMP.size:
+        return None
+    try:
+        with open(store_path, 'rb') as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _ = HEADER.unpack_from(buf, 0)
+        ok, full = False, None
+        if magic == STORE_MAGIC and version == STORE_VERSION:
+            ok, full = stamp_matches(STAMP.unpack_from(buf, HEADER.size), json_path)
+        if not ok:
+            # 先解除映射，重建时才能替换文件
+            buf.close()
+            return None
+        if full is not None:
+            patch_stamp(store_path, HEADER.size, full)
+        store = AnnotationStore(buf)
+        register_mapped(store_path, store)
+        return store
+    except (OSError, ValueError, struct.error) as e:
+        print(f"读取标注存储失败，将重新构建: {e}")
+        return None
+
+
+def open_store(json_path):
+    """打开JSON快照对应的标注存储，存储文件缺失或过期时从JSON重建"""
+    store = map_store(store_path_for(json_path), json_path)
+    if store is not None:
+        return store
+    if not os.path.exists(json_path):
+        return empty_store()
+    with open(json_path, 'r', encoding='utf-8') as f:
+        annotations = json.load(f)
+    return AnnotationStore(write_store(json_path, annotations))
+
+
+def changed_nodes(old, new):
+    """两个版本的标注中内容不同的节点；两边都是未改动的存储条目时直接比较原始字节"""
+    changed = []
+    for key in set(old) | set(new):
+        old_raw = old.raw(key) if isinstance(old, AnnotationStore) else None
+        new_raw = new.raw(key) if isinstance(new, AnnotationStore) else None
+        if old_raw is not None and new_raw is not None:
+            if old_raw != new_raw:
+                changed.append(key)
+        elif old.get(key, {}) != new.get(key, {}):
+            changed.append(key)
+    return changed
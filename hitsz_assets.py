@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""为标注中引用的照片生成分档位的缩小版本
+
+    python hitsz_assets.py --photos picture
+    python hitsz_assets.py --annotations node_annotations.json node_annotations2.json --photos picture --tiers 320 640 960 1280
+
+缩小后的文件和清单写在照片目录下的 _derived/ 中，清单中的路径都相对于照片目录：
+    {"version": 1, "tiers": [...], "photos": {原路径: {"mtime_ns", "size", "width", "height",
+        "variants": [{"width", "height", "webp": 路径, "jpg"或"png": 路径}, ...]}}}
+查看器按显示尺寸选用能覆盖它的最小档位，源文件比清单新时仍使用原图。
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+from PyQt5.QtGui import QImage, QImageReader, QImageWriter, QImageIOHandler
+from PyQt5.QtCore import Qt, QSize
+from hitsz_journal import AnnotationJournal
+from hitsz_thumbnails import decode_scaled, target_size
+
+# 照片目录下存放缩小版本和清单的子目录
+DERIVED_DIR = "_derived"
+MANIFEST_NAME = "manifest.json"
+# 默认档位：列表缩略图、节点页（最宽600）、预览窗口（780x520）、高分屏
+DEFAULT_TIERS = [320, 640, 960, 1280]
+DEFAULT_QUALITY = 80
+# 查看器优先读取的格式，按体积从小到大
+PREFERRED_FORMATS = ("webp", "jpg", "png")
+
+
+def file_signature(path):
+    """(mtime_ns, 大小)，文件不存在时为None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def writable_formats():
+    return {bytes(fmt).decode() for fmt in QImageWriter.supportedImageFormats()}
+
+
+def readable_formats():
+    return {bytes(fmt).decode() for fmt in QImageReader.supportedImageFormats()}
+
+
+def annotation_photo_paths(annotations):
+    """标注中引用的全部照片路径，兼容旧版本的单路径字段"""
+    paths = []
+    for node_data in annotations.values():
+        node_paths = list(node_data.get("photo_paths") or [])
+        if node_data.get("photo_path") and node_data["photo_path"] not in node_paths:
+            node_paths.append(node_data["photo_path"])
+        paths.extend(node_paths)
+    return paths
+
+
+def photo_sources(annotations, photos_dir):
+    """标注中的照片路径 -> 实际文件路径，找不到的照片跳过"""
+    sources = {}
+    for path in annotation_photo_paths(annotations):
+        full_path = path if os.path.isabs(path) else os.path.join(photos_dir, path)
+        if os.path.exists(full_path):
+            sources[path] = full_path
+        else:
+            print(f"找不到照片: {full_path}")
+    return sources
+
+
+def tier_widths(tiers, width):
+    """比原图窄的档位，再加上不超过最大档位的原宽，不放大"""
+    widths = {tier for tier in tiers if tier < width}
+    widths.add(min(width, max(tiers)))
+    return sorted(widths)
+
+
+def is_opaque(image):
+    """带透明通道的格式里，很多截图和照片实际上每个像素都不透明"""
+    if not image.hasAlphaChannel():
+        return True
+    alpha = image.convertToFormat(QImage.Format_Alpha8)
+    bits = alpha.constBits()
+    bits.setsize(alpha.sizeInBytes())
+    data = bits.asstring()
+    stride, width = alpha.bytesPerLine(), alpha.width()
+    # 每行末尾可能有对齐填充，只检查有效部分
+    return all(data[y * stride:y * stride + width].count(255) == width for y in range(alpha.height()))
+
+
+def derive_photo(task):
+    """在子进程中为一张照片生成各档位、各格式的版本，写到 out_dir/rel_dir 下，返回 (源路径, 清单条目或None)
+
+    条目中的路径相对于 out_dir；静态网站导出也用它生成 img/ 下的文件。
+    """
+    src_path, out_dir, rel_dir, tiers, quality, formats = task
+    try:
+        signature = file_signature(src_path)
+        with open(src_path, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()[:16]
+        reader = QImageReader(src_path)
+        reader.setAutoTransform(True)
+        # 最大档位以内按原尺寸解码，更小的档位从它缩小，源文件只解码一次
+        image = decode_scaled(src_path, max(tiers), 0)
+        if image.isNull():
+            print(f"无法解码照片: {src_path}")
+            return src_path, None
+        # 真正有透明区域的照片不能存成JPEG，后备格式改用PNG
+        if is_opaque(image):
+            image = image.convertToFormat(QImage.Format_RGB32)
+            fallback = "jpg"
+        else:
+            fallback = "png"
+        variant_formats = [fmt for fmt in formats if fmt == "webp"] + [fallback]
+
+        variants = []
+        for width in tier_widths(tiers, image.width()):
+            scaled = image if width == image.width() else image.scaledToWidth(width, Qt.SmoothTransformation)
+            variant = {"width": scaled.width(), "height": scaled.height()}
+            for fmt in variant_formats:
+                rel_path = f"{rel_dir}/{digest}-{width}.{fmt}"
+                path = os.path.join(out_dir, rel_path)
+                if not os.path.exists(path):
+                    tmp_path = f"{path}.{os.getpid()}.tmp.{fmt}"
+                    if not scaled.save(tmp_path, fmt.upper(), quality):
+                        print(f"保存 {path} 失败")
+                        continue
+                    os.replace(tmp_path, path)
+                variant[fmt] = rel_path
+            variants.append(variant)
+
+        size = reader.size()
+        if not size.isValid():
+            size = image.size()
+        elif reader.transformation() & QImageIOHandler.TransformationRotate90:
+            # 按EXIF方向旋转后宽高互换，与解码结果一致
+            size.transpose()
+        return src_path, {"mtime_ns": signature[0], "size": signature[1],
+                          "width": size.width(), "height": size.height(), "variants": variants}
+    except OSError as e:
+        print(f"处理照片 {src_path} 出错: {e}")
+        return src_path, None
+
+
+def derived_files(entry):
+    for variant in entry["variants"]:
+        for fmt in PREFERRED_FORMATS:
+            if fmt in variant:
+                yield variant[fmt]
+
+
+def is_current(entry, src_path, photos_dir, tiers):
+    """清单条目与源文件一致、档位配置相同且文件都在，不需要重新生成"""
+    if entry is None or file_signature(src_path) != (entry.get("mtime_ns"), entry.get("size")):
+        return False
+    if [v["width"] for v in entry["variants"]] != tier_widths(tiers, min(entry["width"], max(tiers))):
+        return False
+    return all(os.path.exists(os.path.join(photos_dir, path)) for path in derived_files(entry))
+
+
+def manifest_path(photos_dir):
+    return os.path.join(photos_dir, DERIVED_DIR, MANIFEST_NAME)
+
+
+def read_manifest(photos_dir):
+    try:
+        with open(manifest_path(photos_dir), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"version": 1, "photos": {}}
+
+
+def build_assets(annotation_paths, photos_dir, tiers=DEFAULT_TIERS, quality=DEFAULT_QUALITY,
+                 workers=None, force=False):
+    """为所有标注文件引用的照片生成缩小版本并写入清单，返回统计信息"""
+    sources = {}
+    for path in annotation_paths:
+        if os.path.exists(path):
+            # 只读：不写标注存储，不截断其他进程可能正在追加的日志尾部
+            sources.update(photo_sources(AnnotationJournal(path).read(), photos_dir))
+        else:
+            print(f"找不到标注文件: {path}")
+
+    old_photos = {} if force else read_manifest(photos_dir).get("photos", {})
+    photos = {}
+    tasks = []
+    formats = [fmt for fmt in ("webp",) if fmt in writable_formats()]
+    for path, src in sorted(sources.items()):
+        if is_current(old_photos.get(path), src, photos_dir, tiers):
+            photos[path] = old_photos[path]
+        else:
+            tasks.append((src, photos_dir, DERIVED_DIR, tiers, quality, formats))
+    # 同一文件可能以不同写法被引用，只处理一次
+    unique_tasks = list({task[0]: task for task in tasks}.values())
+
+    os.makedirs(os.path.join(photos_dir, DERIVED_DIR), exist_ok=True)
+    if workers == 0 or len(unique_tasks) <= 1:
+        by_source = dict(map(derive_photo, unique_tasks))
+    else:
+        # 查看器只用到 AssetManifest，进程池（连带 multiprocessing）只在生成时导入
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            by_source = dict(executor.map(derive_photo, unique_tasks))
+    for path, src in sources.items():
+        if path not in photos and by_source.get(src) is not None:
+            photos[path] = by_source[src]
+
+    manifest = {"version": 1, "tiers": sorted(tiers), "photos": photos}
+    tmp_path = manifest_path(photos_dir) + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path(photos_dir))
+
+    removed = prune(photos_dir, {path for entry in photos.values() for path in derived_files(entry)})
+    return {"photos": len(photos), "generated": len(unique_tasks), "removed": removed}
+
+
+def prune(photos_dir, keep):
+    """删除清单不再引用的缩小版本"""
+    removed = 0
+    directory = os.path.join(photos_dir, DERIVED_DIR)
+    for name in os.listdir(directory):
+        if name != MANIFEST_NAME and f"{DERIVED_DIR}/{name}" not in keep:
+            os.remove(os.path.join(directory, name))
+            removed += 1
+    return removed
+
+
+class AssetManifest:
+    """查看器端的清单：按显示尺寸为照片选择最合适的缩小版本"""
+
+    def __init__(self, photos_dir, photos=None):
+        self.photos_dir = os.path.abspath(photos_dir)
+        self.formats = [fmt for fmt in PREFERRED_FORMATS if fmt in readable_formats()]
+        # 原图绝对路径 -> 清单条目，标注中的相对写法也可以直接查
+        self.entries = {}
+        for path, entry in (photos or {}).items():
+            self.entries[path] = entry
+            self.entries[os.path.join(self.photos_dir, path)] = entry
+
+    @classmethod
+    def load(cls, photos_dir):
+        """读取照片目录的清单，没有清单时 pick 总是返回原图"""
+        return cls(photos_dir, read_manifest(photos_dir).get("photos", {}))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def pick(self, path, max_width, max_height=0):
+        """返回能覆盖显示尺寸的最小档位文件路径，没有合适档位时返回原路径"""
+        entry = self.entries.get(path) or self.entries.get(os.path.abspath(path))
+        if entry is None:
+            return path
+        source = path if os.path.exists(path) else os.path.join(self.photos_dir, path)
+        # 源文件改过之后清单已过期，宁可解码原图也不显示旧照片
+        if file_signature(source) != (entry["mtime_ns"], entry["size"]):
+            return source
+        size = target_size(QSize(entry["width"], entry["height"]), max_width, max_height)
+        for variant in entry["variants"]:
+            if variant["width"] >= size.width() and variant["height"] >= size.height():
+                for fmt in self.formats:
+                    if fmt in variant:
+                        return os.path.join(self.photos_dir, variant[fmt])
+        return source
+
+
+def main():
+    parser = argparse.ArgumentParser(description="为标注中的照片生成分档位的缩小版本")
+    parser.add_argument("--annotations", nargs="+", default=["node_annotations.json", "node_annotations2.json"])
+    parser.add_argument("--photos", default="picture", help="标注中相对照片路径的根目录")
+    parser.add_argument("--tiers", type=int, nargs="+", default=DEFAULT_TIERS)
+    parser.add_argument("--quality", type=int, default=DEFAULT_QUALITY)
+    parser.add_argument("--workers", type=int, default=None, help="图片处理进程数，默认使用全部核心，0表示在当前进程处理")
+    parser.add_argument("--force", action="store_true", help="忽略已有清单，全部重新生成")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.photos):
+        print(f"找不到照片目录 {args.photos}")
+        return 1
+    stats = build_assets(args.annotations, args.photos, args.tiers, args.quality, args.workers, args.force)
+    print(f"清单中共 {stats['photos']} 张照片，本次生成 {stats['generated']} 张，清理旧文件 {stats['removed']} 个")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
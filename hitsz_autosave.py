@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from hitsz_journal import diff_node
+from hitsz_annotation_store import AnnotationStore
+
+
+class AnnotationAutosaver(QObject):
+    """标注自动保存：编辑只标记脏节点，定时合并后交给后台线程追加到日志"""
+
+    # 后台写入完成（由工作线程发出，排队回到GUI线程处理）
+    _write_done = pyqtSignal()
+
+    def __init__(self, journal, collect_node, interval_ms=1000, parent=None):
+        super().__init__(parent)
+        self.journal = journal
+        # collect_node(node_id) 返回该节点需要保存的标注字段，没有则返回空字典
+        self.collect_node = collect_node
+
+        # 已落盘（或即将落盘）的标注快照，以及等待合并的脏节点
+        self.annotations = {}
+        self.dirty = set()
+
+        # 合并定时器：窗口期内的所有编辑只触发一次写盘
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.on_timer)
+
+        # 单线程执行器保证同一时间最多只有一个写操作在进行
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.in_flight = None
+        self.write_lock = threading.Lock()
+        self._write_done.connect(self.on_write_done)
+
+        self.stats = {
+            "edits": 0,
+            "coalesced_edits": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "records": 0,
+            "journal_bytes": 0,
+            "compactions": 0,
+            "last_latency_ms": 0.0,
+            "max_latency_ms": 0.0,
+            "total_latency_ms": 0.0,
+        }
+
+    def reset(self, annotations):
+        """设置初始快照（通常是启动时加载的标注存储）
+
+        不复制：标注存储按节点惰性解码，复制会在启动时解码全部描述。
+        """
+        self.annotations = annotations
+        self.dirty.clear()
+
+    def rebase(self, node_id, node_data):
+        """标注文件被外部修改后，把该节点的已落盘版本更新为外部内容，避免写回旧值"""
+        if node_data:
+            self.annotations[node_id] = dict(node_data)
+        else:
+            self.annotations.pop(node_id, None)
+
+    def mark_dirty(self, node_id):
+        """记录一次编辑，写盘由合并定时器延后触发"""
+        self.stats["edits"] += 1
+        if node_id in self.dirty or self.timer.isActive():
+            self.stats["coalesced_edits"] += 1
+        self.dirty.add(node_id)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def has_pending(self):
+        """是否还有尚未写盘的编辑"""
+        return bool(self.dirty) or (self.in_flight is not None and not self.in_flight.done())
+
+    def on_timer(self):
+        """定时器到期：若已有写操作在进行，则等它完成后再写"""
+        if not self.dirty:
+            return
+        if self.in_flight is not None and not self.in_flight.done():
+            return
+        records = self.take_records()
+        # 需要折叠时在GUI线程上取快照，避免工作线程读到正在修改的字典
+        snapshot = self.snapshot() if self.journal.needs_compaction() else None
+        self.in_flight = self.executor.submit(self.background_write, records, snapshot)
+
+    def on_write_done(self):
+        """后台写入完成后，若期间又有新编辑则重新调度"""
+        if self.in_flight is not None and self.in_flight.done():
+            self.in_flight = None
+        if self.dirty and not self.timer.isActive():
+            self.timer.start()
+
+    def snapshot(self):
+        """折叠用的快照：标注存储只复制覆盖层，解码全部描述留给工作线程"""
+        if isinstance(self.annotations, AnnotationStore):
+            return self.annotations.view()
+        return self.annotations.copy()
+
+    def take_records(self):
+        """把脏节点合并进快照，只为实际变化的字段生成日志记录"""
+        records = []
+        for node_id in self.dirty:
+            node_data = self.collect_node(node_id)
+            records.extend(diff_node(node_id, self.annotations.get(node_id), node_data))
+            if node_data:
+                self.annotations[node_id] = node_data
+            else:
+                self.annotations.pop(node_id, None)
+        self.dirty.clear()
+        return records
+
+    def background_write(self, records, snapshot):
+        """在工作线程中写盘，完成后通知GUI线程"""
+        try:
+            return self.write(records, snapshot)
+        finally:
+            self._write_done.emit()
+
+    def write(self, records, snapshot=None):
+        """追加日志记录；给出snapshot时再把日志折叠回快照文件"""
+        with self.write_lock:
+            start = time.perf_counter()
+            try:
+                self.stats["journal_bytes"] += self.journal.append(records)
+                self.stats["records"] += len(records)
+                if snapshot is not None:
+                    if isinstance(snapshot, AnnotationStore):
+                        snapshot = snapshot.copy()
+                    self.journal.compact(snapshot)
+                    self.stats["compactions"] += 1
+                ok = True
+            except Exception as e:
+                print(f"自动保存标注信息时出错: {e}")
+                ok = False
+
+            latency_ms = (time.perf_counter() - start) * 1000
+            self.stats["flushes"] += 1
+            if not ok:
+                self.stats["failed_flushes"] += 1
+            self.stats["last_latency_ms"] = latency_ms
+            self.stats["max_latency_ms"] = max(self.stats["max_latency_ms"], latency_ms)
+            self.stats["total_latency_ms"] += latency_ms
+            return ok
+
+    def flush(self, compact=False):
+        """同步写盘：等待进行中的写操作，再把剩余编辑立即写入"""
+        self.timer.stop()
+        if self.in_flight is not None:
+            self.in_flight.result()
+            self.in_flight = None
+        records = self.take_records()
+        # 日志为空且没有新记录时快照文件已是最新，不必整体重写
+        if compact and not records and self.journal.size == 0:
+            compact = False
+        snapshot = self.snapshot() if compact or self.journal.needs_compaction() else None
+        return self.write(records, snapshot)
+
+    def shutdown(self, compact=True):
+        """关闭自动保存：尚未写盘的编辑总是同步写入，compact为False时只追加日志、不重写快照"""
+        self.timer.stop()
+        ok = self.flush(compact=compact)
+        self.executor.shutdown(wait=True)
+        return ok
+
+    def get_stats(self):
+        """返回计数器，附带平均写盘耗时"""
+        stats = dict(self.stats)
+        flushes = stats["flushes"]
+        stats["avg_latency_ms"] = stats["total_latency_ms"] / flushes if flushes else 0.0
+        return stats
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""图概览画布：分层布局在后台线程计算，只为视口内的节点创建图元
+
+缩放较小时只画后台渲染好的概览图；中等缩放画节点方框和边，不画标签。
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import Qt, QRectF, QLineF, QPointF, QTimer, pyqtSignal
+from PyQt5.QtGui import QColor, QPen, QBrush, QImage, QPainter, QPolygonF, QFontMetrics, QFont
+from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsItem
+from hitsz_layout import load_or_compute_layout, SpatialGrid, LAYER_GAP
+
+# 节点方框大小（场景坐标）
+NODE_WIDTH = 160.0
+NODE_HEIGHT = 40.0
+# 空间索引的格子边长
+GRID_CELL = LAYER_GAP
+# 细节层次：缩放低于 LABEL_SCALE 不画标签，低于 ITEM_SCALE 不创建节点图元，只画概览图
+LABEL_SCALE = 0.6
+ITEM_SCALE = 0.12
+MIN_SCALE = 0.002
+MAX_SCALE = 4.0
+# 视口内节点或边太多时同样退回概览图 / 截断
+MAX_ITEMS = 4000
+MAX_EDGES = 20000
+# 概览图较长一边的像素数
+OVERVIEW_SIZE = 2048
+# 按下和松开的距离小于这个像素数算点击，否则是拖动
+CLICK_DISTANCE = 4
+
+DEFAULT_COLOR = QColor("#e8e8e8")
+HIGHLIGHT_COLOR = QColor("#d62728")
+
+
+def render_overview(model, layout):
+    """把全部节点和边画到一张图片上，返回 (QImage, 对应的场景矩形)；可以在后台线程调用"""
+    x0, y0, x1, y1 = layout.bounds()
+    scene_rect = QRectF(x0 - NODE_WIDTH, y0 - NODE_HEIGHT,
+                        x1 - x0 + 2 * NODE_WIDTH, y1 - y0 + 2 * NODE_HEIGHT)
+    scale = OVERVIEW_SIZE / max(scene_rect.width(), scene_rect.height())
+    image = QImage(max(1, int(scene_rect.width() * scale)), max(1, int(scene_rect.height() * scale)),
+                   QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.white)
+    xs = [(x - scene_rect.x()) * scale for x in layout.xs]
+    ys = [(y - scene_rect.y()) * scale for y in layout.ys]
+
+    painter = QPainter(image)
+    painter.setPen(QPen(QColor(120, 120, 120, 60), 0))
+    lines = []
+    for s, d in zip(model.edge_src, model.edge_dst):
+        lines.append(QLineF(xs[s], ys[s], xs[d], ys[d]))
+        if len(lines) >= 10000:
+            painter.drawLines(lines)
+            lines = []
+    if lines:
+        painter.drawLines(lines)
+    painter.setPen(QPen(QColor(31, 119, 180), 2))
+    painter.drawPoints(QPolygonF([QPointF(x, y) for x, y in zip(xs, ys)]))
+    painter.end()
+    return image, scene_rect
+
+
+class NodeItem(QGraphicsItem):
+    """视口内一个节点的方框和标签，离开视口后放回池中复用"""
+
+    RECT = QRectF(-NODE_WIDTH / 2, -NODE_HEIGHT / 2, NODE_WIDTH, NODE_HEIGHT)
+    PEN = QPen(QColor(90, 90, 90), 0)
+    HIGHLIGHT_PEN = QPen(HIGHLIGHT_COLOR, 3)
+
+    def __init__(self):
+        super().__init__()
+        self.index = -1
+        self.label = ""
+        self.text = None
+        self.brush = QBrush(DEFAULT_COLOR)
+        self.highlighted = False
+
+    def bind(self, index, x, y, label, color, highlighted):
+        self.index = index
+        # DOT标签中的 \n 显示为空格，省略号截断在第一次画标签时才计算
+        self.label = label.replace("\\n", " ")
+        self.text = None
+        self.brush = QBrush(color if color is not None else DEFAULT_COLOR)
+        self.highlighted = highlighted
+        self.setPos(x, y)
+        self.update()
+
+    def boundingRect(self):
+        return self.RECT
+
+    def paint(self, painter, option, widget=None):
+        painter.setPen(self.HIGHLIGHT_PEN if self.highlighted else self.PEN)
+        painter.setBrush(self.brush)
+        painter.drawRect(self.RECT)
+        if option.levelOfDetailFromTransform(painter.worldTransform()) < LABEL_SCALE:
+            return
+        if self.text is None:
+            self.text = QFontMetrics(painter.font()).elidedText(self.label, Qt.ElideRight, int(NODE_WIDTH) - 8)
+        painter.setPen(Qt.black)
+        painter.drawText(self.RECT, Qt.AlignCenter, self.text)
+
+
+class GraphCanvas(QGraphicsView):
+    """分层布局的图概览，点击节点发出 node_clicked(节点ID)"""
+
+    node_clicked = pyqtSignal(str)
+    # 布局计算完成，参数为 GraphLayout，可以和图放在一起缓存
+    layout_finished = pyqtSignal(object)
+    # 后台计算结果（由工作线程发出，排队回到GUI线程处理）
+    _layout_ready = pyqtSignal(object)
+
+    def __init__(self, color_of, parent=None):
+        super().__init__(parent)
+        # color_of(节点ID) 返回方框颜色QColor，没有类型时返回None
+        self.color_of = color_of
+        self.graph_scene = QGraphicsScene(self)
+        # 场景里同时只有视口附近的几千个图元，不需要BSP索引
+        self.graph_scene.setItemIndexMethod(QGraphicsScene.NoIndex)
+        self.setScene(self.graph_scene)
+        self.setDragMode(QGraphicsView.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+        self.setBackgroundBrush(Qt.white)
+        self.setFont(QFont("SimSun", 9))
+
+        self.model = None
+        self.graph_layout = None
+        self.grid = None
+        self.overview = None
+        self.overview_rect = None
+        # 布局请求编号，图重新加载后丢弃旧的计算结果
+        self.generation = 0
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self._layout_ready.connect(self.on_layout_ready)
+
+        self.node_items = {}     # 节点编号 -> NodeItem
+        self.pool = []           # 空闲的 NodeItem
+        self.edge_lines = []
+        self.overview_mode = True
+        self.highlighted = None
+        self.update_pending = False
+        self.press_pos = None
+
+        self.horizontalScrollBar().valueChanged.connect(self.schedule_update)
+        self.verticalScrollBar().valueChanged.connect(self.schedule_update)
+
+    def set_model(self, model, dot_path=None, layout=None):
+        """切换到新的图模型；layout 为之前缓存的布局，节点数一致时直接使用，否则在后台计算"""
+        self.generation += 1
+        self.model = model
+        self.graph_layout = None
+        self.grid = None
+        self.overview = None
+        self.release_items(self.node_items)
+        self.edge_lines = []
+        self.highlighted = None
+        self.viewport().update()
+        if layout is not None and layout.node_count() != model.node_count():
+            layout = None
+        self.executor.submit(self.prepare, self.generation, model, dot_path, layout)
+
+    def prepare(self, generation, model, dot_path, layout):
+        """工作线程：布局（读缓存或计算）、空间索引和概览图"""
+        try:
+            if model.out_offsets is None:
+                model.build_adjacency()
+            if layout is None:
+                layout = load_or_compute_layout(model, dot_path)
+            grid = SpatialGrid(layout.xs, layout.ys, GRID_CELL)
+            overview, overview_rect = render_overview(model, layout)
+            self._layout_ready.emit((generation, layout, grid, overview, overview_rect))
+        except Exception as e:
+            print(f"计算图布局出错: {e}")
+
+    def on_layout_ready(self, result):
+        generation, layout, grid, overview, overview_rect = result
+        if generation != self.generation:
+            return
+        self.graph_layout = layout
+        self.grid = grid
+        self.overview = overview
+        self.overview_rect = overview_rect
+        self.graph_scene.setSceneRect(overview_rect)
+        self.layout_finished.emit(layout)
+        if self.highlighted is not None:
+            self.center_on_node(self.highlighted)
+        else:
+            self.fitInView(overview_rect, Qt.KeepAspectRatio)
+        self.schedule_update()
+
+    def current_scale(self):
+        return self.transform().m11()
+
+    def schedule_update(self):
+        """滚动、缩放、改变大小后合并到一次更新"""
+        if not self.update_pending:
+            self.update_pending = True
+            QTimer.singleShot(0, self.update_visible)
+
+    def release_items(self, indices):
+        for index in list(indices):
+            item = self.node_items.pop(index)
+            item.hide()
+            self.pool.append(item)
+
+    def update_visible(self):
+        """按视口查询空间索引，创建进入视口的图元、回收离开视口的图元，并收集要画的边"""
+        self.update_pending = False
+        if self.grid is None:
+            return
+        visible = []
+        if self.current_scale() >= ITEM_SCALE:
+            rect = self.mapToScene(self.viewport().rect()).boundingRect()
+            rect.adjust(-NODE_WIDTH, -NODE_HEIGHT, NODE_WIDTH, NODE_HEIGHT)
+            visible = self.grid.query(rect.left(), rect.top(), rect.right(), rect.bottom())
+        self.overview_mode = not visible or len(visible) > MAX_ITEMS
+        if self.overview_mode:
+            visible = []
+        wanted = set(visible)
+        self.release_items([index for index in self.node_items if index not in wanted])
+
+        model = self.model
+        ids = model.ids
+        xs, ys = self.graph_layout.xs, self.graph_layout.ys
+        for index in visible:
+            if index in self.node_items:
+                continue
+            if self.pool:
+                item = self.pool.pop()
+                item.show()
+            else:
+                item = NodeItem()
+                self.graph_scene.addItem(item)
+            node_id = ids[index]
+            item.bind(index, xs[index], ys[index], model.label(index), self.color_of(node_id),
+                      index == self.highlighted)
+            self.node_items[index] = item
+
+        # 视口内节点的出边，以及起点在视口外的入边
+        lines = []
+        out_offsets, out_edges, edge_dst = model.out_offsets, model.out_edges, model.edge_dst
+        in_offsets, in_edges, edge_src = model.in_offsets, model.in_edges, model.edge_src
+        for index in visible:
+            x, y = xs[index], ys[index]
+            for e in out_edges[out_offsets[index]:out_offsets[index + 1]]:
+                d = edge_dst[e]
+                lines.append(QLineF(x, y, xs[d], ys[d]))
+            for e in in_edges[in_offsets[index]:in_offsets[index + 1]]:
+                s = edge_src[e]
+                if s not in wanted:
+                    lines.append(QLineF(xs[s], ys[s], x, y))
+            if len(lines) >= MAX_EDGES:
+                break
+        self.edge_lines = lines
+        self.viewport().update()
+
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+        if self.graph_layout is None:
+            return
+        if self.overview_mode:
+            painter.drawImage(self.overview_rect, self.overview)
+        else:
+            painter.setPen(QPen(QColor(150, 150, 150), 0))
+            painter.drawLines(self.edge_lines)
+
+    def drawForeground(self, painter, rect):
+        if self.graph_layout is None:
+            # 布局还没算好，在视口中央显示提示
+            painter.save()
+            painter.resetTransform()
+            painter.setPen(Qt.gray)
+            painter.drawText(QRectF(self.viewport().rect()), Qt.AlignCenter, "正在计算布局...")
+            painter.restore()
+        elif self.overview_mode and self.highlighted is not None:
+            radius = 6 / self.current_scale()
+            painter.setPen(QPen(HIGHLIGHT_COLOR, 2 / self.current_scale()))
+            painter.setBrush(Qt.NoBrush)
+            painter.drawEllipse(QPointF(self.graph_layout.xs[self.highlighted], self.graph_layout.ys[self.highlighted]),
+                                radius, radius)
+
+    def highlight(self, node_id):
+        """标出节点并滚动到它；布局还没算好时记下，算好后再滚动"""
+        if self.model is None:
+            return
+        index = self.model.index.get(node_id)
+        if index == self.highlighted:
+            return
+        for old in (self.highlighted, index):
+            item = self.node_items.get(old)
+            if item is not None:
+                item.highlighted = old == index
+                item.update()
+        self.highlighted = index
+        if index is not None and self.graph_layout is not None:
+            self.center_on_node(index)
+
+    def center_on_node(self, index):
+        # 概览图里找不到节点，先放大到能看清标签
+        if self.current_scale() < LABEL_SCALE:
+            self.resetTransform()
+        self.centerOn(self.graph_layout.xs[index], self.graph_layout.ys[index])
+        self.schedule_update()
+
+    def node_at(self, pos):
+        """视口坐标处的节点编号；缩小时方框很小，额外放宽几个像素"""
+        if self.grid is None:
+            return None
+        point = self.mapToScene(pos)
+        slack = CLICK_DISTANCE / self.current_scale()
+        half_w = NODE_WIDTH / 2 + slack
+        half_h = NODE_HEIGHT / 2 + slack
+        xs, ys = self.graph_layout.xs, self.graph_layout.ys
+        best = None
+        best_distance = None
+        for index in self.grid.query(point.x() - half_w, point.y() - half_h,
+                                     point.x() + half_w, point.y() + half_h):
+            dx = abs(xs[index] - point.x())
+            dy = abs(ys[index] - point.y())
+            if dx <= half_w and dy <= half_h and (best is None or dx + dy < best_distance):
+                best = index
+                best_distance = dx + dy
+        return best
+
+    def wheelEvent(self, event):
+        factor = 1.15 ** (event.angleDelta().y() / 120)
+        scale = self.current_scale()
+        factor = max(MIN_SCALE / scale, min(MAX_SCALE / scale, factor))
+        self.scale(factor, factor)
+        self.schedule_update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.schedule_update()
+
+    def mousePressEvent(self, event):
+        self.press_pos = event.pos()
+        super().mousePressEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        super().mouseReleaseEvent(event)
+        if self.press_pos is None or event.button() != Qt.LeftButton:
+            return
+        moved = (event.pos() - self.press_pos).manhattanLength()
+        self.press_pos = None
+        if moved < CLICK_DISTANCE:
+            index = self.node_at(event.pos())
+            if index is not None:
+                self.node_clicked.emit(self.model.ids[index])
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""埋点调试面板：各函数的耗时分位数和最近的事件循环卡顿（Ctrl+Shift+D 打开）"""
+
+import time
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget,
+                             QTableWidgetItem, QListWidget, QListWidgetItem, QTextEdit, QSplitter,
+                             QHeaderView, QAbstractItemView)
+from PyQt5.QtCore import Qt, QTimer
+
+# 面板刷新间隔（毫秒）
+REFRESH_MS = 1000
+COLUMNS = ["名称", "次数", "平均 ms", "p50 ms", "p90 ms", "p99 ms", "最大 ms"]
+SUMMARY_KEYS = ["count", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"]
+
+
+class DebugPanel(QDialog):
+    def __init__(self, instrument, parent=None):
+        super().__init__(parent)
+        self.instrument = instrument
+        self.setWindowTitle("性能埋点")
+        self.resize(900, 600)
+        self.setWindowModality(Qt.NonModal)
+
+        layout = QVBoxLayout(self)
+        path = instrument.writer.path if instrument.writer else "（未启用）"
+        self.path_label = QLabel(f"trace 文件: {path}")
+        self.path_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout.addWidget(self.path_label)
+
+        splitter = QSplitter(Qt.Vertical)
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        splitter.addWidget(self.table)
+
+        stall_splitter = QSplitter(Qt.Horizontal)
+        self.stall_list = QListWidget()
+        self.stall_list.currentItemChanged.connect(self.show_stall)
+        stall_splitter.addWidget(self.stall_list)
+        self.stack_view = QTextEdit()
+        self.stack_view.setReadOnly(True)
+        self.stack_view.setLineWrapMode(QTextEdit.NoWrap)
+        stall_splitter.addWidget(self.stack_view)
+        stall_splitter.setSizes([300, 600])
+        splitter.addWidget(stall_splitter)
+        layout.addWidget(splitter)
+
+        buttons = QHBoxLayout()
+        self.status_label = QLabel()
+        buttons.addWidget(self.status_label)
+        buttons.addStretch()
+        reset_button = QPushButton("清空统计")
+        reset_button.clicked.connect(self.reset)
+        buttons.addWidget(reset_button)
+        layout.addLayout(buttons)
+
+        self.shown_stalls = None
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(REFRESH_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        summaries = self.instrument.summaries()
+        self.table.setRowCount(len(summaries))
+        for row, (name, summary) in enumerate(summaries.items()):
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            for column, key in enumerate(SUMMARY_KEYS, 1):
+                value = summary[key]
+                text = str(value) if key == "count" else f"{value:.2f}"
+                item = QTableWidgetItem(text)
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+
+        # 卡顿记录只会追加（超过上限时丢弃最旧的），用条数和最新一条的时间判断是否需要重建列表
+        stalls = list(self.instrument.stalls)
+        key = (len(stalls), stalls[-1]["time"] if stalls else None)
+        if key != self.shown_stalls:
+            self.stall_list.clear()
+            for stall in reversed(stalls):
+                when = time.strftime("%H:%M:%S", time.localtime(stall["time"]))
+                item = QListWidgetItem(f"{when}  {stall['duration_ms']:.0f} ms")
+                item.setData(Qt.UserRole, stall["stack"])
+                self.stall_list.addItem(item)
+            self.shown_stalls = key
+        self.status_label.setText(f"{len(summaries)} 项统计，{len(stalls)} 次卡顿")
+
+    def show_stall(self, current, previous):
+        if current is None:
+            self.stack_view.clear()
+            return
+        self.stack_view.setPlainText(current.data(Qt.UserRole) or "（卡顿结束前没有抓到调用栈）")
+
+    def reset(self):
+        self.instrument.reset()
+        self.shown_stalls = None
+        self.refresh()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from array import array
+from hitsz_graph import GraphModel
+
+# 邻接数组建好之后追加的边先线性扫描，超过这个数量时重建邻接数组
+REBUILD_THRESHOLD = 1024
+# 已删除的边在边数组中的标签编号
+DELETED = -1
+
+
+class NodeView:
+    """G.nodes：按节点ID取属性字典，G.nodes(data=True) 遍历 (节点ID, 属性)"""
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __getitem__(self, node_id):
+        graph = self._graph
+        return graph.attrs[graph.index[node_id]]
+
+    def __contains__(self, node_id):
+        return node_id in self._graph.index
+
+    def __iter__(self):
+        return iter(self._graph)
+
+    def __len__(self):
+        return len(self._graph.index)
+
+    def __call__(self, data=False):
+        graph = self._graph
+        if not data:
+            return iter(graph)
+        return ((node_id, graph.attrs[i]) for i, node_id in enumerate(graph.ids) if node_id is not None)
+
+
+class DiGraph:
+    """轻量有向图，提供 HITSZFlowViewer 用到的 nx.DiGraph 接口
+
+    节点ID驻留为整数编号，边和边标签存放在连续的整型数组中，按CSR邻接数组查询相邻节点。
+    与 nx.DiGraph 一致，同一对节点之间只有一条边，相邻节点按边第一次加入的顺序排列。
+    """
+
+    def __init__(self):
+        self.graph = {}
+        self.ids = []            # 编号 -> 节点ID，已删除的为None
+        self.index = {}          # 节点ID -> 编号
+        self.attrs = []          # 编号 -> 属性字典
+        self.nodes = NodeView(self)
+
+        self.edge_src = array('i')
+        self.edge_dst = array('i')
+        self.edge_label = array('i')   # 边标签编号，DELETED表示已删除
+        self.labels = [""]
+        self.label_index = {"": 0}
+        self.deleted_edges = 0
+
+        # 覆盖前 built_edges 条边的CSR邻接数组，之后追加的边在查询时线性扫描
+        self.built_edges = 0
+        self.out_offsets = array('i', [0])
+        self.out_edges = array('i')
+        self.in_offsets = array('i', [0])
+        self.in_edges = array('i')
+
+    @classmethod
+    def from_model(cls, model, node_attrs):
+        """从图模型构建，node_attrs(model, i) 返回第i个节点的属性字典"""
+        graph = cls()
+        graph.ids = list(model.ids)
+        graph.index = {node_id: i for i, node_id in enumerate(graph.ids)}
+        graph.attrs = [node_attrs(model, i) for i in range(len(graph.ids))]
+        graph.labels = list(model.labels)
+        graph.label_index = {label: k for k, label in enumerate(graph.labels)}
+
+        # 重复的边与 nx.DiGraph 一致：保留第一次的位置，标签以最后一次为准
+        n = len(graph.ids)
+        first = {}
+        for s, d, label in zip(model.edge_src, model.edge_dst, model.edge_label):
+            key = s * n + d
+            e = first.get(key)
+            if e is None:
+                first[key] = len(graph.edge_src)
+                graph.edge_src.append(s)
+                graph.edge_dst.append(d)
+                graph.edge_label.append(label)
+            else:
+                graph.edge_label[e] = label
+        graph.build_adjacency()
+        return graph
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, node_id):
+        return node_id in self.index
+
+    def __iter__(self):
+        return (node_id for node_id in self.ids if node_id is not None)
+
+    def number_of_nodes(self):
+        return len(self.index)
+
+    def number_of_edges(self):
+        return len(self.edge_src) - self.deleted_edges
+
+    def build_adjacency(self):
+        """丢掉已删除的边并重建出边、入边的CSR数组"""
+        if self.deleted_edges:
+            keep = [e for e, label in enumerate(self.edge_label) if label != DELETED]
+            self.edge_src = array('i', (self.edge_src[e] for e in keep))
+            self.edge_dst = array('i', (self.edge_dst[e] for e in keep))
+            self.edge_label = array('i', (self.edge_label[e] for e in keep))
+            self.deleted_edges = 0
+        n = len(self.ids)
+        self.out_offsets, self.out_edges = GraphModel._csr(self.edge_src, n)
+        self.in_offsets, self.in_edges = GraphModel._csr(self.edge_dst, n)
+        self.built_edges = len(self.edge_src)
+
+    def _edges(self, i, offsets, edges, ends):
+        """第i个节点的出边或入边编号：CSR中的一段，加上之后追加的边"""
+        label = self.edge_label
+        if i + 1 < len(offsets):
+            for e in edges[offsets[i]:offsets[i + 1]]:
+                if label[e] != DELETED:
+                    yield e
+        for e in range(self.built_edges, len(ends)):
+            if ends[e] == i and label[e] != DELETED:
+                yield e
+
+    def _out_edges(self, i):
+        return self._edges(i, self.out_offsets, self.out_edges, self.edge_src)
+
+    def _in_edges(self, i):
+        return self._edges(i, self.in_offsets, self.in_edges, self.edge_dst)
+
+    def _degree(self, i, offsets):
+        """CSR中记录的度数，不含之后追加的边"""
+        return offsets[i + 1] - offsets[i] if i + 1 < len(offsets) else 0
+
+    def _find_edge(self, source, target):
+        s = self.index.get(source)
+        d = self.index.get(target)
+        if s is None or d is None:
+            return None
+        # 从度数较小的一端查找，枢纽节点的每条边都不必扫描它的整行
+        if self._degree(s, self.out_offsets) <= self._degree(d, self.in_offsets):
+            dst = self.edge_dst
+            for e in self._out_edges(s):
+                if dst[e] == d:
+                    return e
+        else:
+            src = self.edge_src
+            for e in self._in_edges(d):
+                if src[e] == s:
+                    return e
+        return None
+
+    def add_node(self, node_id, **attrs):
+        """添加节点，已存在时合并属性"""
+        i = self.index.get(node_id)
+        if i is None:
+            self.index[node_id] = len(self.ids)
+            self.ids.append(node_id)
+            self.attrs.append(attrs)
+        else:
+            self.attrs[i].update(attrs)
+
+    def remove_node(self, node_id):
+        """删除节点及其所有边"""
+        i = self.index.pop(node_id)
+        for e in list(self._out_edges(i)) + list(self._in_edges(i)):
+            if self.edge_label[e] != DELETED:
+                self.edge_label[e] = DELETED
+                self.deleted_edges += 1
+        self.ids[i] = None
+        self.attrs[i] = None
+
+    def add_edge(self, source, target, label=""):
+        """添加边，不存在的端点自动添加；边已存在时只更新标签"""
+        label_id = self.label_index.get(label)
+        if label_id is None:
+            label_id = len(self.labels)
+            self.label_index[label] = label_id
+            self.labels.append(label)
+        e = self._find_edge(source, target)
+        if e is not None:
+            self.edge_label[e] = label_id
+            return
+        for node_id in (source, target):
+            if node_id not in self.index:
+                self.add_node(node_id)
+        self.edge_src.append(self.index[source])
+        self.edge_dst.append(self.index[target])
+        self.edge_label.append(label_id)
+        if len(self.edge_src) - self.built_edges > REBUILD_THRESHOLD:
+            self.build_adjacency()
+
+    def remove_edge(self, source, target):
+        e = self._find_edge(source, target)
+        if e is None:
+            raise KeyError((source, target))
+        self.edge_label[e] = DELETED
+        self.deleted_edges += 1
+
+    def has_edge(self, source, target):
+        return self._find_edge(source, target) is not None
+
+    def get_edge_data(self, source, target, default=None):
+        """边属性字典 {"label": 边标签}，没有这条边时返回default"""
+        e = self._find_edge(source, target)
+        if e is None:
+            return default
+        return {"label": self.labels[self.edge_label[e]]}
+
+    def successors(self, node_id):
+        ids = self.ids
+        dst = self.edge_dst
+        return [ids[dst[e]] for e in self._out_edges(self.index[node_id])]
+
+    def predecessors(self, node_id):
+        ids = self.ids
+        src = self.edge_src
+        return [ids[src[e]] for e in self._in_edges(self.index[node_id])]
+
+    def edges(self):
+        """遍历 (源ID, 目标ID, 边标签)"""
+        ids = self.ids
+        labels = self.labels
+        for s, d, label in zip(self.edge_src, self.edge_dst, self.edge_label):
+            if label != DELETED:
+                yield ids[s], ids[d], labels[label]
+
+    def to_networkx(self):
+        """转换为 nx.DiGraph，供需要图分析算法时使用；networkx 只在这里导入"""
+        import networkx as nx
+        G = nx.DiGraph()
+        G.graph.update(self.graph)
+        G.add_nodes_from((node_id, dict(attrs)) for node_id, attrs in self.nodes(data=True))
+        G.add_edges_from((source, target, {"label": label}) for source, target, label in self.edges())
+        return G
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""把图和标注导出为静态网站
+
+    python hitsz_export.py --out site
+    python hitsz_export.py --annotations node_annotations2.json --photos picture --out site --widths 320 640 1280
+
+输出目录结构：
+    index.html                 入口页面，不带哈希，部署时不要长期缓存
+    app.<哈希>.js/.css          前端脚本和样式
+    manifest.<哈希>.json        节点ID -> 分片文件名
+    nodes/<哈希>.json           每个节点一个分片：标签、描述、照片、相邻节点
+    img/<源文件哈希>-<宽度>.jpg  缩小后的照片（有透明区域时为.png），供srcset选择
+除index.html外文件名都由内容决定，可以设置为永久缓存。
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from hitsz_assets import derive_photo, photo_sources
+from hitsz_graph_cache import load_compiled
+from hitsz_journal import AnnotationJournal
+from hitsz_node_types import DEFAULT_CLASSIFIER
+
+# 前端模板目录
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "export_template")
+# 默认的照片宽度档位
+DEFAULT_WIDTHS = [320, 640, 1280]
+DEFAULT_QUALITY = 82
+# 文件名中哈希的长度
+HASH_LENGTH = 16
+
+
+def content_hash(data):
+    return hashlib.sha1(data).hexdigest()[:HASH_LENGTH]
+
+
+def write_file(path, data):
+    """内容寻址的文件已存在时不再重写；否则先写临时文件再替换"""
+    if os.path.exists(path):
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def write_hashed(out_dir, subdir, data, suffix):
+    """按内容哈希命名写入，返回相对于站点根目录的路径"""
+    name = content_hash(data) + suffix
+    rel_path = f"{subdir}/{name}" if subdir else name
+    write_file(os.path.join(out_dir, rel_path), data)
+    return rel_path
+
+
+def encode_json(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+
+def build_photos(sources, out_dir, widths, quality, workers):
+    """并行生成照片的各宽度版本，返回 {标注中的路径: 照片信息}"""
+    os.makedirs(os.path.join(out_dir, "img"), exist_ok=True)
+    # 与 hitsz_assets 共用同一套生成逻辑，只输出JPEG/PNG，srcset不区分格式
+    tasks = [(src, out_dir, "img", widths, quality, []) for src in sorted(set(sources.values()))]
+    if workers == 0 or len(tasks) <= 1:
+        by_source = dict(map(derive_photo, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            by_source = dict(executor.map(derive_photo, tasks, chunksize=4))
+
+    photos = {}
+    for path, src in sources.items():
+        info = by_source.get(src)
+        if info is None:
+            continue
+        # 保存失败的档位没有文件路径，不放进srcset
+        variants = [(v["width"], v.get("jpg") or v.get("png")) for v in info["variants"] if "jpg" in v or "png" in v]
+        if not variants:
+            continue
+        largest = info["variants"][-1]
+        photos[path] = {
+            # 不支持srcset的浏览器用中间档位
+            "src": variants[len(variants) // 2][1],
+            "srcset": ", ".join(f"{url} {width}w" for width, url in variants),
+            "width": largest["width"],
+            "height": largest["height"],
+        }
+    return photos
+
+
+def neighbor_list(ids, labels, edges):
+    """相邻节点 [ID, 标签, 边标签]，去重并保持文件顺序；带上标签后前端显示按钮不必再请求相邻节点"""
+    seen = {}
+    for j, edge_label in edges:
+        if ids[j] not in seen:
+            seen[ids[j]] = [ids[j], labels[j], edge_label]
+    return list(seen.values())
+
+
+def build_shards(model, annotations, photos, out_dir):
+    """每个节点写一个分片，返回 {节点ID: 分片文件名}"""
+    ids = model.ids
+    labels = [model.label(i) for i in range(len(ids))]
+    shards = {}
+    for i, node_id in enumerate(ids):
+        node_data = annotations.get(node_id) or {}
+        photo_paths = list(node_data.get("photo_paths") or [])
+        if node_data.get("photo_path") and node_data["photo_path"] not in photo_paths:
+            photo_paths.append(node_data["photo_path"])
+
+        shard = {
+            "id": node_id,
+            "label": labels[i],
+            "type": DEFAULT_CLASSIFIER.classify(node_id, model.attrs[i]),
+            "description": node_data.get("description", ""),
+            "photos": [photos[path] for path in photo_paths if path in photos],
+            "forward": neighbor_list(ids, labels, model.successors(i)),
+            "backward": neighbor_list(ids, labels, model.predecessors(i)),
+        }
+        shards[node_id] = os.path.basename(write_hashed(out_dir, "nodes", encode_json(shard), ".json"))
+    return shards
+
+
+def write_site(out_dir, shards, start, title):
+    """写入前端文件和清单，最后写index.html，保证它引用的文件都已存在"""
+    manifest = encode_json({"version": 1, "start": start, "nodes": shards})
+    manifest_name = f"manifest.{content_hash(manifest)}.json"
+    write_file(os.path.join(out_dir, manifest_name), manifest)
+
+    assets = {}
+    for name, key in (("app.js", "APP_JS"), ("app.css", "APP_CSS")):
+        with open(os.path.join(TEMPLATE_DIR, name), 'rb') as f:
+            data = f.read()
+        stem, suffix = os.path.splitext(name)
+        hashed = f"{stem}.{content_hash(data)}{suffix}"
+        write_file(os.path.join(out_dir, hashed), data)
+        assets[key] = hashed
+
+    with open(os.path.join(TEMPLATE_DIR, "index.html"), 'r', encoding='utf-8') as f:
+        html = f.read()
+    html = (html.replace("{{TITLE}}", title)
+                .replace("{{MANIFEST}}", manifest_name)
+                .replace("{{APP_JS}}", assets["APP_JS"])
+                .replace("{{APP_CSS}}", assets["APP_CSS"]))
+    index_path = os.path.join(out_dir, "index.html")
+    with open(index_path + ".tmp", 'w', encoding='utf-8') as f:
+        f.write(html)
+    os.replace(index_path + ".tmp", index_path)
+    return manifest_name, assets
+
+
+def prune(out_dir, keep):
+    """删除上一次导出留下、这次不再引用的哈希文件"""
+    removed = 0
+    for subdir in ("nodes", "img"):
+        directory = os.path.join(out_dir, subdir)
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            if f"{subdir}/{name}" not in keep:
+                os.remove(os.path.join(directory, name))
+                removed += 1
+    for name in os.listdir(out_dir):
+        if name.startswith(("manifest.", "app.")) and name not in keep:
+            os.remove(os.path.join(out_dir, name))
+            removed += 1
+    return removed
+
+
+def export_site(dot_path, annotations_path, photos_dir, out_dir, widths=DEFAULT_WIDTHS,
+                quality=DEFAULT_QUALITY, workers=None, title="哈工大(深圳)发展历程"):
+    """导出静态网站，返回统计信息"""
+    model = load_compiled(dot_path).model
+    # 导出只读：不写标注存储，不截断其他进程可能正在追加的日志尾部
+    annotations = AnnotationJournal(annotations_path).read()
+
+    os.makedirs(out_dir, exist_ok=True)
+    sources = photo_sources(annotations, photos_dir)
+    photos = build_photos(sources, out_dir, widths, quality, workers)
+    shards = build_shards(model, annotations, photos, out_dir)
+    start = model.ids[0] if len(model.ids) else ""
+    manifest_name, assets = write_site(out_dir, shards, start, title)
+
+    keep = {manifest_name, *assets.values()}
+    keep.update(f"nodes/{name}" for name in shards.values())
+    for photo in photos.values():
+        keep.update(entry.split(" ")[0] for entry in photo["srcset"].split(", "))
+    removed = prune(out_dir, keep)
+    return {"nodes": len(shards), "photos": len(photos), "manifest": manifest_name, "removed": removed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出静态网站")
+    parser.add_argument("--dot", default="hitsz_flow.dot")
+    parser.add_argument("--annotations", default="node_annotations.json")
+    parser.add_argument("--photos", default="picture", help="标注中相对照片路径的根目录")
+    parser.add_argument("--out", default="site")
+    parser.add_argument("--widths", type=int, nargs="+", default=DEFAULT_WIDTHS)
+    parser.add_argument("--quality", type=int, default=DEFAULT_QUALITY)
+    parser.add_argument("--workers", type=int, default=None, help="图片处理进程数，0表示在当前进程处理")
+    parser.add_argument("--title", default="哈工大(深圳)发展历程")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.dot):
+        print(f"找不到文件 {args.dot}")
+        return 1
+    stats = export_site(args.dot, args.annotations, args.photos, args.out,
+                        args.widths, args.quality, args.workers, args.title)
+    print(f"已导出 {stats['nodes']} 个节点、{stats['photos']} 张照片到 {args.out}，"
+          f"清单 {stats['manifest']}，清理旧文件 {stats['removed']} 个")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
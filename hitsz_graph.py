@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+from array import array
+
+# 引号字符串（允许 \" 转义）
+QUOTED = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+
+# DOT词法：每次匹配先吞掉空白和注释，再捕获一个记号，一遍扫描得到全部记号。
+# 整个 [...] 属性列表作为一个记号，内部的键值对交给 ATTR_PATTERN 在C层切分。
+# 列表内部写成"普通字符* (引号串 普通字符*)*"，每个位置只有一种匹配方式，
+# 缺少 ] 时线性失败而不会回溯爆炸；普通字符不含 [，缺少 ] 的列表不会吞掉下一条语句。
+# 最后一个分支把其余无法识别的字符（单独的 [、]、"、-、/）作为记号留给 tokenize 报错
+TOKEN_PATTERN = re.compile(r'''
+    \s*(?:(?://[^\n]*|\#[^\n]*|/\*.*?\*/)\s*)*
+    (
+        \[[^\]\["]*(?:''' + QUOTED + r'''[^\]\["]*)*\]
+      | [^\s\[\]{};,=:"\-/\#]+
+      | [{};,=:]
+      | ''' + QUOTED + r'''
+      | ->|--
+      | -?\.?\d[\d.]*
+      | \S
+    )
+''', re.S | re.X)
+
+# TOKEN_PATTERN 最后一个分支产生的非法记号 -> 错误说明
+INVALID_TOKENS = {
+    '[': "属性列表缺少 ]",
+    ']': "多余的 ]",
+    '"': "引号没有闭合",
+    '-': "无法识别的 -",
+    '/': "无法识别的 /",
+}
+
+# 属性列表内部：key 或 key=value，以逗号、分号或空白分隔
+ATTR_PATTERN = re.compile(r'''
+    (?:[\s,;]|//[^\n]*|/\*.*?\*/)*
+    ([^\s=,;"]+|''' + QUOTED + r''')
+    (?:\s*=\s*([^\s,;"]+|''' + QUOTED + r'''))?
+''', re.S | re.X)
+
+# 边运算符
+EDGE_OPS = ('->', '--')
+
+
+class DotSyntaxError(ValueError):
+    """DOT文本格式错误，例如属性列表缺少 ] 或引号没有闭合"""
+
+
+def tokenize(text):
+    """把DOT文本切分成记号列表，引号字符串保留引号以便区分关键字"""
+    tokens = TOKEN_PATTERN.findall(text)
+    if not INVALID_TOKENS.keys().isdisjoint(tokens):
+        # 编辑器保存了写到一半的文件时常见，调用方等下一次保存再解析
+        match = next(m for m in TOKEN_PATTERN.finditer(text) if m.group(1) in INVALID_TOKENS)
+        line = text.count('\n', 0, match.start(1)) + 1
+        raise DotSyntaxError(f"第 {line} 行：{INVALID_TOKENS[match.group(1)]}")
+    return tokens
+
+
+def unquote(tok):
+    """去掉引号并处理DOT中唯一的转义 \\" 以及行尾续行"""
+    if tok[:1] != '"':
+        return tok
+    s = tok[1:-1]
+    if '\\' in s:
+        s = s.replace('\\\n', '').replace('\\"', '"')
+    return s
+
+
+class GraphModel:
+    """紧凑的有向图模型：节点编号化，边存放在整型数组中"""
+
+    def __init__(self):
+        self.ids = []            # 编号 -> 节点ID
+        self.index = {}          # 节点ID -> 编号
+        self.attrs = []          # 编号 -> 属性字典（未单独设置属性的节点共享默认属性字典）
+        self.shared_attrs = set()  # 被多个节点共享的默认属性字典的id
+        self.graph_attrs = {}
+
+        self.edge_src = array('i')
+        self.edge_dst = array('i')
+        self.edge_label = array('i')
+        self.labels = [""]       # 边标签驻留表，0号为空标签
+        self.label_index = {"": 0}
+
+        # 按需构建的CSR邻接表
+        self.out_offsets = None
+        self.out_edges = None
+        self.in_offsets = None
+        self.in_edges = None
+
+    def node_count(self):
+        return len(self.ids)
+
+    def edge_count(self):
+        return len(self.edge_src)
+
+    def add_node(self, node_id, attrs):
+        """返回节点编号，首次出现时以attrs作为属性"""
+        i = self.index.get(node_id)
+        if i is None:
+            i = len(self.ids)
+            self.index[node_id] = i
+            self.ids.append(node_id)
+            self.attrs.append(attrs)
+            self.shared_attrs.add(id(attrs))
+        return i
+
+    def update_node(self, i, attrs):
+        """合并节点的显式属性，共享的默认属性字典先复制再修改"""
+        current = self.attrs[i]
+        if id(current) in self.shared_attrs:
+            current = dict(current)
+            self.attrs[i] = current
+        current.update(attrs)
+
+    def add_edge(self, src, dst, label=""):
+        """添加一条边，标签做驻留"""
+        label_id = self.label_index.get(label)
+        if label_id is None:
+            label_id = len(self.labels)
+            self.label_index[label] = label_id
+            self.labels.append(label)
+        self.edge_src.append(src)
+        self.edge_dst.append(dst)
+        self.edge_label.append(label_id)
+        self.out_offsets = None
+        self.in_offsets = None
+
+    def label(self, i):
+        """节点显示标签，未设置时与Graphviz一致使用节点ID"""
+        return self.attrs[i].get("label", self.ids[i])
+
+    def iter_edges(self):
+        """按文件顺序遍历 (源ID, 目标ID, 边标签)"""
+        ids = self.ids
+        labels = self.labels
+        for s, d, l in zip(self.edge_src, self.edge_dst, self.edge_label):
+            yield ids[s], ids[d], labels[l]
+
+    def build_adjacency(self):
+        """构建出边和入边的CSR数组，每个节点的边保持文件中的顺序"""
+        n = len(self.ids)
+        self.out_offsets, self.out_edges = self._csr(self.edge_src, n)
+        self.in_offsets, self.in_edges = self._csr(self.edge_dst, n)
+
+    @staticmethod
+    def _csr(keys, n):
+        counts = array('i', bytes(4 * (n + 1)))
+        for k in keys:
+            counts[k + 1] += 1
+        for i in range(n):
+            counts[i + 1] += counts[i]
+        fill = array('i', counts)
+        edges = array('i', bytes(4 * len(keys)))
+        for e, k in enumerate(keys):
+            edges[fill[k]] = e
+            fill[k] += 1
+        return counts, edges
+
+    def successors(self, i):
+        """出边 (目标编号, 边标签) 列表"""
+        if self.out_offsets is None:
+            self.build_adjacency()
+        return [(self.edge_dst[e], self.labels[self.edge_label[e]])
+                for e in self.out_edges[self.out_offsets[i]:self.out_offsets[i + 1]]]
+
+    def predecessors(self, i):
+        """入边 (源编号, 边标签) 列表"""
+        if self.out_offsets is None:
+            self.build_adjacency()
+        return [(self.edge_src[e], self.labels[self.edge_label[e]])
+                for e in self.in_edges[self.in_offsets[i]:self.in_offsets[i + 1]]]
+
+
+class NodeRecord:
+    """节点记录：标签，以及去重后的前向、后向相邻节点编号"""
+    __slots__ = ("label", "forward", "backward")
+
+    def __init__(self, label):
+        self.label = label
+        self.forward = array('i')
+        self.backward = array('i')
+
+
+class NeighborGraph:
+    """节点ID驻留为整数编号的相邻关系，供逐节点浏览使用
+
+    编号在重新加载之间保持不变：删除的节点留下空位，新节点追加在末尾。
+    """
+
+    def __init__(self):
+        self.ids = []            # 编号 -> 节点ID，已删除的为None
+        self.index = {}          # 节点ID -> 编号
+        self.records = []        # 编号 -> NodeRecord，已删除的为None
+
+    @classmethod
+    def from_model(cls, model):
+        """从图模型构建，模型的节点编号直接沿用"""
+        graph = cls()
+        graph.ids = list(model.ids)
+        graph.index = {node_id: i for i, node_id in enumerate(graph.ids)}
+        records = [NodeRecord(model.label(i)) for i in range(len(graph.ids))]
+        graph.records = records
+        # 用整数键的集合去重，重复边只保留第一次出现，相邻节点保持文件中的顺序
+        n = len(records)
+        seen = set()
+        for s, d in zip(model.edge_src, model.edge_dst):
+            key = s * n + d
+            if key in seen:
+                continue
+            seen.add(key)
+            records[s].forward.append(d)
+            records[d].backward.append(s)
+        return graph
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, node_id):
+        return node_id in self.index
+
+    def __iter__(self):
+        """按编号顺序遍历存在的节点ID"""
+        return (node_id for node_id in self.ids if node_id is not None)
+
+    def add(self, node_id, label):
+        i = len(self.ids)
+        self.index[node_id] = i
+        self.ids.append(node_id)
+        self.records.append(NodeRecord(label))
+        return i
+
+    def remove(self, node_id):
+        i = self.index.pop(node_id)
+        self.ids[i] = None
+        self.records[i] = None
+
+    def record(self, node_id):
+        return self.records[self.index[node_id]]
+
+    def label(self, node_id):
+        return self.records[self.index[node_id]].label
+
+    def first(self):
+        return next(iter(self))
+
+    def neighbors(self, node_id):
+        """前向和后向相邻节点的ID"""
+        record = self.record(node_id)
+        ids = self.ids
+        return [ids[j] for j in record.forward] + [ids[j] for j in record.backward]
+
+    def intern(self, node_ids):
+        """节点ID序列 -> 去重后的编号数组，保持首次出现的顺序"""
+        result = array('i')
+        seen = set()
+        index = self.index
+        for node_id in node_ids:
+            j = index[node_id]
+            if j not in seen:
+                seen.add(j)
+                result.append(j)
+        return result
+
+    def relink(self, node_id, model):
+        """按新的图模型重建节点的相邻关系，模型中的节点都必须已加入"""
+        i = model.index[node_id]
+        ids = model.ids
+        record = self.record(node_id)
+        record.forward = self.intern(ids[j] for j, _ in model.successors(i))
+        record.backward = self.intern(ids[j] for j, _ in model.predecessors(i))
+
+
+class DotParser:
+    """在记号流上线性解析DOT语句，支持多行属性、边链和子图"""
+
+    def __init__(self, tokens, model):
+        self.tokens = tokens
+        self.pos = 0
+        self.model = model
+        # 作用域栈：每层保存 (节点默认属性, 边默认属性)，子图继承外层
+        self.scopes = [({}, {})]
+        # 正在解析的子图所引用的节点
+        self.members = []
+
+    def parse(self):
+        tokens = self.tokens
+        # 跳过 strict/digraph/graph 与图名，直到第一个 {
+        while self.pos < len(tokens) and tokens[self.pos] != '{':
+            self.pos += 1
+        self.pos += 1
+        self.parse_stmt_list()
+        return self.model
+
+    def parse_stmt_list(self):
+        tokens = self.tokens
+        n = len(tokens)
+        while self.pos < n:
+            tok = tokens[self.pos]
+            if tok == '}':
+                self.pos += 1
+                return
+            if tok == ';' or tok == ',':
+                self.pos += 1
+                continue
+            self.parse_stmt()
+
+    def parse_attr_list(self):
+        """解析一个或多个连续的 [a=b, c=d] 属性列表"""
+        tokens = self.tokens
+        n = len(tokens)
+        attrs = {}
+        while self.pos < n and tokens[self.pos][0] == '[':
+            for key, value in ATTR_PATTERN.findall(tokens[self.pos], 1, len(tokens[self.pos]) - 1):
+                attrs[unquote(key)] = unquote(value) if value else "true"
+            self.pos += 1
+        return attrs
+
+    def parse_stmt(self):
+        tokens = self.tokens
+        tok = tokens[self.pos]
+        node_defaults, edge_defaults = self.scopes[-1]
+
+        # 默认属性语句：node [...] / edge [...] / graph [...]
+        if tok in ("node", "edge", "graph") and self.pos + 1 < len(tokens) and tokens[self.pos + 1][0] == '[':
+            self.pos += 1
+            attrs = self.parse_attr_list()
+            if tok == "node":
+                self.scopes[-1] = (dict(node_defaults, **attrs), edge_defaults)
+            elif tok == "edge":
+                self.scopes[-1] = (node_defaults, dict(edge_defaults, **attrs))
+            elif len(self.scopes) == 1:
+                self.model.graph_attrs.update(attrs)
+            return
+
+        # 图属性赋值：rankdir=LR
+        if self.pos + 2 < len(tokens) and tokens[self.pos + 1] == '=':
+            if len(self.scopes) == 1:
+                self.model.graph_attrs[unquote(tok)] = unquote(tokens[self.pos + 2])
+            self.pos += 3
+            return
+
+        # 节点语句或边链：a -> b -> {c d} [attrs]
+        # 这是最常见的语句，普通节点ID在这里直接内联处理
+        model = self.model
+        index = model.index
+        members = self.members
+        n = len(tokens)
+        pos = self.pos
+        operands = []
+        while True:
+            tok = tokens[pos]
+            if tok == '{' or tok == "subgraph":
+                self.pos = pos
+                operands.append(self.parse_subgraph())
+                pos = self.pos
+            else:
+                pos += 1
+                # 忽略端口 a:port:compass
+                while pos + 1 < n and tokens[pos] == ':':
+                    pos += 2
+                node_id = unquote(tok) if tok[0] == '"' else tok
+                i = index.get(node_id)
+                if i is None:
+                    i = model.add_node(node_id, node_defaults)
+                if members:
+                    members[-1].append(i)
+                operands.append((i,))
+            if pos < n and tokens[pos] in EDGE_OPS:
+                pos += 1
+                continue
+            break
+        self.pos = pos
+        attrs = self.parse_attr_list() if pos < n and tokens[pos][0] == '[' else None
+
+        if len(operands) == 1:
+            if attrs:
+                for i in operands[0]:
+                    model.update_node(i, attrs)
+            return
+
+        if edge_defaults:
+            attrs = dict(edge_defaults, **attrs) if attrs else edge_defaults
+        label = attrs.get("label", "") if attrs else ""
+        for k in range(len(operands) - 1):
+            for s in operands[k]:
+                for d in operands[k + 1]:
+                    model.add_edge(s, d, label)
+
+    def parse_subgraph(self):
+        """解析子图，返回其中出现过的节点编号"""
+        tokens = self.tokens
+        if tokens[self.pos] == "subgraph":
+            self.pos += 1
+            if self.pos < len(tokens) and tokens[self.pos] != '{':
+                self.pos += 1
+        if self.pos >= len(tokens) or tokens[self.pos] != '{':
+            return []
+        self.pos += 1
+        # 子图内部的语句正常解析，同时收集其中引用到的节点
+        self.scopes.append(self.scopes[-1])
+        self.members.append([])
+        self.parse_stmt_list()
+        self.scopes.pop()
+        members = list(dict.fromkeys(self.members.pop()))
+        if self.members:
+            self.members[-1].extend(members)
+        return members
+
+
+class GraphDiff:
+    """两个图模型之间的差异，节点和边都用节点ID表示"""
+
+    def __init__(self):
+        self.added_nodes = []
+        self.removed_nodes = []
+        self.changed_nodes = []     # 标签或属性变化的节点
+        self.added_edges = []       # (源ID, 目标ID, 边标签)
+        self.removed_edges = []     # (源ID, 目标ID)
+        self.changed_edges = []     # (源ID, 目标ID, 新的边标签)
+
+    def is_empty(self):
+        return not (self.added_nodes or self.removed_nodes or self.changed_nodes
+                    or self.added_edges or self.removed_edges or self.changed_edges)
+
+    def touched_nodes(self):
+        """受影响的节点：自身变化或有边增删改"""
+        touched = set(self.added_nodes) | set(self.removed_nodes) | set(self.changed_nodes)
+        for edges in (self.added_edges, self.removed_edges, self.changed_edges):
+            for edge in edges:
+                touched.add(edge[0])
+                touched.add(edge[1])
+        return touched
+
+    def __repr__(self):
+        return (f"GraphDiff(+{len(self.added_nodes)}/-{len(self.removed_nodes)}/~{len(self.changed_nodes)} 节点, "
+                f"+{len(self.added_edges)}/-{len(self.removed_edges)}/~{len(self.changed_edges)} 边)")
+
+
+def edge_map(model):
+    """(源ID, 目标ID) -> 边标签；重复的边与nx.DiGraph一致，以最后一条为准"""
+    return {(s, d): label for s, d, label in model.iter_edges()}
+
+
+def diff_models(old, new):
+    """比较两个图模型，返回GraphDiff；节点按ID对应，与编号无关"""
+    diff = GraphDiff()
+    old_index = {node_id: i for i, node_id in enumerate(old.ids)}
+    new_index = {node_id: i for i, node_id in enumerate(new.ids)}
+    for node_id, j in new_index.items():
+        i = old_index.get(node_id)
+        if i is None:
+            diff.added_nodes.append(node_id)
+        elif old.attrs[i] != new.attrs[j]:
+            diff.changed_nodes.append(node_id)
+    diff.removed_nodes = [node_id for node_id in old_index if node_id not in new_index]
+
+    old_edges = edge_map(old)
+    new_edges = edge_map(new)
+    for key, label in new_edges.items():
+        old_label = old_edges.get(key)
+        if old_label is None:
+            diff.added_edges.append((key[0], key[1], label))
+        elif old_label != label:
+            diff.changed_edges.append((key[0], key[1], label))
+    diff.removed_edges = [key for key in old_edges if key not in new_edges]
+    return diff
+
+
+def parse_dot(text):
+    """解析DOT文本，返回GraphModel"""
+    return DotParser(tokenize(text), GraphModel()).parse()
+
+
+def load_dot(path):
+    """读取并解析DOT文件"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_dot(f.read())
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import mmap
+import json
+import struct
+import hashlib
+from array import array
+from collections.abc import Mapping
+from hitsz_graph import GraphModel, load_dot
+
+# 缓存文件格式
+CACHE_MAGIC = b"HGC1"
+CACHE_VERSION = 3
+CACHE_SUFFIX = ".gcache"
+
+# 文件头：魔数、版本、字节序、段数量；随后是DOT文件的 (mtime_ns, 大小, sha1)
+HEADER = struct.Struct("<4sIBxxxI")
+STAMP = struct.Struct("<qq20s")
+SECTION = struct.Struct("<QQ")
+
+# 各段依次存放，(段名, array类型码)，类型码为None表示原始字节
+SECTIONS = [
+    ("str_offsets", "q"),     # 字符串表偏移，长度为字符串数+1
+    ("str_blob", None),       # 所有字符串的UTF-8拼接
+    ("graph_attrs", None),    # 图属性JSON
+    ("node_id", "i"),         # 节点编号 -> 节点ID字符串
+    ("node_sorted", "i"),     # 按节点ID的UTF-8字节序排好的节点编号，用于二分查找
+    ("node_label", "i"),      # 节点编号 -> 标签字符串，-1表示未设置
+    ("node_style", "i"),      # 节点编号 -> 样式类型（去重后的属性字典）
+    ("styles", "i"),          # 样式类型 -> 属性字典JSON字符串
+    ("edge_src", "i"),
+    ("edge_dst", "i"),
+    ("edge_label", "i"),      # 边 -> 边标签编号
+    ("labels", "i"),          # 边标签编号 -> 字符串
+    ("out_offsets", "i"),     # CSR出边
+    ("out_edges", "i"),
+    ("in_offsets", "i"),      # CSR入边
+    ("in_edges", "i"),
+]
+BYTEORDER_FLAG = 0 if sys.byteorder == "little" else 1
+
+# 进程内已加载的编译结果，避免两个视图重复打开同一缓存
+_loaded = {}
+
+
+def file_stamp(path, with_hash=True):
+    """源文件的 (mtime_ns, 大小, sha1)，文件不存在时全为零"""
+    if not path or not os.path.exists(path):
+        return (0, 0, b"\0" * 20)
+    st = os.stat(path)
+    digest = b"\0" * 20
+    if with_hash:
+        h = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.digest()
+    return (st.st_mtime_ns, st.st_size, digest)
+
+
+class StringTable:
+    """按需解码的字符串表"""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+
+class ColumnStrings:
+    """字符串列：把整型列映射为字符串表中的字符串"""
+
+    def __init__(self, column, strings):
+        self.column = column
+        self.strings = strings
+
+    def __len__(self):
+        return len(self.column)
+
+    def __getitem__(self, i):
+        return self.strings[self.column[i]]
+
+    def __iter__(self):
+        strings = self.strings
+        for s in self.column:
+            yield strings[s]
+
+
+class SortedIdIndex(Mapping):
+    """节点ID -> 编号的只读索引，在排好序的ID上二分查找，无需整体建字典"""
+
+    def __init__(self, node_sorted, node_id, strings):
+        self.node_sorted = node_sorted
+        self.node_id = node_id
+        self.strings = strings
+
+    def key_bytes(self, k):
+        s = self.node_id[self.node_sorted[k]]
+        return bytes(self.strings.blob[self.strings.offsets[s]:self.strings.offsets[s + 1]])
+
+    def __getitem__(self, node_id):
+        target = node_id.encode('utf-8')
+        lo, hi = 0, len(self.node_sorted)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key_bytes(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.node_sorted) and self.key_bytes(lo) == target:
+            return self.node_sorted[lo]
+        raise KeyError(node_id)
+
+    def __iter__(self):
+        return iter(ColumnStrings(self.node_id, self.strings))
+
+    def __len__(self):
+        return len(self.node_id)
+
+
+class NodeAttrs:
+    """节点属性列：样式类型的属性字典加上各自的标签"""
+
+    def __init__(self, node_label, node_style, styles, strings):
+        self.node_label = node_label
+        self.node_style = node_style
+        self.styles = styles
+        self.strings = strings
+
+    def __len__(self):
+        return len(self.node_style)
+
+    def __getitem__(self, i):
+        style = self.styles[self.node_style[i]]
+        label = self.node_label[i]
+        if label < 0:
+            return style
+        attrs = dict(style)
+        attrs["label"] = self.strings[label]
+        return attrs
+
+
+class CachedGraphModel(GraphModel):
+    """从缓存映射出的只读图模型，字符串和节点索引在用到时才解码"""
+
+    def __init__(self, sections, buf=None):
+        # 映射的缓存文件和各段视图，release 之后换成内存中的副本
+        self.buf = buf
+        self.sections = sections
+        strings = StringTable(sections["str_offsets"], sections["str_blob"])
+        self.strings = strings
+        self.ids = ColumnStrings(sections["node_id"], strings)
+        self.index = SortedIdIndex(sections["node_sorted"], sections["node_id"], strings)
+        styles = [json.loads(strings[s]) for s in sections["styles"]]
+        self.attrs = NodeAttrs(sections["node_label"], sections["node_style"], styles, strings)
+        self.shared_attrs = set()
+        self.graph_attrs = json.loads(str(sections["graph_attrs"], 'utf-8'))
+
+        self.edge_src = sections["edge_src"]
+        self.edge_dst = sections["edge_dst"]
+        self.edge_label = sections["edge_label"]
+        self.labels = [strings[s] for s in sections["labels"]]
+        self.label_index = {label: k for k, label in enumerate(self.labels)}
+
+        self.out_offsets = sections["out_offsets"]
+        self.out_edges = sections["out_edges"]
+        self.in_offsets = sections["in_offsets"]
+        self.in_edges = sections["in_edges"]
+
+    def release(self):
+        """把各段复制到内存并解除映射，模型照常可用
+
+        Windows 上无法替换仍被映射的文件，重建缓存之前要先解除旧模型的映射。
+        各个列对象原地换成副本，已经拿到这些对象的界面代码不受影响。
+        """
+        if self.buf is None:
+            return
+        sections = {}
+        for name, code in SECTIONS:
+            part = self.sections[name]
+            if code:
+                copy = array(code)
+                copy.frombytes(part.cast('B'))
+                sections[name] = copy
+            else:
+                sections[name] = bytes(part)
+        self.strings.offsets = sections["str_offsets"]
+        self.strings.blob = sections["str_blob"]
+        self.ids.column = sections["node_id"]
+        self.index.node_sorted = sections["node_sorted"]
+        self.index.node_id = sections["node_id"]
+        self.attrs.node_label = sections["node_label"]
+        self.attrs.node_style = sections["node_style"]
+        self.edge_src = sections["edge_src"]
+        self.edge_dst = sections["edge_dst"]
+        self.edge_label = sections["edge_label"]
+        self.out_offsets = sections["out_offsets"]
+        self.out_edges = sections["out_edges"]
+        self.in_offsets = sections["in_offsets"]
+        self.in_edges = sections["in_edges"]
+        self.sections = sections
+        # 循环变量还引用着最后一段视图，也要释放
+        part = None
+        buf, self.buf = self.buf, None
+        try:
+            buf.close()
+        except BufferError as e:
+            # 别处还持有旧的内存视图，映射要等它们释放后才会解除
+            print(f"解除图缓存映射出错: {e}")
+
+    def add_node(self, node_id, attrs):
+        raise TypeError("缓存图模型是只读的")
+
+    def add_edge(self, src, dst, label=""):
+        raise TypeError("缓存图模型是只读的")
+
+
+class CompiledGraph:
+    """编译结果：图模型，以及是否来自缓存"""
+
+    def __init__(self, model, from_cache):
+        self.model = model
+        self.from_cache = from_cache
+
+
+def cache_path_for(dot_path):
+    """缓存文件放在DOT文件旁边"""
+    return dot_path + CACHE_SUFFIX
+
+
+def encode(model, dot_stamp):
+    """把图模型编码为缓存文件内容"""
+    strings = []
+    string_index = {}
+
+    def intern(s):
+        k = string_index.get(s)
+        if k is None:
+            k = len(strings)
+            string_index[s] = k
+            strings.append(s)
+        return k
+
+    n = model.node_count()
+    node_id = array('i', (intern(s) for s in model.ids))
+    node_sorted = array('i', sorted(range(n), key=lambda i: model.ids[i].encode('utf-8')))
+    node_label = array('i', bytes(4 * n))
+    node_style = array('i', bytes(4 * n))
+    style_index = {}
+    styles = array('i')
+    for i in range(n):
+        attrs = model.attrs[i]
+        if "label" in attrs:
+            node_label[i] = intern(attrs["label"])
+            attrs = {k: v for k, v in attrs.items() if k != "label"}
+        else:
+            node_label[i] = -1
+        key = json.dumps(attrs, ensure_ascii=False, sort_keys=True)
+        style = style_index.get(key)
+        if style is None:
+            style = len(styles)
+            style_index[key] = style
+            styles.append(intern(key))
+        node_style[i] = style
+
+    labels = array('i', (intern(s) for s in model.labels))
+    if model.out_offsets is None:
+        model.build_adjacency()
+
+    encoded = [s.encode('utf-8') for s in strings]
+    str_offsets = array('q', [0])
+    pos = 0
+    for data in encoded:
+        pos += len(data)
+        str_offsets.append(pos)
+
+    values = {
+        "str_offsets": str_offsets,
+        "str_blob": b"".join(encoded),
+        "graph_attrs": json.dumps(model.graph_attrs, ensure_ascii=False).encode('utf-8'),
+        "node_id": node_id,
+        "node_sorted": node_sorted,
+        "node_label": node_label,
+        "node_style": node_style,
+        "styles": styles,
+        "edge_src": array('i', model.edge_src),
+        "edge_dst": array('i', model.edge_dst),
+        "edge_label": array('i', model.edge_label),
+        "labels": labels,
+        "out_offsets": array('i', model.out_offsets),
+        "out_edges": array('i', model.out_edges),
+        "in_offsets": array('i', model.in_offsets),
+        "in_edges": array('i', model.in_edges),
+    }
+
+    # 段数据按8字节对齐，保证映射后可以直接转换为整型视图
+    header_size = HEADER.size + STAMP.size + len(SECTIONS) * SECTION.size
+    offset = (header_size + 7) & ~7
+    directory = []
+    payload = []
+    for name, _ in SECTIONS:
+        data = values[name]
+        data = data.tobytes() if isinstance(data, array) else data
+        directory.append((offset, len(data)))
+        padded = (len(data) + 7) & ~7
+        payload.append(data + b"\0" * (padded - len(data)))
+        offset += padded
+
+    head = [HEADER.pack(CACHE_MAGIC, CACHE_VERSION, BYTEORDER_FLAG, len(SECTIONS)),
+            STAMP.pack(*dot_stamp)]
+    head.extend(SECTION.pack(off, size) for off, size in directory)
+    head = b"".join(head)
+    head += b"\0" * (((header_size + 7) & ~7) - len(head))
+    return head + b"".join(payload)
+
+
+def read_header(buf):
+    """解析文件头，格式不符时返回None"""
+    if len(buf) < HEADER.size + STAMP.size:
+        return None
+    magic, version, byteorder, count = HEADER.unpack_from(buf, 0)
+    if magic != CACHE_MAGIC or version != CACHE_VERSION or byteorder != BYTEORDER_FLAG or count != len(SECTIONS):
+        return None
+    dot_stamp = STAMP.unpack_from(buf, HEADER.size)
+    base = HEADER.size + STAMP.size
+    directory = [SECTION.unpack_from(buf, base + k * SECTION.size) for k in range(count)]
+    return dot_stamp, directory
+
+
+def map_sections(buf, directory):
+    """把各段映射为零拷贝的内存视图"""
+    view = memoryview(buf)
+    sections = {}
+    for (name, code), (offset, size) in zip(SECTIONS, directory):
+        part = view[offset:offset + size]
+        sections[name] = part.cast(code) if code else part
+    return sections
+
+
+def stamp_matches(cached, path):
+    """先比较mtime和大小，不一致时再比较内容哈希"""
+    quick = file_stamp(path, with_hash=False)
+    if quick[:2] == tuple(cached[:2]):
+        return True, None
+    full = file_stamp(path)
+    return full[1:] == tuple(cached[1:]), full
+
+
+def patch_stamp(cache_path, offset, stamp):
+    """内容未变但mtime变了（例如touch），只更新文件头里的时间戳"""
+    try:
+        with open(cache_path, 'r+b') as f:
+            f.seek(offset)
+            f.write(STAMP.pack(*stamp))
+    except OSError as e:
+        print(f"更新图缓存时间戳失败: {e}")
+
+
+def write_cache(cache_path, data):
+    """原子写入缓存文件，失败时不影响正常使用"""
+    tmp_path = cache_path + ".tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"写入图缓存失败: {e}")
+
+
+def load_compiled(dot_path):
+    """加载编译后的图：缓存有效时mmap映射，否则重新解析并重建缓存
+
+    标注不在这里，由 hitsz_annotation_store 单独映射，标注变化不会使图缓存失效。
+    """
+    key = os.path.abspath(dot_path)
+    compiled = _loaded.get(key)
+    if compiled is not None:
+        return compiled
+
+    cache_path = cache_path_for(dot_path)
+    if os.path.exists(cache_path) and os.path.getsize(cache_path) > 0:
+        buf = None
+        try:
+            with open(cache_path, 'rb') as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            header = read_header(buf)
+            if header is not None:
+                dot_stamp, directory = header
+                dot_ok, dot_full = stamp_matches(dot_stamp, dot_path)
+                if dot_ok:
+                    if dot_full is not None:
+                        patch_stamp(cache_path, HEADER.size, dot_full)
+                    compiled = CompiledGraph(CachedGraphModel(map_sections(buf, directory), buf), True)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"读取图缓存失败，将重新构建: {e}")
+            compiled = None
+        if compiled is None and buf is not None:
+            # 先解除映射，重建时才能替换文件
+            buf.close()
+
+    if compiled is None:
+        model = load_dot(dot_path)
+        write_cache(cache_path, encode(model, file_stamp(dot_path)))
+        compiled = CompiledGraph(model, False)
+
+    _loaded[key] = compiled
+    return compiled
+
+
+def invalidate_compiled(dot_path):
+    """DOT文件变化后丢弃进程内的编译结果，下次load_compiled重新检查缓存
+
+    调用方通常还要用旧模型和新模型比较差异，旧模型不丢弃，只解除它对缓存文件的映射。
+    """
+    compiled = _loaded.pop(os.path.abspath(dot_path), None)
+    if compiled is not None and isinstance(compiled.model, CachedGraphModel):
+        compiled.model.release()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+from collections import OrderedDict
+
+# 默认内存预算（MB），可通过环境变量 HITSZ_IMAGE_CACHE_MB 调整
+DEFAULT_BUDGET_MB = 128
+
+
+def image_bytes(image):
+    """QImage占用的字节数"""
+    if hasattr(image, "sizeInBytes"):
+        return image.sizeInBytes()
+    return image.byteCount()
+
+
+class ImageCache:
+    """按字节计量的LRU图片缓存，键为 (路径, mtime, 目标尺寸)"""
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """命中时返回图片并移到最近使用端，未命中返回None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def __contains__(self, key):
+        """只判断是否已缓存，不计入命中统计，也不改变淘汰顺序"""
+        with self.lock:
+            return key in self.entries
+
+    def put(self, key, image):
+        """放入缓存，超出预算时从最久未使用的一端淘汰"""
+        if key is None or image is None or image.isNull():
+            return
+        size = image_bytes(image)
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            # 单张就超过预算的图片不缓存
+            if size > self.budget_bytes:
+                return
+            self.entries[key] = (image, size)
+            self.total_bytes += size
+            self.evict_locked()
+
+    def evict_locked(self):
+        while self.total_bytes > self.budget_bytes and self.entries:
+            _, (_, size) = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+
+    def set_budget(self, budget_bytes):
+        """调整内存预算，立即淘汰多出的部分"""
+        with self.lock:
+            self.budget_bytes = budget_bytes
+            self.evict_locked()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        """命中、未命中、淘汰次数及当前占用"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "budget_bytes": self.budget_bytes,
+            }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def shared_image_cache():
+    """进程内共享的图片缓存"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            budget_mb = int(os.environ.get("HITSZ_IMAGE_CACHE_MB", DEFAULT_BUDGET_MB))
+            _shared_cache = ImageCache(budget_mb * 1024 * 1024)
+        return _shared_cache
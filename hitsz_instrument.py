@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""可选的性能埋点：热点函数耗时直方图、事件循环卡顿检测和 Chrome trace 文件
+
+默认关闭，被 @instrumented 装饰的函数只多一次标志判断。命令行带 --instrument 时启用：
+
+    python hitsz_viewer.py --instrument
+
+trace 写在 traces/ 目录下，可以用 chrome://tracing 或 Perfetto 打开；Ctrl+Shift+D 打开调试面板。
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import bisect
+import threading
+import functools
+import traceback
+from collections import deque
+from PyQt5.QtCore import QTimer
+
+# 打开埋点的命令行参数
+INSTRUMENT_FLAG = "--instrument"
+# trace 文件目录、文件名，单个文件的大小上限和保留的旧文件数
+TRACE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces")
+TRACE_NAME = "hitsz_trace"
+TRACE_MAX_BYTES = 8 << 20
+TRACE_BACKUPS = 3
+# GUI线程心跳间隔；超过阈值没有心跳算一次卡顿
+HEARTBEAT_MS = 50
+STALL_THRESHOLD_MS = 200
+# 看门狗检查间隔和写trace的间隔（秒）
+WATCHDOG_INTERVAL = 0.05
+FLUSH_INTERVAL = 1.0
+# 内存中最多保留的卡顿记录和待写入的trace事件
+MAX_STALLS = 100
+MAX_PENDING_EVENTS = 100000
+# 直方图桶上界（毫秒）：从0.01 ms起每个桶翻倍，约到21秒，再往上是最后一个桶
+BUCKET_BOUNDS = [0.01 * 2 ** k for k in range(22)]
+STALL_NAME = "事件循环卡顿"
+
+
+class LatencyHistogram:
+    """按对数分桶的耗时直方图，分位数取所在桶的上界"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        rank = p * self.count
+        seen = 0
+        for k, c in enumerate(self.counts):
+            seen += c
+            if c and seen >= rank:
+                bound = BUCKET_BOUNDS[k] if k < len(BUCKET_BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p90_ms": self.percentile(0.90),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max,
+        }
+
+
+class TraceWriter:
+    """Chrome trace 的JSON数组格式；文件超过上限时闭合数组并轮转，与 RotatingFileHandler 的命名一致"""
+
+    def __init__(self, directory, name=TRACE_NAME, max_bytes=TRACE_MAX_BYTES, backups=TRACE_BACKUPS):
+        self.directory = directory
+        self.base = os.path.join(directory, name)
+        self.path = self.base + ".json"
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.file = None
+        self.size = 0
+
+    def open(self, header_events):
+        os.makedirs(self.directory, exist_ok=True)
+        self.file = open(self.path, "w", encoding="utf-8")
+        self.file.write("[")
+        self.size = 1
+        self.first = True
+        self.write(header_events)
+
+    def write(self, events):
+        for event in events:
+            line = ("\n" if self.first else ",\n") + json.dumps(event, ensure_ascii=False)
+            self.first = False
+            self.file.write(line)
+            self.size += len(line)
+        self.file.flush()
+
+    def needs_rotation(self):
+        return self.size > self.max_bytes
+
+    def rotate(self, header_events):
+        self.close()
+        for k in range(self.backups - 1, 0, -1):
+            source = f"{self.base}.{k}.json"
+            if os.path.exists(source):
+                os.replace(source, f"{self.base}.{k + 1}.json")
+        if self.backups:
+            os.replace(self.path, f"{self.base}.1.json")
+        self.open(header_events)
+
+    def close(self):
+        if self.file is not None:
+            self.file.write("\n]\n")
+            self.file.close()
+            self.file = None
+
+
+class Instrumentation:
+    """进程内共用的埋点状态；record 可以在任意线程调用"""
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.events = deque(maxlen=MAX_PENDING_EVENTS)
+        self.stalls = deque(maxlen=MAX_STALLS)
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.thread_names = {}
+        self.gui_thread = None
+        self.writer = None
+        self.watchdog = None
+        self.stop_event = threading.Event()
+        self.heartbeat = None
+        self.last_beat = None
+        # 看门狗发现卡顿时抓到的GUI线程调用栈，卡顿结束时写入记录
+        self.stall_stack = None
+        self.stall_threshold = STALL_THRESHOLD_MS / 1000
+
+    def enable(self, trace_dir=TRACE_DIR, stall_threshold_ms=STALL_THRESHOLD_MS):
+        """在GUI线程、QApplication创建之后调用"""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.stall_threshold = stall_threshold_ms / 1000
+        self.gui_thread = threading.get_ident()
+        self.thread_names[self.gui_thread] = "GUI线程"
+        self.writer = TraceWriter(trace_dir)
+        self.writer.open(self.metadata_events())
+
+        self.last_beat = time.perf_counter()
+        self.heartbeat = QTimer()
+        self.heartbeat.setInterval(HEARTBEAT_MS)
+        self.heartbeat.timeout.connect(self.beat)
+        self.heartbeat.start()
+
+        self.watchdog = threading.Thread(target=self.watch, name="卡顿看门狗", daemon=True)
+        self.watchdog.start()
+        atexit.register(self.shutdown)
+        print(f"[埋点] 已启用，trace 写入 {self.writer.path}")
+
+    def metadata_events(self):
+        """每个trace文件开头的进程名和线程名"""
+        events = [{"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0,
+                   "args": {"name": os.path.basename(sys.argv[0]) or "python"}}]
+        for tid, name in list(self.thread_names.items()):
+            events.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}})
+        return events
+
+    def timestamp(self, t):
+        """perf_counter 秒 -> trace 中的微秒"""
+        return (t - self.origin) * 1e6
+
+    def record(self, name, start, end, category="slot", args=None):
+        ms = (end - start) * 1000
+        tid = threading.get_ident()
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.add(ms)
+            if tid not in self.thread_names:
+                self.thread_names[tid] = threading.current_thread().name
+        event = {"name": name, "cat": category, "ph": "X", "ts": self.timestamp(start), "dur": ms * 1000,
+                 "pid": self.pid, "tid": tid}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def beat(self):
+        """GUI线程心跳；距上一次心跳超过阈值时记录一次卡顿"""
+        now = time.perf_counter()
+        start = self.last_beat
+        self.last_beat = now
+        if now - start <= self.stall_threshold:
+            return
+        with self.lock:
+            stack = self.stall_stack
+            self.stall_stack = None
+        # 卡顿从上一次心跳应当到来的时刻算起
+        start += HEARTBEAT_MS / 1000
+        stall = {
+            "time": time.time() - (now - start),
+            "duration_ms": (now - start) * 1000,
+            "stack": stack or "",
+        }
+        self.stalls.append(stall)
+        self.record(STALL_NAME, start, now, category="stall", args={"stack": stall["stack"]})
+        print(f"[埋点] {STALL_NAME} {stall['duration_ms']:.0f} ms")
+
+    def watch(self):
+        """看门狗线程：心跳超时时抓取GUI线程的调用栈，并定期把事件写入trace文件"""
+        last_flush = time.perf_counter()
+        while not self.stop_event.wait(WATCHDOG_INTERVAL):
+            now = time.perf_counter()
+            if now - self.last_beat > self.stall_threshold and self.stall_stack is None:
+                frame = sys._current_frames().get(self.gui_thread)
+                if frame is not None:
+                    stack = "".join(traceback.format_stack(frame))
+                    with self.lock:
+                        self.stall_stack = stack
+            if now - last_flush >= FLUSH_INTERVAL:
+                self.flush()
+                last_flush = now
+
+    def flush(self):
+        events = []
+        while self.events:
+            try:
+                events.append(self.events.popleft())
+            except IndexError:
+                break
+        if not events or self.writer is None:
+            return
+        try:
+            self.writer.write(events)
+            if self.writer.needs_rotation():
+                self.writer.rotate(self.metadata_events())
+        except OSError as e:
+            print(f"写入trace文件出错: {e}")
+
+    def shutdown(self):
+        """停止看门狗，写完剩余事件并闭合trace文件"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        self.stop_event.set()
+        if self.heartbeat is not None:
+            self.heartbeat.stop()
+        if self.watchdog is not None and self.watchdog is not threading.current_thread():
+            self.watchdog.join(1.0)
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+
+    def summaries(self):
+        """名称 -> 直方图摘要，按名称排序"""
+        with self.lock:
+            return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def reset(self):
+        """清空直方图和卡顿记录（trace文件不受影响）"""
+        with self.lock:
+            self.histograms.clear()
+        self.stalls.clear()
+
+
+# 进程内共用的埋点
+instrument = Instrumentation()
+
+
+def instrumented(name=None):
+    """装饰器：启用埋点时记录每次调用的耗时，name 默认为函数的限定名"""
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not instrument.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                instrument.record(label, start, time.perf_counter())
+        return wrapper
+    return decorate
+
+
+def instrument_from_argv(argv=None):
+    """命令行带 --instrument 时启用埋点，并从参数中去掉它；需要在创建QApplication之后调用"""
+    argv = sys.argv if argv is None else argv
+    if INSTRUMENT_FLAG in argv:
+        argv.remove(INSTRUMENT_FLAG)
+        instrument.enable()
+    return instrument.enabled
+
+
+def install_debug_shortcut(window):
+    """启用埋点时给窗口加上 Ctrl+Shift+D 打开调试面板"""
+    if not instrument.enabled:
+        return
+    from PyQt5.QtWidgets import QShortcut
+    from PyQt5.QtGui import QKeySequence
+
+    def show_panel():
+        from hitsz_debug_panel import DebugPanel
+        panel = getattr(window, "debug_panel", None)
+        if panel is None:
+            panel = window.debug_panel = DebugPanel(instrument, window)
+        panel.show()
+        panel.raise_()
+
+    shortcut = QShortcut(QKeySequence("Ctrl+Shift+D"), window)
+    shortcut.activated.connect(show_panel)
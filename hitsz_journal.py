@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+from hitsz_annotation_store import open_store, write_store
+
+# 日志超过该大小（字节）后折叠回快照文件
+DEFAULT_COMPACT_THRESHOLD = 1024 * 1024
+
+
+def apply_record(annotations, node_id, field, value):
+    """把一条日志记录应用到标注字典，value为None表示删除该字段"""
+    if value is None:
+        node_data = annotations.get(node_id)
+        if node_data is not None:
+            node_data.pop(field, None)
+            if not node_data:
+                del annotations[node_id]
+    else:
+        annotations.setdefault(node_id, {})[field] = value
+
+
+def diff_node(node_id, old_data, new_data):
+    """比较节点标注的前后两个版本，生成需要追加的日志记录"""
+    old_data = old_data or {}
+    new_data = new_data or {}
+    records = []
+    for field, value in new_data.items():
+        if old_data.get(field) != value:
+            records.append((node_id, field, value))
+    for field in old_data:
+        if field not in new_data:
+            records.append((node_id, field, None))
+    return records
+
+
+class AnnotationJournal:
+    """标注预写日志：每次编辑追加一行紧凑记录，启动时在快照上重放"""
+
+    def __init__(self, snapshot_path, compact_threshold=DEFAULT_COMPACT_THRESHOLD):
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path + ".journal"
+        self.compact_threshold = compact_threshold
+        self.size = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+
+    def load(self, snapshot=None, truncate=True):
+        """读取最近的快照，并按顺序重放日志中的编辑
+
+        快照通过标注存储映射，按节点惰性解码；snapshot 为已加载好的快照时直接使用。
+        其他进程可能正在追加日志时传 truncate=False，只跳过不完整的尾部而不截断。
+        """
+        annotations = snapshot if snapshot is not None else open_store(self.snapshot_path)
+
+        if not os.path.exists(self.journal_path):
+            self.size = 0
+            return annotations
+
+        good_size = 0
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                # 崩溃时可能留下写了一半的最后一行，从这里开始的内容全部丢弃
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    node_id, field, value = json.loads(line)
+                except ValueError:
+                    break
+                apply_record(annotations, node_id, field, value)
+                good_size += len(line)
+
+        # 截掉损坏的尾部，保证之后的追加不会接在残缺记录后面
+        if truncate and good_size != os.path.getsize(self.journal_path):
+            print(f"标注日志尾部损坏，已截断到 {good_size} 字节")
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(good_size)
+        self.size = good_size
+        return annotations
+
+    def read(self):
+        """只读加载：JSON快照解析成普通字典后重放日志，不写标注存储、不截断日志
+
+        导出等命令行工具使用，不在数据目录中留下文件，也不与正在运行的查看器争用存储文件。
+        """
+        snapshot = {}
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        return self.load(snapshot, truncate=False)
+
+    def append(self, records):
+        """追加一批记录，写入量只与编辑内容大小有关"""
+        if not records:
+            return 0
+        data = ''.join(
+            json.dumps([node_id, field, value], ensure_ascii=False, separators=(',', ':')) + '\n'
+            for node_id, field, value in records
+        ).encode('utf-8')
+        with open(self.journal_path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self.size += len(data)
+        return len(data)
+
+    def needs_compaction(self):
+        """日志是否已超过折叠阈值"""
+        return self.size >= self.compact_threshold
+
+    def compact(self, annotations):
+        """把完整标注写回快照文件并清空日志"""
+        # 先写临时文件再原子替换，崩溃时主文件要么是旧快照要么是新快照
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(annotations, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        # 同时重建标注存储，下次启动不必重新解析JSON
+        write_store(self.snapshot_path, annotations)
+
+        # 替换后、清空前崩溃也没关系：日志记录都是赋值操作，重放是幂等的
+        with open(self.journal_path, 'wb') as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self.size = 0
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""分层（Sugiyama）布局：反转少量边去掉环后按最长路径分层，重心法排序层内节点
+
+坐标缓存在DOT文件旁边的 .layout 文件中，DOT文件不变时直接读取。
+"""
+
+import os
+import struct
+from array import array
+from hitsz_graph_cache import STAMP, file_stamp, stamp_matches, write_cache
+from hitsz_query import neighbor_csr
+
+LAYOUT_MAGIC = b"HGL1"
+LAYOUT_VERSION = 1
+LAYOUT_SUFFIX = ".layout"
+# 文件头：魔数、版本、节点数；随后是DOT文件的 (mtime_ns, 大小, sha1)，再是x、y坐标数组
+LAYOUT_HEADER = struct.Struct("<4sII")
+
+# 场景坐标中的层间距和层内节点间距
+LAYER_GAP = 240.0
+NODE_GAP = 60.0
+# 重心排序的扫描次数（向下、向上交替）
+SWEEPS = 4
+
+
+class GraphLayout:
+    """节点坐标：xs[i], ys[i] 为第i个节点中心在场景中的位置"""
+
+    def __init__(self, xs, ys):
+        self.xs = xs
+        self.ys = ys
+
+    def node_count(self):
+        return len(self.xs)
+
+    def bounds(self):
+        """(x0, y0, x1, y1)，没有节点时为全零"""
+        if not self.xs:
+            return 0.0, 0.0, 0.0, 0.0
+        return min(self.xs), min(self.ys), max(self.xs), max(self.ys)
+
+
+def greedy_order(n, out_offsets, succ, in_offsets, pred):
+    """Eades-Lin-Smyth 贪心反馈边集启发式：汇点依次放到末尾、源点放到开头，
+    其余每次取 出度-入度 最大的节点放到开头；返回节点在序列中的位置
+
+    与序列方向相反的边就是要反转的边，通常远少于DFS找到的回边，分层不会被拉得很深。
+    """
+    outdeg = array('i', (out_offsets[v + 1] - out_offsets[v] for v in range(n)))
+    indeg = array('i', (in_offsets[v + 1] - in_offsets[v] for v in range(n)))
+    removed = bytearray(n)
+    sinks = []
+    sources = []
+    # 出度-入度 -> 节点列表；度数变化时追加新条目，取出时再检查是否仍然有效
+    buckets = {}
+    bounds = [0, 0]    # 出现过的最大、最小差值
+
+    def push(v):
+        if outdeg[v] == 0:
+            sinks.append(v)
+        elif indeg[v] == 0:
+            sources.append(v)
+        else:
+            delta = outdeg[v] - indeg[v]
+            buckets.setdefault(delta, []).append(v)
+            if delta > bounds[0]:
+                bounds[0] = delta
+            if delta < bounds[1]:
+                bounds[1] = delta
+
+    def take_max():
+        top = bounds[0]
+        while top >= bounds[1]:
+            bucket = buckets.get(top)
+            while bucket:
+                v = bucket.pop()
+                if not removed[v] and outdeg[v] and indeg[v] and outdeg[v] - indeg[v] == top:
+                    bounds[0] = top
+                    return v
+            top -= 1
+        return None
+
+    def remove(v):
+        removed[v] = 1
+        for e in range(in_offsets[v], in_offsets[v + 1]):
+            u = pred[e]
+            if not removed[u]:
+                outdeg[u] -= 1
+                push(u)
+        for e in range(out_offsets[v], out_offsets[v + 1]):
+            w = succ[e]
+            if not removed[w]:
+                indeg[w] -= 1
+                push(w)
+
+    for v in range(n):
+        push(v)
+    front = []
+    back = []
+    while len(front) + len(back) < n:
+        if sinks:
+            v = sinks.pop()
+            if not removed[v]:
+                back.append(v)
+                remove(v)
+        elif sources:
+            v = sources.pop()
+            if not removed[v]:
+                front.append(v)
+                remove(v)
+        else:
+            v = take_max()
+            front.append(v)
+            remove(v)
+
+    pos = array('i', bytes(4 * n))
+    for k, v in enumerate(front):
+        pos[v] = k
+    for k, v in enumerate(reversed(back)):
+        pos[v] = len(front) + k
+    return pos
+
+
+def assign_ranks(n, out_offsets, succ, in_offsets, pred):
+    """按贪心序列反转方向相反的边（自环忽略），在得到的DAG上按最长路径分层，返回层号数组"""
+    pos = greedy_order(n, out_offsets, succ, in_offsets, pred)
+    order = sorted(range(n), key=pos.__getitem__)
+    rank = array('i', bytes(4 * n))
+    for v in order:
+        r = rank[v] + 1
+        pv = pos[v]
+        # 顺着序列的出边，以及反转后从 v 指出去的入边
+        for e in range(out_offsets[v], out_offsets[v + 1]):
+            w = succ[e]
+            if pos[w] > pv and rank[w] < r:
+                rank[w] = r
+        for e in range(in_offsets[v], in_offsets[v + 1]):
+            u = pred[e]
+            if pos[u] > pv and rank[u] < r:
+                rank[u] = r
+    return rank
+
+
+def order_layers(n, rank, out_offsets, succ, in_offsets, pred, sweeps=SWEEPS):
+    """重心法：每层按相邻层中邻居位置的平均值排序，返回层内位置（以层中心为0）"""
+    depth = max(rank) + 1 if n else 0
+    layers = [[] for _ in range(depth)]
+    for v in range(n):
+        layers[rank[v]].append(v)
+    pos = array('d', bytes(8 * n))
+    for layer in layers:
+        center = (len(layer) - 1) / 2
+        for k, v in enumerate(layer):
+            pos[v] = k - center
+
+    for sweep in range(sweeps):
+        if sweep % 2 == 0:
+            # 向下：参考上一层已经排好的前驱
+            rows, offsets, neighbors, upstream = range(1, depth), in_offsets, pred, True
+        else:
+            rows, offsets, neighbors, upstream = range(depth - 2, -1, -1), out_offsets, succ, False
+        for r in rows:
+            layer = layers[r]
+            keys = []
+            for v in layer:
+                total = 0.0
+                count = 0
+                for e in range(offsets[v], offsets[v + 1]):
+                    w = neighbors[e]
+                    if (rank[w] < r) if upstream else (rank[w] > r):
+                        total += pos[w]
+                        count += 1
+                keys.append(total / count if count else pos[v])
+            layer[:] = [v for _, v in sorted(zip(keys, layer))]
+            center = (len(layer) - 1) / 2
+            for k, v in enumerate(layer):
+                pos[v] = k - center
+    return pos
+
+
+def compute_layout(model):
+    """计算分层布局；rankdir=LR 时层沿x轴排列，否则沿y轴（与Graphviz一致）
+
+    跨多层的边不插入虚拟节点，画成直线。
+    """
+    n = model.node_count()
+    out_offsets, succ = neighbor_csr(model)
+    in_offsets, pred = neighbor_csr(model, incoming=True)
+    rank = assign_ranks(n, out_offsets, succ, in_offsets, pred)
+    pos = order_layers(n, rank, out_offsets, succ, in_offsets, pred)
+    layer_axis = array('d', (r * LAYER_GAP for r in rank))
+    node_axis = array('d', (p * NODE_GAP for p in pos))
+    if model.graph_attrs.get("rankdir", "TB").upper() in ("LR", "RL"):
+        return GraphLayout(layer_axis, node_axis)
+    return GraphLayout(node_axis, layer_axis)
+
+
+def layout_path_for(dot_path):
+    """布局缓存放在DOT文件旁边"""
+    return dot_path + LAYOUT_SUFFIX
+
+
+def load_layout(dot_path, n):
+    """读取布局缓存，文件不存在、格式不符或DOT文件已变化时返回None"""
+    path = layout_path_for(dot_path)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    head = LAYOUT_HEADER.size + STAMP.size
+    if len(data) != head + 16 * n:
+        return None
+    magic, version, count = LAYOUT_HEADER.unpack_from(data, 0)
+    if magic != LAYOUT_MAGIC or version != LAYOUT_VERSION or count != n:
+        return None
+    matches, _ = stamp_matches(STAMP.unpack_from(data, LAYOUT_HEADER.size), dot_path)
+    if not matches:
+        return None
+    xs = array('d')
+    xs.frombytes(data[head:head + 8 * n])
+    ys = array('d')
+    ys.frombytes(data[head + 8 * n:])
+    return GraphLayout(xs, ys)
+
+
+def save_layout(dot_path, layout):
+    data = (LAYOUT_HEADER.pack(LAYOUT_MAGIC, LAYOUT_VERSION, layout.node_count())
+            + STAMP.pack(*file_stamp(dot_path))
+            + layout.xs.tobytes() + layout.ys.tobytes())
+    write_cache(layout_path_for(dot_path), data)
+
+
+def load_or_compute_layout(model, dot_path=None):
+    """有DOT文件路径时先读缓存，没有缓存再计算并写入"""
+    n = model.node_count()
+    if dot_path and os.path.exists(dot_path):
+        layout = load_layout(dot_path, n)
+        if layout is not None:
+            return layout
+    layout = compute_layout(model)
+    if dot_path and os.path.exists(dot_path):
+        save_layout(dot_path, layout)
+    return layout
+
+
+class SpatialGrid:
+    """均匀网格空间索引：每个格子保存落在其中的节点编号"""
+
+    def __init__(self, xs, ys, cell):
+        self.cell = cell
+        self.buckets = {}
+        for i, (x, y) in enumerate(zip(xs, ys)):
+            key = (int(x // cell), int(y // cell))
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = array('i')
+            bucket.append(i)
+
+    def query(self, x0, y0, x1, y1):
+        """与矩形相交的格子里的全部节点编号（可能包含矩形外边缘附近的节点）"""
+        cell = self.cell
+        cx0, cx1 = int(x0 // cell), int(x1 // cell)
+        cy0, cy1 = int(y0 // cell), int(y1 // cell)
+        result = []
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.buckets):
+            # 矩形比已占用的格子还多，直接遍历已占用的格子
+            for (cx, cy), bucket in self.buckets.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    result.extend(bucket)
+            return result
+        buckets = self.buckets
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = buckets.get((cx, cy))
+                if bucket is not None:
+                    result.extend(bucket)
+        return result
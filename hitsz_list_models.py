@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+from PyQt5.QtCore import Qt, QObject, QTimer, QAbstractListModel, QModelIndex
+from PyQt5.QtWidgets import QListView
+
+# 各列表模型中节点ID（或照片路径）所在的角色
+NODE_ID_ROLE = Qt.UserRole
+
+# 重置后立即显示的行数（约一屏），其余行分批插入
+FIRST_BATCH_ROWS = 100
+# 每次 fetchMore 插入的行数
+BATCH_ROWS = 2000
+# 后台填充每个时间片最多占用的毫秒数，超过后把控制权交还事件循环
+SLICE_MS = 8
+# 列表视图每批布局的行数
+LAYOUT_BATCH_ROWS = 500
+
+
+def configure_large_list(view):
+    """可能有十万行以上的列表视图：行高一致，布局分批在事件循环中完成
+
+    QListView 默认在一次调用里布局全部行，每插入一批行又要重新布局，行数很多时会卡住界面。
+    """
+    view.setUniformItemSizes(True)
+    view.setLayoutMode(QListView.Batched)
+    view.setBatchSize(LAYOUT_BATCH_ROWS)
+
+
+class IncrementalListModel(QAbstractListModel):
+    """分批向视图暴露行的列表模型：重置后只有首屏的行，其余通过 fetchMore 逐批插入
+
+    子类实现 total_rows() 返回完整行数。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.loaded = 0
+
+    def total_rows(self):
+        raise NotImplementedError
+
+    def reset_loaded(self):
+        """在 beginResetModel/endResetModel 之间调用"""
+        self.loaded = min(self.total_rows(), FIRST_BATCH_ROWS)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.loaded
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded < self.total_rows()
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        self.load_until(min(self.total_rows(), self.loaded + BATCH_ROWS) - 1)
+
+    def load_until(self, row):
+        """保证第row行已经插入，例如跳转到还没加载的节点"""
+        end = min(row + 1, self.total_rows())
+        if end > self.loaded:
+            self.beginInsertRows(QModelIndex(), self.loaded, end - 1)
+            self.loaded = end
+            self.endInsertRows()
+
+    def row_index(self, row):
+        """第row行的索引，需要时先插入到这一行"""
+        self.load_until(row)
+        return self.index(row, 0)
+
+
+class IncrementalLoader(QObject):
+    """用零间隔定时器在事件循环空闲时依次填充模型，每个时间片不超过 SLICE_MS 毫秒
+
+    start() 新的一组模型或 cancel() 会停止正在进行的填充，已插入的行保留。
+    """
+
+    def __init__(self, parent=None, slice_ms=SLICE_MS):
+        super().__init__(parent)
+        self.slice_ms = slice_ms
+        self.models = []
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.step)
+
+    def start(self, *models):
+        self.cancel()
+        self.models = [model for model in models if model.canFetchMore(QModelIndex())]
+        if self.models:
+            self.timer.start()
+
+    def cancel(self):
+        self.timer.stop()
+        self.models = []
+
+    def is_active(self):
+        return bool(self.models)
+
+    def step(self):
+        deadline = time.perf_counter() + self.slice_ms / 1000
+        while self.models:
+            model = self.models[0]
+            while model.canFetchMore(QModelIndex()):
+                model.fetchMore(QModelIndex())
+                if time.perf_counter() >= deadline:
+                    return
+            self.models.pop(0)
+        self.timer.stop()
+
+
+class NodeListModel(IncrementalListModel):
+    """类别节点列表：直接引用 (节点ID, 标签) 序列，行在视图需要时才生成"""
+
+    def __init__(self, nodes, parent=None):
+        super().__init__(parent)
+        self.nodes = nodes
+        self.reset_loaded()
+
+    def set_nodes(self, nodes):
+        """整体替换节点序列，例如新的搜索结果"""
+        self.beginResetModel()
+        self.nodes = nodes
+        self.reset_loaded()
+        self.endResetModel()
+
+    def total_rows(self):
+        return len(self.nodes)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node_id, label = self.nodes[index.row()]
+        if role == Qt.DisplayRole:
+            return label
+        if role == NODE_ID_ROLE:
+            return node_id
+        return None
+
+    def node_id(self, row):
+        return self.nodes[row][0]
+
+    def refresh_row(self, row):
+        """某一行的数据在原序列中被替换后通知视图重绘，还没插入的行不用通知"""
+        if row < self.loaded:
+            index = self.index(row, 0)
+            self.dataChanged.emit(index, index)
+
+
+class RelationListModel(IncrementalListModel):
+    """入边或出边节点列表：只保存相邻节点ID，显示文本和颜色在绘制时从图中读取"""
+
+    def __init__(self, graph, color_of, incoming, parent=None):
+        super().__init__(parent)
+        self.graph = graph
+        # color_of(节点ID) 返回背景色QColor，没有类型时返回None
+        self.color_of = color_of
+        self.incoming = incoming
+        self.node_id = None
+        self.neighbors = []
+
+    def set_node(self, node_id):
+        """切换到另一个节点的相邻节点"""
+        self.beginResetModel()
+        self.node_id = node_id
+        if node_id is None:
+            self.neighbors = []
+        elif self.incoming:
+            self.neighbors = list(self.graph.predecessors(node_id))
+        else:
+            self.neighbors = list(self.graph.successors(node_id))
+        self.reset_loaded()
+        self.endResetModel()
+
+    def total_rows(self):
+        return len(self.neighbors)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        neighbor = self.neighbors[index.row()]
+        if role == Qt.DisplayRole:
+            neighbor_label = self.graph.nodes[neighbor].get('label', neighbor)
+            if self.incoming:
+                edge_data = self.graph.get_edge_data(neighbor, self.node_id)
+            else:
+                edge_data = self.graph.get_edge_data(self.node_id, neighbor)
+            edge_label = edge_data.get('label', '') if edge_data else ''
+            if edge_label:
+                return f"{neighbor_label} ({edge_label})"
+            return neighbor_label
+        if role == NODE_ID_ROLE:
+            return neighbor
+        if role == Qt.BackgroundRole:
+            return self.color_of(neighbor)
+        return None
+
+
+class PhotoPathModel(QAbstractListModel):
+    """照片路径列表，支持追加和删除"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.photo_paths = []
+
+    def set_paths(self, paths):
+        self.beginResetModel()
+        self.photo_paths = list(paths)
+        self.endResetModel()
+
+    def paths(self):
+        return list(self.photo_paths)
+
+    def append_path(self, path):
+        row = len(self.photo_paths)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.photo_paths.append(path)
+        self.endInsertRows()
+
+    def remove_rows(self, rows):
+        """删除给定行，从后往前删保证行号不失效"""
+        for row in sorted(set(rows), reverse=True):
+            if 0 <= row < len(self.photo_paths):
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.photo_paths[row]
+                self.endRemoveRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.photo_paths)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        path = self.photo_paths[index.row()]
+        if role in (Qt.DisplayRole, NODE_ID_ROLE):
+            return path
+        if role == Qt.ToolTipRole:
+            return "双击预览照片"
+        return None
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+
+# 节点类型的显示属性
+NODE_TYPE_STYLES = {
+    "时间": {"color": "lightgreen", "shape": "oval"},
+    "地点": {"color": "lightyellow", "shape": "hexagon"},
+    "机构/组织": {"color": "pink", "shape": "box"},
+    "人物": {"color": "lightcyan", "shape": "ellipse"},
+    "教育理念": {"color": "lightsalmon", "shape": "diamond"},
+    "课程": {"color": "lavender", "shape": "box"},
+    "产品/技术": {"color": "lightgray", "shape": "box"},
+    "事件": {"color": "white", "shape": "oval"},
+    "成就": {"color": "gold", "shape": "star"},
+    "启发/反思": {"color": "white", "fontcolor": "red", "shape": "plaintext"}
+}
+
+# 未在 NODE_TYPE_STYLES 中声明的类型使用的颜色
+DEFAULT_TYPE_COLOR = "white"
+
+# 默认分类规则，与hitsz_flow.dot的节点命名约定一致
+DEFAULT_RULES = [
+    {"prefix": "t", "type": "时间"},
+    {"prefix": "place_", "type": "地点"},
+    {"prefix": "org_", "type": "机构/组织"},
+    {"prefix": "person_", "type": "人物"},
+    {"prefix": "concept_", "type": "教育理念"},
+    {"prefix": "course_", "type": "课程"},
+    {"prefix": "tech_", "type": "产品/技术"},
+    {"prefix": "event_", "type": "事件"},
+    {"id": "achievement", "type": "成就"},
+    {"prefix": "lesson", "type": "启发/反思"},
+]
+
+# 可以作为分类依据的DOT属性
+ATTR_RULE_KEYS = ("shape", "fillcolor")
+
+# 前缀树中保存类型的键，不会与单个字符冲突
+TYPE_KEY = ""
+
+
+class NodeClassifier:
+    """按规则给节点分类，规则在构造时编译成查找表和前缀树
+
+    优先级：DOT中显式的 type= 属性 > 精确ID > 最长前缀 > shape/fillcolor 属性。
+    同一优先级内先出现的规则优先。
+    """
+
+    def __init__(self, rules=DEFAULT_RULES, styles=NODE_TYPE_STYLES):
+        self.styles = styles
+        self.ids = {}
+        self.prefix_trie = {}
+        # 属性名 -> {属性值: 类型}
+        self.attr_tables = {key: {} for key in ATTR_RULE_KEYS}
+        for rule in rules:
+            self.add_rule(rule)
+        self.attr_tables = {key: table for key, table in self.attr_tables.items() if table}
+
+    def add_rule(self, rule):
+        node_type = rule["type"]
+        if "id" in rule:
+            self.ids.setdefault(rule["id"], node_type)
+        elif "prefix" in rule:
+            node = self.prefix_trie
+            for ch in rule["prefix"]:
+                node = node.setdefault(ch, {})
+            node.setdefault(TYPE_KEY, node_type)
+        else:
+            for key in ATTR_RULE_KEYS:
+                if key in rule:
+                    self.attr_tables[key].setdefault(rule[key], node_type)
+                    break
+            else:
+                raise ValueError(f"无法识别的分类规则: {rule}")
+
+    def match_prefix(self, node_id):
+        """沿前缀树走，返回最长匹配前缀的类型"""
+        node = self.prefix_trie
+        node_type = node.get(TYPE_KEY)
+        for ch in node_id:
+            node = node.get(ch)
+            if node is None:
+                break
+            node_type = node.get(TYPE_KEY, node_type)
+        return node_type
+
+    def classify(self, node_id, attrs):
+        """返回节点类型，没有规则匹配时返回None"""
+        node_type = attrs.get("type")
+        if node_type:
+            return node_type
+        node_type = self.ids.get(node_id)
+        if node_type is not None:
+            return node_type
+        node_type = self.match_prefix(node_id)
+        if node_type is not None:
+            return node_type
+        for key, table in self.attr_tables.items():
+            value = attrs.get(key)
+            if value is not None and value in table:
+                return table[value]
+        return None
+
+
+def load_classifier(config_path):
+    """从JSON配置加载分类器：{"types": {类型: 显示属性}, "rules": [规则...]}
+
+    缺少的部分使用默认值。
+    """
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    styles = dict(NODE_TYPE_STYLES)
+    styles.update(config.get("types", {}))
+    return NodeClassifier(config.get("rules", DEFAULT_RULES), styles)
+
+
+# 默认分类器只编译一次
+DEFAULT_CLASSIFIER = NodeClassifier()
+
+
+class TypeIndex:
+    """单个图的类型索引，随图一起创建，重新加载图时不会累积旧数据"""
+
+    def __init__(self, styles=NODE_TYPE_STYLES):
+        self.styles = styles
+        # 类型 -> [(节点ID, 标签)]，按类型声明顺序
+        self.nodes = {name: [] for name in styles}
+        # 节点ID -> 类型，节点ID -> 在所属类型列表中的行号
+        self.node_type = {}
+        self.rows = {}
+
+    def add(self, node_id, label, node_type):
+        """记录节点类型，同一节点只记录一次"""
+        if node_id in self.node_type:
+            return
+        nodes = self.nodes.setdefault(node_type, [])
+        self.node_type[node_id] = node_type
+        self.rows[node_id] = len(nodes)
+        nodes.append((node_id, label))
+
+    def remove(self, node_id):
+        """删除节点，返回它原来的类型；同类型中其后节点的行号前移"""
+        node_type = self.node_type.pop(node_id, None)
+        if node_type is None:
+            return None
+        row = self.rows.pop(node_id)
+        nodes = self.nodes[node_type]
+        # 原地删除，引用这个列表的界面模型看到的是同一份数据
+        del nodes[row]
+        for i in range(row, len(nodes)):
+            self.rows[nodes[i][0]] = i
+        return node_type
+
+    def relabel(self, node_id, label):
+        """类型不变、只改标签，返回 (类型, 行号)"""
+        node_type = self.node_type[node_id]
+        row = self.rows[node_id]
+        self.nodes[node_type][row] = (node_id, label)
+        return node_type, row
+
+    def locate(self, node_id):
+        """节点所在的 (类型, 行号)，未分类时返回None"""
+        node_type = self.node_type.get(node_id)
+        if node_type is None:
+            return None
+        return node_type, self.rows[node_id]
+
+    def categories(self):
+        """有节点的类型"""
+        return [name for name, nodes in self.nodes.items() if nodes]
+
+    def color(self, node_type):
+        return self.styles.get(node_type, {}).get("color", DEFAULT_TYPE_COLOR)
@@ -2,14 +2,34 @@
 # -*- coding: utf-8 -*-
 
 import sys
-import json
 import os
-import re
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QLabel, QVBoxLayout, 
                             QHBoxLayout, QWidget, QPushButton, QScrollArea,
-                            QGridLayout, QFrame, QSplitter)
+                            QGridLayout, QFrame, QSplitter, QLineEdit, QListView)
 from PyQt5.QtGui import QPixmap, QFont
-from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtCore import Qt
+from hitsz_journal import AnnotationJournal
+from hitsz_graph import NeighborGraph, diff_models
+from hitsz_graph_cache import load_compiled, invalidate_compiled
+from hitsz_annotation_store import changed_nodes
+from hitsz_thumbnails import ThumbnailService
+from hitsz_assets import AssetManifest
+from hitsz_widget_pool import WidgetPool
+from hitsz_search import build_index
+from hitsz_list_models import NodeListModel, configure_large_list, NODE_ID_ROLE
+from hitsz_watch import FileWatcher
+from hitsz_instrument import instrumented, instrument_from_argv, install_debug_shortcut
+
+# 数据文件
+DOT_FILE = "hitsz_flow.dot"
+ANNOTATIONS_FILE = "node_annotations.json"
+# 照片目录，其中 _derived/ 下是 hitsz_assets.py 生成的缩小版本
+PHOTO_DIR = "photo_HITSZ"
+# 节点页中图片的最大显示宽度
+IMAGE_MAX_WIDTH = 600
+
+# 图片占位样式
+PLACEHOLDER_STYLE = "color: gray; background-color: #f0f0f0;"
 
 class NodeViewer(QMainWindow):
     def __init__(self):
@@ -18,6 +38,13 @@ class NodeViewer(QMainWindow):
         # 加载数据
         self.load_data()
         
+        # 图片在线程池中解码缩放，先显示占位，就绪后再替换
+        self.thumbnails = ThumbnailService(parent=self)
+        self.thumbnails.thumbnail_ready.connect(self.on_thumbnail_ready)
+        self.pending_images = {}
+        # 有缩小版本时按显示尺寸选用最小的合适档位，不再解码原图
+        self.assets = AssetManifest.load(PHOTO_DIR)
+        
         # 设置窗口
         self.setWindowTitle("哈工深节点查看器")
         self.setGeometry(100, 100, 1200, 700)
@@ -59,6 +86,23 @@ class NodeViewer(QMainWindow):
         self.text_layout = QVBoxLayout(self.text_widget)
         self.text_layout.setContentsMargins(0, 0, 0, 0)  # 减少边距
         
+        # 搜索框和结果列表
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜索节点标签或描述...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.on_search_text_changed)
+        self.text_layout.addWidget(self.search_edit)
+        
+        self.search_model = NodeListModel([], self)
+        self.search_results = QListView()
+        self.search_results.setModel(self.search_model)
+        self.search_results.setEditTriggers(QListView.NoEditTriggers)
+        configure_large_list(self.search_results)
+        self.search_results.setMaximumHeight(150)
+        self.search_results.clicked.connect(self.on_search_result_clicked)
+        self.search_results.hide()
+        self.text_layout.addWidget(self.search_results)
+        
         # 节点标题
         self.title_label = QLabel()
         self.title_label.setAlignment(Qt.AlignCenter)
@@ -161,68 +205,57 @@ class NodeViewer(QMainWindow):
             }
         """)
         
+        # 导航按钮和图片标签放在控件池中，切换节点时只重新绑定，不再销毁重建
+        self.forward_pool = WidgetPool(lambda i: self.create_nav_button(self.forward_layout))
+        self.backward_pool = WidgetPool(lambda i: self.create_nav_button(self.backward_layout))
+        self.image_pool = WidgetPool(self.create_image_label)
+        self.no_forward = self.create_empty_label("无前向节点", self.forward_layout)
+        self.no_backward = self.create_empty_label("无后向节点", self.backward_layout)
+        
         # 显示初始节点
-        self.current_node = list(self.nodes.keys())[0]  # 默认显示第一个节点
+        self.current_node = self.graph.first()  # 默认显示第一个节点
         self.display_node(self.current_node)
+        
+        # 监视图和标注文件（含另一个查看器写入的标注日志），变化时只刷新受影响的节点
+        self.annotations_journal = AnnotationJournal(ANNOTATIONS_FILE)
+        self.file_watcher = FileWatcher([DOT_FILE, ANNOTATIONS_FILE, self.annotations_journal.journal_path], parent=self)
+        self.file_watcher.files_changed.connect(self.on_files_changed)
     
     def load_data(self):
-        # 加载节点注释数据
-        with open("node_annotations.json", "r", encoding="utf-8") as f:
-            self.node_annotations = json.load(f)
+        # 加载节点注释数据（映射的标注存储 + 尚未折叠的编辑日志），描述显示时才解码
+        self.node_annotations = AnnotationJournal(ANNOTATIONS_FILE).load()
         
         # 加载图结构
-        self.nodes = {}
-        self.parse_dot_file("hitsz_flow.dot")
+        self.parse_dot_file(DOT_FILE)
+        
+        # 标签和描述的倒排索引在第一次搜索时才建立
+        self.search_index = None
+    
+    def get_search_index(self):
+        """建立索引需要全部描述，推迟到第一次搜索，启动时不解码描述"""
+        if self.search_index is None:
+            self.search_index = build_index(
+                (node_id, self.graph.label(node_id), self.node_annotations.description(node_id, ""))
+                for node_id in self.graph)
+        return self.search_index
     
     def parse_dot_file(self, filename):
         """解析DOT文件获取节点和边的信息"""
-        with open(filename, "r", encoding="utf-8") as f:
-            dot_content = f.read()
-        
-        # 提取节点定义
-        node_pattern = r'(\w+)\s+\[label="([^"]+)"'
-        for match in re.finditer(node_pattern, dot_content):
-            node_id = match.group(1)
-            node_label = match.group(2)
-            if node_id not in self.nodes:
-                self.nodes[node_id] = {
-                    "id": node_id,
-                    "label": node_label,
-                    "forward": [],
-                    "backward": []
-                }
-        
-        # 提取边定义
-        edge_pattern = r'(\w+)\s+->\s+(\w+)'
-        for match in re.finditer(edge_pattern, dot_content):
-            from_node = match.group(1)
-            to_node = match.group(2)
-            
-            # 确保节点存在
-            if from_node not in self.nodes:
-                self.nodes[from_node] = {"id": from_node, "label": from_node, "forward": [], "backward": []}
-            if to_node not in self.nodes:
-                self.nodes[to_node] = {"id": to_node, "label": to_node, "forward": [], "backward": []}
-            
-            # 添加前向和后向链接
-            if to_node not in self.nodes[from_node]["forward"]:
-                self.nodes[from_node]["forward"].append(to_node)
-            if from_node not in self.nodes[to_node]["backward"]:
-                self.nodes[to_node]["backward"].append(from_node)
+        model = load_compiled(filename).model
+        self.model = model
+        # 节点编号化，前向和后向链接存放在整型数组中，构建时用集合去重
+        self.graph = NeighborGraph.from_model(model)
     
+    @instrumented()
     def display_node(self, node_id):
         """显示指定节点的信息"""
         self.current_node = node_id
-        node_info = self.nodes[node_id]
         
         # 设置标题
-        self.title_label.setText(node_info["label"])
+        self.title_label.setText(self.graph.label(node_id))
         
-        # 设置描述
-        description = ""
-        if node_id in self.node_annotations:
-            if "description" in self.node_annotations[node_id]:
-                description = self.node_annotations[node_id]["description"]
+        # 设置描述，只解码这一个节点的描述
+        description = self.node_annotations.description(node_id, "")
         
         # 确保描述文本可见
         if not description:
@@ -232,75 +265,195 @@ class NodeViewer(QMainWindow):
         # 更新滚动区域以适应新内容
         self.desc_scroll.ensureWidgetVisible(self.desc_label)
         
-        # 清除现有图片
-        for i in reversed(range(self.image_layout.count())): 
-            self.image_layout.itemAt(i).widget().setParent(None)
+        # 尚未返回的缩略图不再需要，图片标签从控件池中复用
+        self.pending_images.clear()
         
         # 添加图片
-        photo_paths = []
-        if node_id in self.node_annotations and "photo_paths" in self.node_annotations[node_id]:
-            photo_paths = self.node_annotations[node_id]["photo_paths"]
-        
-        if photo_paths:
-            img_folder = "photo_HITSZ"
-            for i, img_path in enumerate(photo_paths):
-                full_path = os.path.join(img_folder, img_path)
-                if os.path.exists(full_path):
-                    img_label = QLabel()
-                    pixmap = QPixmap(full_path)
-                    
-                    # 增大图片显示尺寸
-                    max_width = 600  # 增加最大宽度
-                    if pixmap.width() > max_width:
-                        pixmap = pixmap.scaledToWidth(max_width, Qt.SmoothTransformation)
-                    
-                    img_label.setPixmap(pixmap)
-                    img_label.setAlignment(Qt.AlignCenter)
-                    
-                    row = i // 2
-                    col = i % 2
-                    self.image_layout.addWidget(img_label, row, col)
+        photo_paths = [path for path in self.get_photo_paths(node_id) if os.path.exists(path)]
+        img_labels = self.image_pool.acquire(len(photo_paths))
+        
+        for img_label, full_path in zip(img_labels, photo_paths):
+            source = self.assets.pick(full_path, IMAGE_MAX_WIDTH)
+            key, image = self.thumbnails.request(source, IMAGE_MAX_WIDTH)
+            if image is not None:
+                # 内存缓存命中，不需要重新解码
+                self.set_label_image(img_label, image)
+            else:
+                img_label.setText("图片加载中...")
+                img_label.setMinimumSize(200, 150)
+                if img_label.styleSheet() != PLACEHOLDER_STYLE:
+                    img_label.setStyleSheet(PLACEHOLDER_STYLE)
+                self.pending_images.setdefault(key, []).append(img_label)
         
         # 更新导航按钮
         self.update_navigation_buttons()
+        
+        # 预取前后相邻节点的图片，线性浏览时下一次点击可以直接命中缓存
+        self.prefetch_neighbors(node_id)
+    
+    def on_search_text_changed(self, text):
+        """每次按键重新查询，结果按得分排序"""
+        if not text.strip():
+            self.search_model.set_nodes([])
+            self.search_results.hide()
+            return
+        hits = self.get_search_index().search(text)
+        self.search_model.set_nodes([(node_id, self.graph.label(node_id)) for node_id, _ in hits])
+        self.search_results.show()
+    
+    def on_search_result_clicked(self, index):
+        self.display_node(index.data(NODE_ID_ROLE))
+    
+    def get_photo_paths(self, node_id):
+        """节点所有照片的完整路径"""
+        # 相邻节点预取也会调用，只取字段，不解码描述
+        photo_paths = self.node_annotations.fields(node_id).get("photo_paths", [])
+        return [os.path.join(PHOTO_DIR, img_path) for img_path in photo_paths]
+    
+    def prefetch_neighbors(self, node_id):
+        """后台预取前向、后向节点的图片，上一批未开始的预取会被取消"""
+        paths = []
+        for neighbor in self.graph.neighbors(node_id):
+            paths.extend(self.assets.pick(path, IMAGE_MAX_WIDTH) for path in self.get_photo_paths(neighbor))
+        self.thumbnails.prefetch(paths, IMAGE_MAX_WIDTH)
+    
+    @instrumented()
+    def on_thumbnail_ready(self, key, image):
+        """缩略图就绪后替换占位标签"""
+        for img_label in self.pending_images.pop(key, []):
+            if image.isNull():
+                img_label.setText("无法加载图片")
+                continue
+            self.set_label_image(img_label, image)
+    
+    def set_label_image(self, img_label, image):
+        """把图片显示到（可能是复用的）标签上，并清除占位样式"""
+        if img_label.styleSheet():
+            img_label.setStyleSheet("")
+        img_label.setMinimumSize(0, 0)
+        img_label.setPixmap(QPixmap.fromImage(image))
+    
+    def create_image_label(self, index):
+        """控件池工厂：图片标签按两列排布"""
+        img_label = QLabel()
+        img_label.setAlignment(Qt.AlignCenter)
+        self.image_layout.addWidget(img_label, index // 2, index % 2)
+        return img_label
+    
+    def create_nav_button(self, layout):
+        """控件池工厂：导航按钮只连接一次，点击时读取当前绑定的节点ID"""
+        btn = QPushButton()
+        btn.setMinimumHeight(40)
+        btn.clicked.connect(lambda _, b=btn: self.display_node(b.property("node_id")))
+        layout.addWidget(btn)
+        return btn
+    
+    def create_empty_label(self, text, layout):
+        """没有相邻节点时显示的提示"""
+        label = QLabel(text)
+        label.setAlignment(Qt.AlignCenter)
+        label.setStyleSheet("color: gray; padding: 10px;")
+        label.hide()
+        layout.addWidget(label)
+        return label
+    
+    def on_files_changed(self, paths):
+        """被监视的文件发生变化（已合并连续保存）"""
+        if os.path.abspath(DOT_FILE) in paths:
+            self.reload_graph()
+        if paths - {os.path.abspath(DOT_FILE)}:
+            self.reload_annotations()
+    
+    def reload_graph(self):
+        """DOT文件变化：只更新增删改过的节点及其相邻节点列表"""
+        invalidate_compiled(DOT_FILE)
+        try:
+            model = load_compiled(DOT_FILE).model
+            diff = diff_models(self.model, model)
+        except Exception as e:
+            # 文件可能还没写完，等下一次变化通知
+            print(f"重新加载图出错: {e}")
+            return
+        self.model = model
+        if diff.is_empty():
+            return
+        print(f"图已更新: {diff}")
+        
+        for node_id in diff.removed_nodes:
+            self.graph.remove(node_id)
+            if self.search_index is not None:
+                self.search_index.remove(node_id)
+        for node_id in diff.added_nodes + diff.changed_nodes:
+            label = model.label(model.index[node_id])
+            if node_id in self.graph:
+                self.graph.record(node_id).label = label
+            else:
+                self.graph.add(node_id, label)
+            if self.search_index is not None:
+                self.search_index.update(node_id, label, self.node_annotations.description(node_id, ""))
+        
+        # 边有变化的节点按新模型重建相邻列表，保持文件中的顺序并去重
+        touched = diff.touched_nodes()
+        for node_id in touched:
+            if node_id in self.graph:
+                self.graph.relink(node_id, model)
+        
+        if self.current_node not in self.graph:
+            self.display_node(self.graph.first())
+        else:
+            neighbors = set(self.graph.neighbors(self.current_node))
+            if self.current_node in touched or neighbors & set(diff.changed_nodes):
+                self.display_node(self.current_node)
+    
+    def reload_annotations(self):
+        """标注快照或日志变化：只刷新标注有变化的节点"""
+        try:
+            # 另一个查看器可能正在追加日志，不截断不完整的尾部
+            annotations = self.annotations_journal.load(truncate=False)
+        except (OSError, ValueError) as e:
+            print(f"重新加载标注信息出错: {e}")
+            return
+        
+        # 未改动的条目直接比较存储中的原始字节，不解码
+        changed = changed_nodes(self.node_annotations, annotations)
+        self.node_annotations = annotations
+        if self.search_index is not None:
+            for node_id in changed:
+                if node_id in self.graph:
+                    self.search_index.update(node_id, description=annotations.description(node_id, ""))
+        if self.current_node in changed:
+            self.display_node(self.current_node)
+    
+    def closeEvent(self, event):
+        """关闭窗口前等待后台缩略图任务结束"""
+        self.file_watcher.stop()
+        self.thumbnails.shutdown()
+        print(f"图片缓存统计: {self.thumbnails.memory_cache.stats()}")
+        event.accept()
     
     def update_navigation_buttons(self):
         """更新导航按钮"""
-        # 清除现有按钮
-        for i in reversed(range(self.forward_layout.count())): 
-            self.forward_layout.itemAt(i).widget().setParent(None)
-        
-        for i in reversed(range(self.backward_layout.count())): 
-            self.backward_layout.itemAt(i).widget().setParent(None)
-        
-        # 添加前向按钮
-        if self.nodes[self.current_node]["forward"]:
-            for next_node in self.nodes[self.current_node]["forward"]:
-                btn = QPushButton(self.nodes[next_node]["label"])
-                btn.setMinimumHeight(40)
-                btn.clicked.connect(lambda _, n=next_node: self.display_node(n))
-                self.forward_layout.addWidget(btn)
-        else:
-            no_forward = QLabel("无前向节点")
-            no_forward.setAlignment(Qt.AlignCenter)
-            no_forward.setStyleSheet("color: gray; padding: 10px;")
-            self.forward_layout.addWidget(no_forward)
-        
-        # 添加后向按钮
-        if self.nodes[self.current_node]["backward"]:
-            for prev_node in self.nodes[self.current_node]["backward"]:
-                btn = QPushButton(self.nodes[prev_node]["label"])
-                btn.setMinimumHeight(40)
-                btn.clicked.connect(lambda _, n=prev_node: self.display_node(n))
-                self.backward_layout.addWidget(btn)
-        else:
-            no_backward = QLabel("无后向节点")
-            no_backward.setAlignment(Qt.AlignCenter)
-            no_backward.setStyleSheet("color: gray; padding: 10px;")
-            self.backward_layout.addWidget(no_backward)
+        record = self.graph.record(self.current_node)
+        
+        # 前向按钮
+        self.bind_nav_buttons(self.forward_pool, record.forward, self.no_forward)
+        
+        # 后向按钮
+        self.bind_nav_buttons(self.backward_pool, record.backward, self.no_backward)
+    
+    def bind_nav_buttons(self, pool, neighbors, empty_label):
+        """把池中的按钮重新绑定到相邻节点编号，多余的按钮隐藏"""
+        buttons = pool.acquire(len(neighbors))
+        for btn, j in zip(buttons, neighbors):
+            btn.setText(self.graph.records[j].label)
+            btn.setProperty("node_id", self.graph.ids[j])
+        empty_label.setVisible(not neighbors)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    # --instrument：记录热点函数耗时和事件循环卡顿，Ctrl+Shift+D 查看
+    instrument_from_argv()
     viewer = NodeViewer()
+    install_debug_shortcut(viewer)
     viewer.show()
     sys.exit(app.exec_()) 
\ No newline at end of file
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""图上的路径查询：可达性、最短路径、不超过k步的全部简单路径
+
+    python hitsz_query.py hitsz_flow.dot concept_brown achievement --max-length 6
+
+预处理一次：强连通分量缩点得到DAG，分量较少时为每个分量保存可达位集，
+否则保存两组DFS区间标签（GRAIL），不可达的查询由区间直接否定，其余在DAG上剪枝搜索。
+"""
+
+import sys
+import argparse
+from array import array
+
+# 缩点后分量数不超过这个值时用位集，占用 分量数²/8 字节
+BITSET_LIMIT = 8192
+
+
+def neighbor_csr(model, incoming=False):
+    """图模型的CSR边数组 -> 节点级的 (偏移, 相邻节点编号)，重复边只保留第一条"""
+    if model.out_offsets is None:
+        model.build_adjacency()
+    if incoming:
+        offsets, edges, ends = model.in_offsets, model.in_edges, model.edge_src
+    else:
+        offsets, edges, ends = model.out_offsets, model.out_edges, model.edge_dst
+    node_offsets = array('i', [0])
+    targets = array('i')
+    for i in range(len(offsets) - 1):
+        start, end = offsets[i], offsets[i + 1]
+        if end - start == 1:
+            targets.append(ends[edges[start]])
+        elif end > start:
+            seen = set()
+            for e in edges[start:end]:
+                j = ends[e]
+                if j not in seen:
+                    seen.add(j)
+                    targets.append(j)
+        node_offsets.append(len(targets))
+    return node_offsets, targets
+
+
+def strongly_connected_components(n, offsets, targets):
+    """迭代版Tarjan算法，返回 (分量数, 节点->分量编号)
+
+    分量按完成顺序编号，下游分量先完成：u 能到达 v 时 comp[u] >= comp[v]。
+    """
+    index = array('i', [-1]) * n
+    low = array('i', bytes(4 * n))
+    comp = array('i', [-1]) * n
+    on_stack = bytearray(n)
+    stack = []
+    counter = 0
+    count = 0
+    for root in range(n):
+        if index[root] >= 0:
+            continue
+        # 调用栈保存 (节点, 下一条待看的边)
+        work = [(root, offsets[root])]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        while work:
+            v, e = work[-1]
+            end = offsets[v + 1]
+            pushed = False
+            while e < end:
+                w = targets[e]
+                e += 1
+                if index[w] < 0:
+                    work[-1] = (v, e)
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = 1
+                    work.append((w, offsets[w]))
+                    pushed = True
+                    break
+                if on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+            if pushed:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low[v] < low[parent]:
+                    low[parent] = low[v]
+            if low[v] == index[v]:
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = 0
+                    comp[w] = count
+                    if w == v:
+                        break
+                count += 1
+    return count, comp
+
+
+def condense(n, offsets, targets, count, comp):
+    """缩点后的DAG，分量之间的重复边只保留一条，返回CSR (偏移, 后继分量)"""
+    seen = set()
+    buckets = [[] for _ in range(count)]
+    for v in range(n):
+        cv = comp[v]
+        for e in range(offsets[v], offsets[v + 1]):
+            cw = comp[targets[e]]
+            if cw != cv:
+                key = cv * count + cw
+                if key not in seen:
+                    seen.add(key)
+                    buckets[cv].append(cw)
+    dag_offsets = array('i', [0])
+    dag_targets = array('i')
+    for succ in buckets:
+        dag_targets.extend(succ)
+        dag_offsets.append(len(dag_targets))
+    return dag_offsets, dag_targets
+
+
+def reach_bitsets(count, offsets, targets):
+    """每个分量可达分量的位集（Python整数），下游分量编号小，按编号递增一次算完"""
+    reach = [0] * count
+    for c in range(count):
+        bits = 1 << c
+        for e in range(offsets[c], offsets[c + 1]):
+            bits |= reach[targets[e]]
+        reach[c] = bits
+    return reach
+
+
+def interval_labels(count, offsets, targets, reverse):
+    """GRAIL区间标签：一次后序DFS的 (low, post)，c 能到达 d 时 d 的区间包含于 c 的区间"""
+    post = array('i', [-1]) * count
+    low = array('i', bytes(4 * count))
+    rank = 0
+    roots = range(count - 1, -1, -1) if not reverse else range(count)
+    for root in roots:
+        if post[root] >= 0:
+            continue
+        work = [(root, 0)]
+        while work:
+            c, k = work[-1]
+            start, end = offsets[c], offsets[c + 1]
+            degree = end - start
+            pushed = False
+            while k < degree:
+                d = targets[end - 1 - k] if reverse else targets[start + k]
+                k += 1
+                if post[d] < 0:
+                    work[-1] = (c, k)
+                    # 标记为已访问（-2），区间在完成时才确定
+                    post[d] = -2
+                    work.append((d, 0))
+                    pushed = True
+                    break
+            if pushed:
+                continue
+            work.pop()
+            smallest = rank
+            for e in range(start, end):
+                d = targets[e]
+                if low[d] < smallest:
+                    smallest = low[d]
+            low[c] = smallest
+            post[c] = rank
+            rank += 1
+    return low, post
+
+
+class GraphQuery:
+    """在图模型上回答路径查询，预处理结构在构造时建立，图变化后需要重新构造"""
+
+    def __init__(self, model):
+        self.model = model
+        self.n = model.node_count()
+        self.out_offsets, self.succ = neighbor_csr(model)
+        self.in_offsets, self.pred = neighbor_csr(model, incoming=True)
+        self.count, self.comp = strongly_connected_components(self.n, self.out_offsets, self.succ)
+        self.dag_offsets, self.dag_succ = condense(self.n, self.out_offsets, self.succ, self.count, self.comp)
+        if self.count <= BITSET_LIMIT:
+            self.bitsets = reach_bitsets(self.count, self.dag_offsets, self.dag_succ)
+            self.labels = None
+        else:
+            self.bitsets = None
+            self.labels = [interval_labels(self.count, self.dag_offsets, self.dag_succ, reverse)
+                           for reverse in (False, True)]
+
+    def node_index(self, node_id):
+        """节点ID -> 编号，不存在时抛出KeyError"""
+        return self.model.index[node_id]
+
+    def may_reach(self, c, d):
+        """区间标签判断：False 表示一定不可达"""
+        if c < d:
+            return False
+        for low, post in self.labels:
+            if not (low[c] <= low[d] and post[d] <= post[c]):
+                return False
+        return True
+
+    def quick_reachable(self, c, d):
+        """只查预处理结构：位集给出确定答案，区间标签只能否定"""
+        if c == d:
+            return True
+        if self.bitsets is not None:
+            return (self.bitsets[c] >> d) & 1 == 1
+        return self.may_reach(c, d)
+
+    def component_reachable(self, c, d):
+        if c == d or self.bitsets is not None:
+            return self.quick_reachable(c, d)
+        if not self.may_reach(c, d):
+            return False
+        # 区间无法否定时在DAG上搜索，只走区间仍可能包含目标的分量；
+        # 编号越接近目标的分量在拓扑序上越靠近它，先出栈
+        offsets, targets = self.dag_offsets, self.dag_succ
+        visited = {c}
+        stack = [c]
+        while stack:
+            x = stack.pop()
+            candidates = []
+            for e in range(offsets[x], offsets[x + 1]):
+                y = targets[e]
+                if y == d:
+                    return True
+                if y not in visited and self.may_reach(y, d):
+                    visited.add(y)
+                    candidates.append(y)
+            candidates.sort(reverse=True)
+            stack.extend(candidates)
+        return False
+
+    def reachable(self, source, target):
+        """source 是否有一条有向路径到 target"""
+        comp = self.comp
+        return self.component_reachable(comp[self.node_index(source)], comp[self.node_index(target)])
+
+    def shortest_path(self, source, target):
+        """边数最少的路径（节点ID列表），不可达时返回None；双向BFS，每次扩展较小的一侧"""
+        s = self.node_index(source)
+        t = self.node_index(target)
+        if s == t:
+            return [source]
+        if not self.component_reachable(self.comp[s], self.comp[t]):
+            return None
+        forward = {s: -1}
+        backward = {t: -1}
+        forward_frontier = [s]
+        backward_frontier = [t]
+        while forward_frontier and backward_frontier:
+            if len(forward_frontier) <= len(backward_frontier):
+                meet, forward_frontier = self._expand(forward_frontier, forward, backward,
+                                                      self.out_offsets, self.succ)
+            else:
+                meet, backward_frontier = self._expand(backward_frontier, backward, forward,
+                                                       self.in_offsets, self.pred)
+            if meet is not None:
+                path = []
+                x = meet
+                while x != -1:
+                    path.append(x)
+                    x = forward[x]
+                path.reverse()
+                x = backward[meet]
+                while x != -1:
+                    path.append(x)
+                    x = backward[x]
+                ids = self.model.ids
+                return [ids[i] for i in path]
+        return None
+
+    @staticmethod
+    def _expand(frontier, parents, other, offsets, targets):
+        """扩展一层，遇到另一侧已访问的节点时返回它"""
+        next_frontier = []
+        for v in frontier:
+            for e in range(offsets[v], offsets[v + 1]):
+                w = targets[e]
+                if w in parents:
+                    continue
+                parents[w] = v
+                if w in other:
+                    return w, next_frontier
+                next_frontier.append(w)
+        return None, next_frontier
+
+    def distances_to(self, t, max_length):
+        """反向BFS：不超过 max_length 步能到达 t 的节点及其步数"""
+        dist = {t: 0}
+        frontier = [t]
+        offsets, pred = self.in_offsets, self.pred
+        for step in range(1, max_length + 1):
+            next_frontier = []
+            for v in frontier:
+                for e in range(offsets[v], offsets[v + 1]):
+                    w = pred[e]
+                    if w not in dist:
+                        dist[w] = step
+                        next_frontier.append(w)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return dist
+
+    def simple_paths(self, source, target, max_length, limit=100):
+        """不超过 max_length 条边的全部简单路径，按找到的顺序最多返回 limit 条
+
+        只沿剩余步数内还能到达终点的节点扩展，路径数再多也不会走进死胡同。
+        """
+        s = self.node_index(source)
+        t = self.node_index(target)
+        # 步数上限内的反向BFS本身就能判断，这里只用预处理结构排除一定不可达的
+        if s == t or not self.quick_reachable(self.comp[s], self.comp[t]):
+            return []
+        dist = self.distances_to(t, max_length)
+        if dist.get(s, max_length + 1) > max_length:
+            return []
+        ids = self.model.ids
+        offsets, succ = self.out_offsets, self.succ
+        paths = []
+        path = [s]
+        on_path = {s}
+        # 每层保存 (节点, 下一条待看的边)
+        work = [(s, offsets[s])]
+        while work:
+            v, e = work[-1]
+            remaining = max_length - len(path)
+            end = offsets[v + 1]
+            pushed = False
+            while e < end:
+                w = succ[e]
+                e += 1
+                if w in on_path or dist.get(w, max_length + 1) > remaining:
+                    continue
+                if w == t:
+                    paths.append([ids[i] for i in path] + [target])
+                    if len(paths) >= limit:
+                        return paths
+                    continue
+                work[-1] = (v, e)
+                path.append(w)
+                on_path.add(w)
+                work.append((w, offsets[w]))
+                pushed = True
+                break
+            if not pushed:
+                work.pop()
+                on_path.discard(path.pop())
+        return paths
+
+    def edge_label(self, source, target):
+        """source -> target 的边标签，有多条时取第一条"""
+        d = self.node_index(target)
+        for j, label in self.model.successors(self.node_index(source)):
+            if j == d:
+                return label
+        return None
+
+
+def main():
+    from hitsz_graph_cache import load_compiled
+    parser = argparse.ArgumentParser(description="图路径查询")
+    parser.add_argument("dot", help="DOT文件")
+    parser.add_argument("source", help="起点节点ID")
+    parser.add_argument("target", help="终点节点ID")
+    parser.add_argument("--max-length", type=int, default=6, help="列出简单路径的最大步数")
+    parser.add_argument("--limit", type=int, default=20, help="最多列出的简单路径数")
+    args = parser.parse_args()
+
+    query = GraphQuery(load_compiled(args.dot).model)
+    try:
+        if not query.reachable(args.source, args.target):
+            print(f"{args.source} 无法到达 {args.target}")
+            return
+        path = query.shortest_path(args.source, args.target)
+        print(f"最短路径（{len(path) - 1} 步）: {' -> '.join(path)}")
+        for path in query.simple_paths(args.source, args.target, args.max_length, args.limit):
+            print(f"  {' -> '.join(path)}")
+    except KeyError as e:
+        print(f"找不到节点: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import heapq
+import time
+from collections import defaultdict
+
+# 标签命中的权重高于描述
+LABEL_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.0
+# 只包含全部n元组、但不是连续子串时的分数
+SCATTERED_SCORE = 0.2
+# 没有文档包含全部n元组时，至少命中这个比例的n元组才作为近似结果，得分按比例低于 SCATTERED_SCORE
+PARTIAL_MIN_RATIO = 0.5
+# 每次按键的默认打分时间预算（毫秒），每打分这么多个候选检查一次
+DEFAULT_BUDGET_MS = 30
+BUDGET_CHECK_INTERVAL = 256
+
+
+def normalize(text):
+    """统一小写并去掉空白"""
+    return "".join(text.lower().split())
+
+
+def ngrams(text):
+    """建索引用的字符单字和二元组；中文没有分词，按字符切分"""
+    text = normalize(text)
+    grams = set(text)
+    for i in range(len(text) - 1):
+        grams.add(text[i:i + 2])
+    return grams
+
+
+def label_prefixes(label):
+    """标签的第一个字和前两个字"""
+    return {label[:1], label[:2]} if label else set()
+
+
+def query_grams(query):
+    """查询用的n元组：两个字以上只用二元组，单字查询用单字"""
+    if len(query) < 2:
+        return {query} if query else set()
+    return {query[i:i + 2] for i in range(len(query) - 1)}
+
+
+def reindex(postings, doc, old, new):
+    """把文档从旧n元组的倒排表移到新n元组的倒排表"""
+    for gram in old - new:
+        posting = postings[gram]
+        posting.discard(doc)
+        if not posting:
+            del postings[gram]
+    for gram in new - old:
+        postings[gram].add(doc)
+
+
+def intersect(postings, grams, start=None):
+    """求包含全部n元组的文档集合，从最短的倒排表开始
+
+    只有一个n元组时直接返回倒排表本身，调用方不能修改返回的集合。
+    """
+    lists = []
+    for gram in grams:
+        posting = postings.get(gram)
+        if posting is None:
+            return set()
+        lists.append(posting)
+    lists.sort(key=len)
+    if start is None:
+        result = lists[0]
+        lists = lists[1:]
+    else:
+        result = start
+    for posting in lists:
+        result = result & posting
+        if not result:
+            break
+    return result
+
+
+class SearchIndex:
+    """节点标签和描述的倒排索引，支持增量更新"""
+
+    def __init__(self):
+        # n元组 -> 文档编号集合；标签单独再建一份，用于优先给标签命中打分
+        self.postings = defaultdict(set)
+        self.label_postings = defaultdict(set)
+        # 标签的第一个字和前两个字 -> 文档编号集合
+        self.label_prefixes = defaultdict(set)
+        self.docs = {}
+        self.doc_ids = []
+        self.labels = []
+        self.descriptions = []
+        # 索引变化后，上一次查询的候选集不能再复用
+        self.version = 0
+        self.last_query = None
+        self.last_candidates = None
+        self.last_version = -1
+        self.truncated = False
+
+    def __len__(self):
+        return len(self.docs)
+
+    def __contains__(self, node_id):
+        return node_id in self.docs
+
+    def update(self, node_id, label=None, description=None):
+        """新增或更新一个节点；为None的字段保持不变
+
+        不保存每个文档的n元组，旧的n元组从保存的文本重新计算。
+        """
+        doc = self.docs.get(node_id)
+        is_new = doc is None
+        if is_new:
+            doc = len(self.doc_ids)
+            self.docs[node_id] = doc
+            self.doc_ids.append(node_id)
+            self.labels.append("")
+            self.descriptions.append("")
+        old_label = self.labels[doc]
+        old_description = self.descriptions[doc]
+        new_label = old_label if label is None else normalize(label)
+        new_description = old_description if description is None else normalize(description)
+        if not is_new and new_label == old_label and new_description == old_description:
+            return
+
+        old_label_grams = ngrams(old_label)
+        new_label_grams = ngrams(new_label)
+        reindex(self.postings, doc, old_label_grams | ngrams(old_description),
+                new_label_grams | ngrams(new_description))
+        if new_label != old_label:
+            reindex(self.label_postings, doc, old_label_grams, new_label_grams)
+            reindex(self.label_prefixes, doc, label_prefixes(old_label), label_prefixes(new_label))
+        self.labels[doc] = new_label
+        self.descriptions[doc] = new_description
+        self.version += 1
+
+    def remove(self, node_id):
+        """删除节点，编号空出不再复用"""
+        doc = self.docs.pop(node_id, None)
+        if doc is None:
+            return
+        label = self.labels[doc]
+        label_grams = ngrams(label)
+        reindex(self.postings, doc, label_grams | ngrams(self.descriptions[doc]), set())
+        reindex(self.label_postings, doc, label_grams, set())
+        reindex(self.label_prefixes, doc, label_prefixes(label), set())
+        self.doc_ids[doc] = None
+        self.labels[doc] = ""
+        self.descriptions[doc] = ""
+        self.version += 1
+
+    def candidates(self, query, grams):
+        """包含全部查询n元组的文档；查询是上一次的延长时在上次结果里筛选"""
+        if (self.last_candidates is not None and self.last_version == self.version
+                and self.last_query and query.startswith(self.last_query)):
+            return intersect(self.postings, grams, self.last_candidates)
+        return intersect(self.postings, grams)
+
+    def score(self, doc, query):
+        label = self.labels[doc]
+        score = 0.0
+        pos = label.find(query)
+        if pos >= 0:
+            score += LABEL_WEIGHT
+            if pos == 0:
+                score += LABEL_WEIGHT
+                if len(label) == len(query):
+                    score += LABEL_WEIGHT
+        if query in self.descriptions[doc]:
+            score += DESCRIPTION_WEIGHT
+        return score or SCATTERED_SCORE
+
+    def search(self, query, limit=50, budget_ms=DEFAULT_BUDGET_MS):
+        """返回按得分排序的 [(节点ID, 得分)]
+
+        先取包含全部n元组的文档，标签命中优先；没有时退化为按命中n元组比例排序（至少命中一半）。
+        超过 budget_ms 即停止打分（为None时不限时），返回已打分部分的结果并设置 truncated。
+        """
+        query = normalize(query)
+        self.truncated = False
+        grams = query_grams(query)
+        if not grams:
+            return []
+        deadline = time.perf_counter() + budget_ms / 1000 if budget_ms else None
+
+        matched = self.candidates(query, grams)
+        self.last_query = query
+        self.last_candidates = matched
+        self.last_version = self.version
+
+        scored = []
+        if matched:
+            # 依次给标签前缀命中、标签命中、其余文档打分。某一层之后的文档得分
+            # 都低于该层的下限，下限以上的结果已经够数时后面各层不必再打分
+            label_docs = intersect(self.label_postings, grams) & matched
+            prefix_docs = self.label_prefixes.get(query[:2], set()) & label_docs
+            tiers = ((lambda: prefix_docs, 2 * LABEL_WEIGHT),
+                     (lambda: label_docs - prefix_docs, LABEL_WEIGHT),
+                     (lambda: matched - label_docs, 0))
+            count = 0
+            for docs, floor in tiers:
+                for doc in docs():
+                    scored.append((self.score(doc, query), -doc))
+                    count += 1
+                    if deadline and count % BUDGET_CHECK_INTERVAL == 0 and time.perf_counter() > deadline:
+                        self.truncated = True
+                        break
+                if self.truncated or sum(score >= floor for score, _ in scored) >= limit:
+                    break
+        elif len(grams) > 1:
+            scored = self.partial_matches(grams, deadline)
+        best = heapq.nlargest(limit, scored)
+        return [(self.doc_ids[-doc], score) for score, doc in best]
+
+    def partial_matches(self, grams, deadline):
+        """按命中n元组的比例给文档打分，用于查询中有错字、没有文档包含全部n元组的情况"""
+        hits = defaultdict(int)
+        for gram in grams:
+            for doc in self.postings.get(gram, ()):
+                hits[doc] += 1
+            if deadline and time.perf_counter() > deadline:
+                self.truncated = True
+                break
+        needed = PARTIAL_MIN_RATIO * len(grams)
+        return [(SCATTERED_SCORE * count / len(grams), -doc) for doc, count in hits.items() if count >= needed]
+
+
+def build_index(entries):
+    """从 (节点ID, 标签, 描述) 序列建立索引"""
+    index = SearchIndex()
+    for node_id, label, description in entries:
+        index.update(node_id, label, description or "")
+    return index
@@ -0,0 +1,637 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""本地HTTP服务：按节点提供图和标注数据、分档位缩略图，网页前端和多个展台可以共用一个进程
+
+    python hitsz_server.py --port 8765 --annotations node_annotations2.json
+
+接口（只支持 GET 和 HEAD）：
+    /api/nodes                   标注中的节点（按文件顺序）和图中其余节点 {"nodes": [{"id", "label", "annotated"}]}
+    /api/nodes/<id>              单个节点：标签、是否在图中，以及标注字段
+    /api/nodes/<id>/neighbors    {"successors": [...], "predecessors": [...]}，每项 {"id", "label", "edge"}
+    /thumb/<宽度>/<照片路径>      照片目录下的照片，缩小到不小于该宽度的最小档位
+    其他路径                     网页根目录下的网页、样式、脚本和图片（moban.html、照片原图等）
+
+只提供 STATIC_EXTENSIONS 中的文件类型，源码、标注和DOT文件只能通过上面的接口读取；
+响应不带跨域头，其他网站的页面读不到本地数据。
+
+响应带 ETag，支持 If-None-Match、gzip 和单段 Range；生成的响应放在内存缓存中，
+DOT文件、标注快照或日志、照片清单变化后整体失效。
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import errno
+import asyncio
+import hashlib
+import argparse
+import mimetypes
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlsplit
+from PyQt5.QtGui import QImageReader
+from PyQt5.QtCore import QBuffer, QIODevice
+from hitsz_graph_cache import load_compiled, invalidate_compiled
+from hitsz_journal import AnnotationJournal
+from hitsz_assets import AssetManifest, DEFAULT_TIERS, manifest_path, is_opaque
+from hitsz_thumbnails import decode_scaled
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_DOT = os.path.join(BASE_DIR, "hitsz_flow.dot")
+# 网页前端（moban.js）使用的标注
+DEFAULT_ANNOTATIONS = os.path.join(BASE_DIR, "node_annotations2.json")
+DEFAULT_PHOTOS = os.path.join(BASE_DIR, "picture")
+DEFAULT_CACHE_MB = 64
+# 缩略图宽度档位：列表小图加上 hitsz_assets 的档位，请求的宽度向上取到档位
+THUMB_TIERS = [160] + DEFAULT_TIERS
+THUMB_QUALITY = 85
+# 超过这个大小的静态文件不进内存缓存，每次从磁盘读取需要的部分
+MAX_CACHED_BODY = 4 << 20
+# 小于这个大小的响应不压缩
+GZIP_MIN_SIZE = 512
+GZIP_TYPES = ("application/json", "application/javascript", "text/", "image/svg+xml")
+# 作为静态文件提供的扩展名；网页根目录通常是整个程序目录，其他文件一律不提供
+STATIC_EXTENSIONS = {".html", ".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".ico"}
+# 两次检查数据文件是否变化的最短间隔（秒）
+RELOAD_INTERVAL = 1.0
+MAX_HEADER_BYTES = 64 * 1024
+KEEP_ALIVE_TIMEOUT = 30
+JSON_TYPE = "application/json; charset=utf-8"
+REASONS = {
+    200: "OK", 206: "Partial Content", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 416: "Range Not Satisfiable", 500: "Internal Server Error",
+}
+
+
+def json_body(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def is_compressible(content_type, length):
+    return length >= GZIP_MIN_SIZE and content_type.startswith(GZIP_TYPES)
+
+
+class Response:
+    """可缓存的完整响应；大文件只记录路径，正文按需从磁盘读取"""
+
+    def __init__(self, body, content_type, path=None, length=None, etag=None):
+        self.body = body
+        self.content_type = content_type
+        self.path = path
+        self.length = len(body) if body is not None else length
+        self.etag = etag or '"%s"' % hashlib.sha1(body).hexdigest()[:20]
+        self.gzipped = None
+        if body is not None and is_compressible(content_type, self.length):
+            self.gzipped = gzip.compress(body, 6)
+
+    @classmethod
+    def for_file(cls, path, content_type):
+        st = os.stat(path)
+        if st.st_size <= MAX_CACHED_BODY:
+            with open(path, 'rb') as f:
+                return cls(f.read(), content_type)
+        return cls(None, content_type, path, st.st_size, f'"{st.st_mtime_ns:x}-{st.st_size:x}"')
+
+    def gzip_etag(self):
+        # 压缩后是另一种表示，强ETag不能相同
+        return self.etag[:-1] + '-gz"'
+
+    def cost(self):
+        return (self.length if self.body is not None else 0) + len(self.gzipped or b"")
+
+    def read(self, start, end):
+        """正文的 [start, end) 部分，在线程池中调用"""
+        if self.body is not None:
+            return self.body[start:end]
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            return f.read(end - start)
+
+
+class ResponseCache:
+    """按字节预算淘汰最久未用的响应"""
+
+    def __init__(self, budget_bytes):
+        self.budget = budget_bytes
+        self.entries = OrderedDict()
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        response = self.entries.get(key)
+        if response is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return response
+
+    def put(self, key, response):
+        cost = response.cost()
+        if cost > self.budget:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.used -= old.cost()
+        self.entries[key] = response
+        self.used += cost
+        while self.used > self.budget:
+            _, evicted = self.entries.popitem(last=False)
+            self.used -= evicted.cost()
+
+    def clear(self):
+        self.entries.clear()
+        self.used = 0
+
+
+class GraphData:
+    """当前版本的图、标注和照片清单
+
+    查询在事件循环线程中进行；文件变化时在线程池中重新加载，加载好后再在事件循环线程中整体替换，
+    同一个请求不会看到一半旧一半新的数据。
+    """
+
+    def __init__(self, dot_path, annotations_path, photos_dir):
+        self.dot_path = dot_path
+        self.photos_dir = os.path.abspath(photos_dir)
+        self.photos_root = os.path.realpath(photos_dir)
+        self.journal = AnnotationJournal(annotations_path)
+        self.model = None
+        self.annotations = {}
+        self.assets = AssetManifest(self.photos_dir)
+        self.stamps = None
+        self.checked = 0.0
+        self.refresh()
+
+    def file_stamps(self):
+        stamps = []
+        for path in (self.dot_path, self.journal.snapshot_path, self.journal.journal_path,
+                     manifest_path(self.photos_dir)):
+            try:
+                st = os.stat(path)
+                stamps.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamps.append(None)
+        return stamps
+
+    def due(self):
+        """距上次检查超过 RELOAD_INTERVAL，需要再比较一次文件时间戳"""
+        now = time.monotonic()
+        if now - self.checked < RELOAD_INTERVAL:
+            return False
+        self.checked = now
+        return True
+
+    def load_changes(self):
+        """比较文件时间戳，重新加载变化的部分，返回 {属性名: 新值}，没有变化时返回None
+
+        解析DOT文件可能很慢，服务运行后在线程池中调用，结果交给 apply 在事件循环线程中替换。
+        """
+        stamps = self.file_stamps()
+        if stamps == self.stamps:
+            return None
+        # 启动时加载失败直接抛出，由调用方报告；运行中重新加载失败时保留旧数据
+        starting = self.stamps is None
+        old = self.stamps or [None] * len(stamps)
+        changes = {"stamps": stamps}
+        if stamps[0] != old[0]:
+            try:
+                invalidate_compiled(self.dot_path)
+                changes["model"] = load_compiled(self.dot_path).model if stamps[0] else None
+            except (OSError, ValueError) as e:
+                if starting:
+                    raise
+                print(f"加载图出错: {e}")
+        if stamps[1:3] != old[1:3]:
+            try:
+                # 查看器可能正在追加日志，这里只读不截断
+                changes["annotations"] = self.journal.load(truncate=False)
+            except (OSError, ValueError) as e:
+                if starting:
+                    raise
+                print(f"加载标注出错: {e}")
+        if stamps[3] != old[3]:
+            changes["assets"] = AssetManifest.load(self.photos_dir)
+        return changes
+
+    def apply(self, changes):
+        for name, value in changes.items():
+            setattr(self, name, value)
+
+    def refresh(self):
+        """同步检查并重新加载，有变化时返回True；只在服务启动前使用"""
+        changes = self.load_changes()
+        if changes is None:
+            return False
+        self.apply(changes)
+        return True
+
+    def node_index(self, node_id):
+        return self.model.index.get(node_id) if self.model is not None else None
+
+    def node_label(self, node_id):
+        i = self.node_index(node_id)
+        return self.model.label(i) if i is not None else node_id
+
+    def node_list(self):
+        nodes = [{"id": node_id, "label": self.node_label(node_id), "annotated": True}
+                 for node_id in self.annotations]
+        if self.model is not None:
+            for i, node_id in enumerate(self.model.ids):
+                if node_id not in self.annotations:
+                    nodes.append({"id": node_id, "label": self.model.label(i), "annotated": False})
+        return {"nodes": nodes}
+
+    def node(self, node_id):
+        i = self.node_index(node_id)
+        annotation = self.annotations.get(node_id)
+        if i is None and annotation is None:
+            return None
+        data = {"id": node_id, "label": self.node_label(node_id), "in_graph": i is not None}
+        if annotation:
+            data.update(annotation)
+        return data
+
+    def neighbors(self, node_id):
+        i = self.node_index(node_id)
+        if i is None:
+            return None
+        ids = self.model.ids
+        return {
+            "successors": [{"id": ids[j], "label": self.model.label(j), "edge": label}
+                           for j, label in self.model.successors(i)],
+            "predecessors": [{"id": ids[j], "label": self.model.label(j), "edge": label}
+                             for j, label in self.model.predecessors(i)],
+        }
+
+    def photo_path(self, relative):
+        """照片目录下的绝对路径，越出照片目录或文件不存在时返回None"""
+        path = os.path.realpath(os.path.join(self.photos_root, relative))
+        if not path.startswith(self.photos_root + os.sep) or not os.path.isfile(path):
+            return None
+        return path
+
+
+def snap_width(width):
+    """向上取到缩略图档位，超过最大档位时取最大档位"""
+    for tier in THUMB_TIERS:
+        if width <= tier:
+            return tier
+    return THUMB_TIERS[-1]
+
+
+def render_thumbnail(assets, path, width):
+    """在线程池中生成缩略图响应：优先使用 hitsz_assets 生成的档位文件，否则解码缩小后编码"""
+    source = assets.pick(path, width)
+    if source != path:
+        return Response.for_file(source, mimetypes.guess_type(source)[0] or "application/octet-stream")
+    size = QImageReader(path).size()
+    if size.isValid() and size.width() <= width:
+        # 原图不比档位宽，直接返回原文件
+        return Response.for_file(path, mimetypes.guess_type(path)[0] or "application/octet-stream")
+    image = decode_scaled(path, width, 0)
+    if image.isNull():
+        return None
+    buffer = QBuffer()
+    buffer.open(QIODevice.WriteOnly)
+    if not is_opaque(image):
+        image.save(buffer, "PNG")
+        content_type = "image/png"
+    else:
+        image.save(buffer, "JPG", THUMB_QUALITY)
+        content_type = "image/jpeg"
+    return Response(bytes(buffer.data()), content_type)
+
+
+def parse_request(head):
+    """解析请求行和请求头，返回 (方法, 目标, 版本, 小写请求头)，格式不对时返回None"""
+    lines = head.decode('latin-1').split("\r\n")
+    parts = lines[0].split()
+    if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+        return None
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(":")
+        if not sep:
+            return None
+        headers[name.strip().lower()] = value.strip()
+    return parts[0], parts[1], parts[2], headers
+
+
+def accepts_gzip(value):
+    for token in value.split(","):
+        name, _, params = token.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def etag_matches(value, etags):
+    if value.strip() == "*":
+        return True
+    # If-None-Match 使用弱比较
+    candidates = [tag.strip().removeprefix("W/") for tag in value.split(",")]
+    return any(tag in candidates for tag in etags)
+
+
+def parse_range(value, length):
+    """单段字节范围，返回 [start, end)；不是 bytes 或多段时返回None（按完整响应处理），无法满足时返回False"""
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) + 1 if last else length
+        else:
+            # bytes=-N 表示最后N个字节
+            start = max(0, length - int(last))
+            end = length
+    except ValueError:
+        return None
+    end = min(end, length)
+    if start >= end:
+        return False
+    return start, end
+
+
+class HITSZServer:
+    def __init__(self, data, root=BASE_DIR, cache_mb=DEFAULT_CACHE_MB, workers=4):
+        self.data = data
+        self.root = os.path.realpath(root)
+        self.cache = ResponseCache(cache_mb << 20)
+        # 解码缩略图、读文件、压缩大文件放到线程池，不阻塞事件循环
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        # 正在生成的响应，多个展台同时请求同一张缩略图时只生成一次
+        self.pending = {}
+        # 正在进行的数据刷新任务，同一时间只有一次
+        self.refreshing = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                        ConnectionError):
+                    break
+                request = parse_request(head)
+                if request is None:
+                    await self.send(writer, 400, {}, b"", False)
+                    break
+                method, target, version, headers = request
+                # GET 请求一般没有正文，有的话读掉，保持连接上的请求边界
+                length = headers.get("content-length", "0")
+                if length.isdigit() and int(length):
+                    await reader.readexactly(int(length))
+                if not await self.respond(method, target, version, headers, writer):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, method, target, version, headers, writer):
+        """处理一个请求，返回是否保持连接"""
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        if method not in ("GET", "HEAD"):
+            await self.send(writer, 405, {"Allow": "GET, HEAD"}, b"", keep_alive)
+            return keep_alive
+        try:
+            response = await self.lookup(urlsplit(target).path)
+        except Exception as e:
+            print(f"处理请求 {target} 出错: {e}")
+            await self.send(writer, 500, {}, b"", keep_alive)
+            return keep_alive
+        if response is None:
+            await self.send(writer, 404, {"Content-Type": JSON_TYPE}, json_body({"error": "not found"}), keep_alive,
+                            method == "HEAD")
+            return keep_alive
+
+        fields = {"Content-Type": response.content_type, "Cache-Control": "no-cache", "Accept-Ranges": "bytes"}
+        if response.gzipped is not None:
+            fields["Vary"] = "Accept-Encoding"
+        use_gzip = response.gzipped is not None and accepts_gzip(headers.get("accept-encoding", ""))
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None and etag_matches(if_none_match, (response.etag, response.gzip_etag())):
+            fields["ETag"] = response.gzip_etag() if use_gzip else response.etag
+            del fields["Content-Type"]
+            await self.send(writer, 304, fields, b"", keep_alive, True)
+            return keep_alive
+
+        span = None
+        if "range" in headers:
+            # If-Range 与当前版本不一致时忽略 Range，返回完整响应
+            if_range = headers.get("if-range")
+            if if_range is None or if_range == response.etag:
+                span = parse_range(headers["range"], response.length)
+            if span is False:
+                fields["Content-Range"] = f"bytes */{response.length}"
+                await self.send(writer, 416, fields, b"", keep_alive)
+                return keep_alive
+        fields["ETag"] = response.etag
+        if span is not None:
+            # 范围请求总是按未压缩的表示计算偏移
+            start, end = span
+            fields["Content-Range"] = f"bytes {start}-{end - 1}/{response.length}"
+            body = b"" if method == "HEAD" else await self.read(response, start, end)
+            await self.send(writer, 206, fields, body, keep_alive, method == "HEAD", end - start)
+        elif use_gzip:
+            fields["ETag"] = response.gzip_etag()
+            fields["Content-Encoding"] = "gzip"
+            await self.send(writer, 200, fields, response.gzipped, keep_alive, method == "HEAD")
+        else:
+            body = b"" if method == "HEAD" else await self.read(response, 0, response.length)
+            await self.send(writer, 200, fields, body, keep_alive, method == "HEAD", response.length)
+        return keep_alive
+
+    async def read(self, response, start, end):
+        if response.body is not None:
+            return response.body[start:end]
+        return await asyncio.get_running_loop().run_in_executor(self.pool, response.read, start, end)
+
+    async def send(self, writer, status, fields, body, keep_alive, head_only=False, length=None):
+        lines = [f"HTTP/1.1 {status} {REASONS[status]}"]
+        fields = dict(fields)
+        fields["Connection"] = "keep-alive" if keep_alive else "close"
+        if status != 304:
+            fields["Content-Length"] = str(len(body) if length is None else length)
+        lines.extend(f"{name}: {value}" for name, value in fields.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+        if body and not head_only:
+            writer.write(body)
+        await writer.drain()
+
+    async def lookup(self, path):
+        """先查内存缓存，没有时生成；数据文件变化后清空缓存"""
+        self.schedule_refresh()
+        response = self.cache.get(path)
+        if response is not None:
+            return response
+        pending = self.pending.get(path)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[path] = future
+        try:
+            response = await self.build(path)
+            if response is not None:
+                self.cache.put(path, response)
+            future.set_result(response)
+        except Exception as e:
+            future.set_exception(e)
+            # 没有其他请求在等待时也要取走异常，避免未取回异常的警告
+            future.exception()
+            raise
+        finally:
+            del self.pending[path]
+        return response
+
+    def schedule_refresh(self):
+        """到了检查间隔且没有正在进行的刷新时，在后台检查数据文件；请求不等待，继续使用当前数据"""
+        if self.refreshing is None and self.data.due():
+            self.refreshing = asyncio.get_running_loop().create_task(self.refresh_data())
+
+    async def refresh_data(self):
+        try:
+            changes = await asyncio.get_running_loop().run_in_executor(self.pool, self.data.load_changes)
+            if changes is not None:
+                self.data.apply(changes)
+                self.cache.clear()
+        except Exception as e:
+            print(f"重新加载数据出错: {e}")
+        finally:
+            self.refreshing = None
+
+    async def build(self, path):
+        loop = asyncio.get_running_loop()
+        if path == "/api/nodes":
+            return Response(json_body(self.data.node_list()), JSON_TYPE)
+        if path.startswith("/api/nodes/"):
+            # 节点ID先按原样切分再解码，ID中的 %2F 不会被当成路径分隔符
+            rest = path[len("/api/nodes/"):]
+            if rest.endswith("/neighbors"):
+                result = self.data.neighbors(unquote(rest[:-len("/neighbors")]))
+            else:
+                result = self.data.node(unquote(rest))
+            return Response(json_body(result), JSON_TYPE) if result is not None else None
+        if path.startswith("/api/"):
+            return None
+        if path.startswith("/thumb/"):
+            width, _, relative = path[len("/thumb/"):].partition("/")
+            if not width.isdigit():
+                return None
+            photo = self.data.photo_path(unquote(relative))
+            if photo is None:
+                return None
+            return await loop.run_in_executor(self.pool, render_thumbnail, self.data.assets, photo,
+                                              snap_width(int(width)))
+        return await loop.run_in_executor(self.pool, self.static_file, unquote(path))
+
+    def static_file(self, path):
+        """网页根目录下允许的类型的文件，隐藏文件和越出根目录的路径一律不提供"""
+        parts = [part for part in path.split("/") if part]
+        if not parts:
+            parts = ["moban.html"]
+        if any(part.startswith(".") for part in parts):
+            return None
+        if os.path.splitext(parts[-1])[1].lower() not in STATIC_EXTENSIONS:
+            return None
+        full = os.path.realpath(os.path.join(self.root, *parts))
+        if not full.startswith(self.root + os.sep) or not os.path.isfile(full):
+            return None
+        content_type = mimetypes.guess_type(full)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type in ("application/javascript", "application/json"):
+            content_type += "; charset=utf-8"
+        return Response.for_file(full, content_type)
+
+
+class ServerThread(threading.Thread):
+    """在后台线程中运行服务，供 html_viewer 等Qt程序内嵌使用；start 之后等待 ready，再检查 error"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, dot_path=DEFAULT_DOT,
+                 annotations_path=DEFAULT_ANNOTATIONS, photos_dir=DEFAULT_PHOTOS, root=BASE_DIR):
+        super().__init__(name="hitsz-server", daemon=True)
+        self.host = host
+        self.port = port
+        self.options = (dot_path, annotations_path, photos_dir, root)
+        self.ready = threading.Event()
+        self.error = None
+        self.loop = None
+
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        dot_path, annotations_path, photos_dir, root = self.options
+        try:
+            server = HITSZServer(GraphData(dot_path, annotations_path, photos_dir), root)
+            self.server = self.loop.run_until_complete(server.start(self.host, self.port))
+            # 端口为0时由系统分配，记下实际端口
+            self.port = self.server.sockets[0].getsockname()[1]
+        except Exception as e:
+            # 端口被占用、DOT文件格式错误、标注文件无法读取等，都交给调用方处理
+            self.error = e
+            self.loop.close()
+            return
+        finally:
+            self.ready.set()
+        self.loop.run_forever()
+
+    def address_in_use(self):
+        """端口已被占用，通常是另一个展台已经启动了共用的服务"""
+        return isinstance(self.error, OSError) and self.error.errno == errno.EADDRINUSE
+
+    def stop(self):
+        if self.loop is not None and self.error is None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+async def serve(args):
+    data = GraphData(args.dot, args.annotations, args.photos)
+    server = HITSZServer(data, args.root, args.cache_mb, args.workers)
+    listener = await server.start(args.host, args.port)
+    node_count = data.model.node_count() if data.model is not None else 0
+    print(f"服务已启动: http://{args.host}:{args.port}/  （{node_count} 个节点，{len(data.annotations)} 条标注）")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图、标注和缩略图的本地HTTP服务")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--dot", default=DEFAULT_DOT)
+    parser.add_argument("--annotations", default=DEFAULT_ANNOTATIONS)
+    parser.add_argument("--photos", default=DEFAULT_PHOTOS, help="标注中相对照片路径的根目录")
+    parser.add_argument("--root", default=BASE_DIR, help="静态文件的根目录")
+    parser.add_argument("--cache-mb", type=int, default=DEFAULT_CACHE_MB, help="响应缓存大小（MB）")
+    parser.add_argument("--workers", type=int, default=4, help="解码缩略图和读文件的线程数")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"启动服务出错: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+from PyQt5.QtCore import QObject, QEvent, QTimer
+
+# 打开启动计时的命令行参数
+PROFILE_FLAG = "--startup-profile"
+
+
+def process_age():
+    """进程已运行的秒数（含解释器启动），只在Linux上可用，其他平台返回None"""
+    try:
+        with open("/proc/self/stat") as f:
+            # 进程名可能含空格，从最后一个右括号之后开始数字段
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupProfile:
+    """分阶段记录从进程启动到第一次绘制的耗时，第一次绘制后打印
+
+    未启用时 mark() 什么也不做，启动代码里的计时点可以一直保留。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.start = None
+        self.last = None
+        self.phases = []
+        self.reported = False
+
+    def enable(self, clock):
+        """clock 为入口模块最早记录的 perf_counter()；能取得进程启动时间时把解释器启动也算进来"""
+        self.enabled = True
+        self.last = clock
+        age = process_age()
+        if age is not None:
+            self.start = time.perf_counter() - age
+            self.phases.append(("解释器启动", max(0.0, clock - self.start)))
+        else:
+            self.start = clock
+
+    def mark(self, phase):
+        """记录从上一个计时点到现在的阶段；第一次绘制之后的阶段直接打印"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+        if self.reported:
+            print(f"[启动] {self.phases[-1][1] * 1000:8.1f} ms   累计 {(now - self.start) * 1000:8.1f} ms   {phase}（首次绘制之后）")
+
+    def report(self):
+        total = 0.0
+        print("[启动] 阶段耗时：")
+        for phase, elapsed in self.phases:
+            total += elapsed
+            print(f"[启动] {elapsed * 1000:8.1f} ms   累计 {total * 1000:8.1f} ms   {phase}")
+        self.reported = True
+
+    def watch_first_paint(self, widget, callback=None):
+        """窗口第一次绘制时记录“首次绘制”并打印；callback 在这次绘制结束后调用（无论是否启用计时）"""
+        widget.installEventFilter(FirstPaintFilter(widget, self, callback))
+
+
+class FirstPaintFilter(QObject):
+    """窗口收到第一个绘制事件后，在这一帧画完时记录一次，然后移除自己"""
+
+    def __init__(self, widget, profile, callback):
+        super().__init__(widget)
+        self.profile = profile
+        self.callback = callback
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            obj.removeEventFilter(self)
+            # 子控件在同一轮里绘制，回到事件循环时这一帧才算画完；也不在绘制过程中改动界面
+            QTimer.singleShot(0, self.finish)
+        return False
+
+    def finish(self):
+        if self.profile.enabled and not self.profile.reported:
+            self.profile.mark("首次绘制")
+            self.profile.report()
+        if self.callback is not None:
+            self.callback()
+        self.deleteLater()
+
+
+# 进程内共用的启动计时
+profile = StartupProfile()
+
+
+def enable_from_argv(clock, argv=None):
+    """命令行带 --startup-profile 时启用计时，并从参数中去掉它"""
+    argv = sys.argv if argv is None else argv
+    if PROFILE_FLAG in argv:
+        argv.remove(PROFILE_FLAG)
+        profile.enable(clock)
+    return profile.enabled
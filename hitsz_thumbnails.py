@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import hashlib
+import threading
+from PyQt5.QtGui import QImage, QImageReader
+from PyQt5.QtCore import QObject, QRunnable, QThread, QThreadPool, QSize, Qt, pyqtSignal
+from hitsz_image_cache import shared_image_cache
+from hitsz_instrument import instrumented
+
+# 缩略图磁盘缓存目录
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".thumb_cache")
+
+
+def thumbnail_key(path, max_width, max_height=0):
+    """缩略图键：(绝对路径, mtime_ns, 最大宽, 最大高)，文件不存在时返回None"""
+    full_path = os.path.abspath(path)
+    try:
+        mtime = os.stat(full_path).st_mtime_ns
+    except OSError:
+        return None
+    return (full_path, mtime, max_width, max_height)
+
+
+def target_size(size, max_width, max_height):
+    """按最大宽高等比缩小，不放大；0表示该方向不限制"""
+    width, height = size.width(), size.height()
+    scale = 1.0
+    if max_width and width > max_width:
+        scale = min(scale, max_width / width)
+    if max_height and height > max_height:
+        scale = min(scale, max_height / height)
+    return QSize(max(1, round(width * scale)), max(1, round(height * scale)))
+
+
+@instrumented()
+def decode_scaled(path, max_width, max_height):
+    """在任意线程中解码并缩放图片，只使用线程安全的QImage"""
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if size.isValid():
+        scaled = target_size(size, max_width, max_height)
+        if scaled != size:
+            # JPEG等格式可以在解码时直接缩小，省去完整解码
+            reader.setScaledSize(scaled)
+        return reader.read()
+    image = reader.read()
+    if image.isNull():
+        return image
+    scaled = target_size(image.size(), max_width, max_height)
+    if scaled != image.size():
+        image = image.scaled(scaled, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+    return image
+
+
+def load_image(path, max_width, max_height=0):
+    """同步获取缩放后的图片，先查共享内存缓存；返回 (键, QImage)"""
+    key = thumbnail_key(path, max_width, max_height)
+    if key is None:
+        return None, QImage()
+    cache = shared_image_cache()
+    image = cache.get(key)
+    if image is None:
+        image = decode_scaled(key[0], max_width, max_height)
+        cache.put(key, image)
+    return key, image
+
+
+class ThumbnailTask(QRunnable):
+    """后台缩略图任务：先查磁盘缓存，未命中再解码缩放并写回缓存"""
+
+    def __init__(self, service, key, generation=None):
+        super().__init__()
+        self.service = service
+        self.key = key
+        # 预取任务记录提交时的预取代数，None表示前台请求
+        self.generation = generation
+
+    def run(self):
+        if self.generation is not None:
+            QThread.currentThread().setPriority(QThread.LowPriority)
+            # 用户已经离开，且没有前台请求接手这张图，直接放弃
+            if not self.service.still_wanted(self.key, self.generation):
+                self.service._task_cancelled.emit(self.key)
+                return
+        path, _, max_width, max_height = self.key
+        cache_file = self.service.cache_file(self.key)
+        image = QImage()
+        if cache_file and os.path.exists(cache_file):
+            image = QImage(cache_file)
+        if image.isNull():
+            image = decode_scaled(path, max_width, max_height)
+            if not image.isNull() and cache_file:
+                self.service.store(cache_file, image)
+        self.service._task_finished.emit(self.key, image)
+
+
+class ThumbnailService(QObject):
+    """缩略图服务：线程池中解码，结果通过信号回到GUI线程"""
+
+    # 缩略图就绪 (键, 图片)，图片加载失败时为空QImage
+    thumbnail_ready = pyqtSignal(object, QImage)
+    _task_finished = pyqtSignal(object, QImage)
+    _task_cancelled = pyqtSignal(object)
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_prefetch=2, parent=None):
+        super().__init__(parent)
+        self.cache_dir = cache_dir
+        self.memory_cache = shared_image_cache()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(2, QThreadPool.globalInstance().maxThreadCount()))
+        # 预取使用单独的小线程池，限制并发且不会挤占前台请求
+        self.prefetch_pool = QThreadPool(self)
+        self.prefetch_pool.setMaxThreadCount(max_prefetch)
+        self.prefetch_tasks = {}
+        self.prefetch_generation = 0
+        self.pending = set()
+        # 有界面在等待的键，预取取消时不能丢弃
+        self.foreground = set()
+        self.lock = threading.Lock()
+        self._task_finished.connect(self.on_task_finished)
+        self._task_cancelled.connect(self.on_task_cancelled)
+        self.prefetch_stats = {"submitted": 0, "cancelled": 0, "promoted": 0}
+
+    def cache_file(self, key):
+        """磁盘缓存文件路径，由路径、mtime和目标尺寸共同决定"""
+        if not self.cache_dir:
+            return None
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + ".img")
+
+    def store(self, cache_file, image):
+        """写入磁盘缓存，先写临时文件再替换，避免其他线程读到半个文件"""
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            tmp_path = f"{cache_file}.{threading.get_ident()}.tmp"
+            fmt = "PNG" if image.hasAlphaChannel() else "JPG"
+            if image.save(tmp_path, fmt, 90):
+                os.replace(tmp_path, cache_file)
+        except OSError as e:
+            print(f"写入缩略图缓存失败: {e}")
+
+    def still_wanted(self, key, generation):
+        """预取任务开始前检查：属于当前预取批次或已有前台请求"""
+        with self.lock:
+            return generation == self.prefetch_generation or key in self.foreground
+
+    def request(self, path, max_width, max_height=0):
+        """请求一张缩略图，返回 (键, 图片)
+
+        内存缓存命中时直接返回图片；否则图片为None，结果稍后通过 thumbnail_ready 发出。
+        同一键已在处理中时不重复提交。
+        """
+        key = thumbnail_key(path, max_width, max_height)
+        if key is None:
+            return None, None
+        image = self.memory_cache.get(key)
+        if image is not None:
+            return key, image
+        with self.lock:
+            self.foreground.add(key)
+        task = self.prefetch_tasks.get(key)
+        if task is not None:
+            # 还在预取队列里排队：取出来改到前台线程池
+            if self.prefetch_pool.tryTake(task):
+                del self.prefetch_tasks[key]
+                self.pending.discard(key)
+            else:
+                self.prefetch_stats["promoted"] += 1
+        if key not in self.pending:
+            self.pending.add(key)
+            self.pool.start(ThumbnailTask(self, key))
+        return key, None
+
+    def prefetch(self, paths, max_width, max_height=0):
+        """低优先级预取一批图片，同时取消上一批尚未开始的预取"""
+        with self.lock:
+            self.prefetch_generation += 1
+            generation = self.prefetch_generation
+        # 预取任务不自动删除，由这里持有；已经开始运行的任务要保留到结束，否则会在运行中被释放
+        running = {}
+        for key, task in self.prefetch_tasks.items():
+            if self.prefetch_pool.tryTake(task):
+                self.pending.discard(key)
+                self.prefetch_stats["cancelled"] += 1
+            else:
+                running[key] = task
+        self.prefetch_tasks = running
+
+        for path in paths:
+            key = thumbnail_key(path, max_width, max_height)
+            if key is None or key in self.pending or key in self.memory_cache:
+                continue
+            task = ThumbnailTask(self, key, generation)
+            task.setAutoDelete(False)
+            self.pending.add(key)
+            self.prefetch_tasks[key] = task
+            self.prefetch_pool.start(task, -1)
+            self.prefetch_stats["submitted"] += 1
+
+    def on_task_finished(self, key, image):
+        self.pending.discard(key)
+        self.prefetch_tasks.pop(key, None)
+        with self.lock:
+            self.foreground.discard(key)
+        self.memory_cache.put(key, image)
+        self.thumbnail_ready.emit(key, image)
+
+    def on_task_cancelled(self, key):
+        """预取任务在线程中放弃执行；若期间有前台请求等待，则重新提交"""
+        self.pending.discard(key)
+        self.prefetch_tasks.pop(key, None)
+        self.prefetch_stats["cancelled"] += 1
+        with self.lock:
+            wanted = key in self.foreground
+        if wanted:
+            self.pending.add(key)
+            self.pool.start(ThumbnailTask(self, key))
+
+    def shutdown(self):
+        """丢弃排队中的任务并等待正在运行的任务结束"""
+        self.prefetch_pool.clear()
+        self.pool.clear()
+        self.prefetch_pool.waitForDone()
+        self.pool.waitForDone()
@@ -3,135 +3,74 @@
 
 import sys
 import os
-import json
-import networkx as nx
+import time
+# 启动计时起点，要在导入PyQt和其他模块之前记录
+STARTUP_CLOCK = time.perf_counter()
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QPushButton, QLabel, QListWidget, 
-                            QStackedWidget, QListWidgetItem, QScrollArea, 
-                            QGridLayout, QGroupBox, QSplitter, QLineEdit, QTextEdit,
-                            QFileDialog, QMessageBox, QDialog)
-from PyQt5.QtGui import QColor, QFont, QPalette, QIcon, QPixmap, QImage
-from PyQt5.QtCore import Qt, QSize
+                            QListWidgetItem, QScrollArea, 
+                            QGroupBox, QSplitter, QLineEdit, QTextEdit,
+                            QFileDialog, QMessageBox, QDialog, QListView, QSpinBox)
+from PyQt5.QtGui import QColor, QFont, QPixmap, QCursor
+from PyQt5.QtCore import Qt
+from hitsz_autosave import AnnotationAutosaver
+from hitsz_journal import AnnotationJournal
+from hitsz_graph import diff_models
+from hitsz_digraph import DiGraph
+from hitsz_graph_cache import load_compiled, invalidate_compiled
+from hitsz_annotation_store import open_store, empty_store, changed_nodes
+from hitsz_thumbnails import load_image
+from hitsz_assets import AssetManifest
+from hitsz_list_models import (NodeListModel, RelationListModel, PhotoPathModel, IncrementalLoader,
+                               configure_large_list, NODE_ID_ROLE)
+from hitsz_search import build_index
+from hitsz_query import GraphQuery
+from hitsz_node_types import DEFAULT_CLASSIFIER, TypeIndex, load_classifier
+from hitsz_watch import FileWatcher
+from hitsz_startup import profile, enable_from_argv
+from hitsz_instrument import instrumented, instrument_from_argv, install_debug_shortcut
 
-# 定义节点类型和颜色映射
-NODE_TYPES = {
-    "时间": {"color": "lightgreen", "shape": "oval", "nodes": []},
-    "地点": {"color": "lightyellow", "shape": "hexagon", "nodes": []},
-    "机构/组织": {"color": "pink", "shape": "box", "nodes": []},
-    "人物": {"color": "lightcyan", "shape": "ellipse", "nodes": []},
-    "教育理念": {"color": "lightsalmon", "shape": "diamond", "nodes": []},
-    "课程": {"color": "lavender", "shape": "box", "nodes": []},
-    "产品/技术": {"color": "lightgray", "shape": "box", "nodes": []},
-    "事件": {"color": "white", "shape": "oval", "nodes": []},
-    "成就": {"color": "gold", "shape": "star", "nodes": []},
-    "启发/反思": {"color": "white", "fontcolor": "red", "shape": "plaintext", "nodes": []}
-}
+# 照片目录，标注中的相对路径也按这个目录查找缩小版本
+PHOTO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "picture")
+# 路径查询最多列出的简单路径数
+PATH_LIMIT = 200
 
-# 节点到类型的映射
-NODE_TO_TYPE = {}
+def node_attributes(model, i):
+    """图模型中第i个节点在查看器图上的显示属性"""
+    attrs = model.attrs[i]
+    return {
+        "label": model.label(i),
+        "shape": attrs.get("shape", "box"),  # 默认形状
+        "color": attrs.get("fillcolor", "lightblue"),  # 默认颜色
+        "fontcolor": attrs.get("fontcolor", "black"),  # 默认字体颜色
+    }
 
 # 构建图结构
-def build_graph_from_dot(dot_file_path):
+def build_graph_from_dot(dot_file_path, annotations_file=None, classifier=None):
     try:
-        G = nx.DiGraph()
+        # 优先从编译缓存映射图结构，源文件变化时自动重新解析
+        model = load_compiled(dot_file_path).model
+        # 节点属性和边标签直接从图模型的数组构建，不经过逐条 add_node/add_edge
+        G = DiGraph.from_model(model, node_attributes)
         
-        # 读取DOT文件
-        with open(dot_file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        # 类型索引属于这个图，重新加载时不会与旧图的数据混在一起
+        if classifier is None:
+            classifier = DEFAULT_CLASSIFIER
+        types = TypeIndex(classifier.styles)
+        G.graph["types"] = types
+        G.graph["classifier"] = classifier
+        G.graph["dot_path"] = dot_file_path
+        # 保留图模型，文件变化时与新模型比较差异
+        G.graph["model"] = model
+        # 映射标注存储，供HITSZFlowViewer.load_annotations使用
+        if annotations_file:
+            G.graph["annotations"] = open_store(annotations_file)
         
-        # 解析节点
-        lines = content.split('\n')
-        for line in lines:
-            line = line.strip()
-            
-            # 跳过注释和不相关行
-            if line.startswith('//') or not line or line.startswith('digraph') or line.startswith('}') or line.startswith('rankdir') or line.startswith('node') or line.startswith('edge'):
-                continue
-            
-            # 解析节点定义行
-            if '->' not in line and '[' in line and ']' in line:
-                node_id = line.split('[')[0].strip()
-                attrs = line.split('[')[1].split(']')[0]
-                
-                # 提取label
-                label = ""
-                if 'label=' in attrs:
-                    if 'label="' in attrs:
-                        label = attrs.split('label="')[1].split('"')[0]
-                    else:
-                        label = attrs.split('label=')[1].split(',')[0].strip('"')
-                
-                # 提取形状和颜色
-                shape = "box"  # 默认形状
-                if 'shape=' in attrs:
-                    shape = attrs.split('shape=')[1].split(',')[0].strip('"')
-                    if shape.endswith(']'):
-                        shape = shape[:-1]
-
-                color = "lightblue"  # 默认颜色
-                if 'fillcolor=' in attrs:
-                    color = attrs.split('fillcolor=')[1].split(',')[0].strip('"')
-                    if color.endswith(']'):
-                        color = color[:-1]
-                
-                fontcolor = "black"  # 默认字体颜色
-                if 'fontcolor=' in attrs:
-                    fontcolor = attrs.split('fontcolor=')[1].split(',')[0].strip('"')
-                    if fontcolor.endswith(']'):
-                        fontcolor = fontcolor[:-1]
-                
-                # 添加节点到图中
-                G.add_node(node_id, label=label, shape=shape, color=color, fontcolor=fontcolor)
-                
-                # 根据节点命名前缀推断类型
-                node_type = None
-                if node_id.startswith("t"):
-                    node_type = "时间"
-                elif node_id.startswith("place_"):
-                    node_type = "地点"
-                elif node_id.startswith("org_"):
-                    node_type = "机构/组织"
-                elif node_id.startswith("person_"):
-                    node_type = "人物"
-                elif node_id.startswith("concept_"):
-                    node_type = "教育理念"
-                elif node_id.startswith("course_"):
-                    node_type = "课程"
-                elif node_id.startswith("tech_"):
-                    node_type = "产品/技术"
-                elif node_id.startswith("event_"):
-                    node_type = "事件"
-                elif node_id == "achievement":
-                    node_type = "成就"
-                elif node_id.startswith("lesson"):
-                    node_type = "启发/反思"
-                
-                if node_type:
-                    NODE_TYPES[node_type]["nodes"].append((node_id, label))
-                    NODE_TO_TYPE[node_id] = node_type
-            
-            # 解析边定义行
-            if '->' in line:
-                parts = line.split('->')
-                source = parts[0].strip()
-                if '[' in parts[1]:
-                    target = parts[1].split('[')[0].strip()
-                    attrs = parts[1].split('[')[1].split(']')[0]
-                    
-                    # 提取边的label
-                    edge_label = ""
-                    if 'label=' in attrs:
-                        if 'label="' in attrs:
-                            edge_label = attrs.split('label="')[1].split('"')[0]
-                        else:
-                            edge_label = attrs.split('label=')[1].split(',')[0].strip('"')
-                    
-                    G.add_edge(source, target, label=edge_label)
-                else:
-                    target = parts[1].strip()
-                    if target.endswith(';'):
-                        target = target[:-1]
-                    G.add_edge(source, target, label="")
+        for i, node_id in enumerate(G.ids):
+            # 按显式type属性、ID、前缀或形状/颜色规则分类
+            node_type = classifier.classify(node_id, model.attrs[i])
+            if node_type:
+                types.add(node_id, G.attrs[i]["label"], node_type)
         
         return G
     except Exception as e:
@@ -140,7 +79,7 @@ def build_graph_from_dot(dot_file_path):
 
 class PhotoPreviewDialog(QDialog):
     """照片预览对话框"""
-    def __init__(self, photo_path, parent=None):
+    def __init__(self, photo_path, parent=None, assets=None):
         super().__init__(parent)
         self.setWindowTitle("照片预览")
         self.resize(800, 600)
@@ -164,6 +103,7 @@ class PhotoPreviewDialog(QDialog):
         content_layout.addWidget(self.photo_label)
         
         # 加载照片
+        self.assets = assets
         self.load_photo(photo_path)
         
         # 添加关闭按钮
@@ -171,19 +111,24 @@ class PhotoPreviewDialog(QDialog):
         close_button.clicked.connect(self.accept)
         layout.addWidget(close_button)
     
+    @instrumented()
     def load_photo(self, photo_path):
         """加载照片到标签"""
         if os.path.exists(photo_path):
             try:
-                pixmap = QPixmap(photo_path)
+                # 从共享图片缓存获取缩小后的图片，重复预览同一文件不再解码
+                source = self.assets.pick(photo_path, 780, 520) if self.assets else photo_path
+                _, image = load_image(source, 780, 520)
                 
                 # 检查是否加载成功
-                if pixmap.isNull():
+                if image.isNull():
                     self.photo_label.setText(f"无法加载照片: {photo_path}")
                     return
                 
-                # 调整图片大小，保持纵横比
-                pixmap = pixmap.scaled(780, 520, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                # 调整图片大小，保持纵横比（小图放大到预览区域）
+                pixmap = QPixmap.fromImage(image)
+                if pixmap.width() < 780 and pixmap.height() < 520:
+                    pixmap = pixmap.scaled(780, 520, Qt.KeepAspectRatio, Qt.SmoothTransformation)
                 
                 # 显示照片
                 self.photo_label.setPixmap(pixmap)
@@ -195,18 +140,167 @@ class PhotoPreviewDialog(QDialog):
         else:
             self.photo_label.setText(f"找不到照片: {photo_path}")
 
+class PathDialog(QDialog):
+    """路径查询对话框：从当前节点到搜索选中的终点，列出最短路径和不超过k步的简单路径"""
+    def __init__(self, viewer):
+        super().__init__(viewer)
+        self.setWindowTitle("路径到...")
+        self.resize(700, 500)
+        self.viewer = viewer
+        self.source = None
+        self.target = None
+        
+        layout = QVBoxLayout(self)
+        
+        self.source_label = QLabel()
+        layout.addWidget(self.source_label)
+        
+        # 终点用搜索索引查找
+        self.target_edit = QLineEdit()
+        self.target_edit.setPlaceholderText("搜索终点节点...")
+        self.target_edit.setClearButtonEnabled(True)
+        self.target_edit.textChanged.connect(self.on_target_text_changed)
+        layout.addWidget(self.target_edit)
+        
+        self.target_model = NodeListModel([], self)
+        self.target_list = QListView()
+        self.target_list.setModel(self.target_model)
+        self.target_list.setEditTriggers(QListView.NoEditTriggers)
+        self.target_list.setMaximumHeight(150)
+        configure_large_list(self.target_list)
+        self.target_list.clicked.connect(self.on_target_clicked)
+        layout.addWidget(self.target_list)
+        
+        options_layout = QHBoxLayout()
+        options_layout.addWidget(QLabel("最多步数:"))
+        self.length_spin = QSpinBox()
+        self.length_spin.setRange(1, 20)
+        self.length_spin.setValue(6)
+        options_layout.addWidget(self.length_spin)
+        options_layout.addStretch()
+        self.find_button = QPushButton("查找路径")
+        self.find_button.setEnabled(False)
+        self.find_button.clicked.connect(self.find_paths)
+        options_layout.addWidget(self.find_button)
+        layout.addLayout(options_layout)
+        
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        
+        # 结果列表，双击一条路径跳到终点
+        self.result_list = QListWidget()
+        self.result_list.setWordWrap(True)
+        self.result_list.itemDoubleClicked.connect(self.on_result_double_clicked)
+        layout.addWidget(self.result_list)
+        
+        close_button = QPushButton("关闭")
+        close_button.clicked.connect(self.accept)
+        layout.addWidget(close_button)
+    
+    def set_source(self, node_id):
+        """设置起点，清空上一次的结果"""
+        self.source = node_id
+        self.source_label.setText(f"起点: {self.viewer.display_label(node_id)}")
+        self.result_list.clear()
+        self.status_label.clear()
+        self.find_button.setEnabled(self.target is not None)
+    
+    def on_target_text_changed(self, text):
+        self.target = None
+        self.find_button.setEnabled(False)
+        if not text.strip():
+            self.target_model.set_nodes([])
+            return
+        hits = self.viewer.get_search_index().search(text)
+        self.target_model.set_nodes([(node_id, self.viewer.display_label(node_id)) for node_id, _ in hits])
+    
+    def on_target_clicked(self, index):
+        self.target = index.data(NODE_ID_ROLE)
+        self.status_label.setText(f"终点: {self.viewer.display_label(self.target)}")
+        self.find_button.setEnabled(True)
+    
+    def format_path(self, query, path):
+        """节点标签和边标签交替显示"""
+        parts = [self.viewer.display_label(path[0])]
+        for source, target in zip(path, path[1:]):
+            label = query.edge_label(source, target)
+            parts.append(f" -[{label}]-> " if label else " -> ")
+            parts.append(self.viewer.display_label(target))
+        return "".join(parts)
+    
+    def add_result(self, query, path, prefix):
+        item = QListWidgetItem(f"{prefix}（{len(path) - 1} 步）{self.format_path(query, path)}")
+        item.setData(Qt.UserRole, path)
+        self.result_list.addItem(item)
+    
+    def find_paths(self):
+        if self.source is None or self.target is None:
+            return
+        self.result_list.clear()
+        max_length = self.length_spin.value()
+        try:
+            query = self.viewer.get_graph_query()
+            shortest = query.shortest_path(self.source, self.target)
+            if shortest is None:
+                self.status_label.setText("终点不可达")
+                return
+            self.add_result(query, shortest, "最短路径")
+            paths = query.simple_paths(self.source, self.target, max_length, limit=PATH_LIMIT)
+            for path in paths:
+                if path != shortest:
+                    self.add_result(query, path, "路径")
+            more = "（只列出前几条）" if len(paths) >= PATH_LIMIT else ""
+            self.status_label.setText(f"最短 {len(shortest) - 1} 步，{max_length} 步以内共 {len(paths)} 条简单路径{more}")
+        except KeyError as e:
+            self.status_label.setText(f"节点已不在图中: {e}")
+    
+    def on_result_double_clicked(self, item):
+        path = item.data(Qt.UserRole)
+        self.viewer.select_node(path[-1])
+
 class HITSZFlowViewer(QMainWindow):
     def __init__(self, graph):
         super().__init__()
         
         self.graph = graph
+        self.types = graph.graph["types"]
         self.current_node = None
         self.annotations_file = self.get_annotations_file_path()
+        self.journal = AnnotationJournal(self.annotations_file)
+        # 最近一次从文件读到的标注（映射的标注存储 + 日志）
+        self.persisted = empty_store()
         
         # 加载已有的标注信息
         self.load_annotations()
+        profile.mark("加载标注")
+        
+        # 编辑只标记脏节点，由自动保存器合并后在后台写盘；
+        # 已落盘版本直接用映射的标注存储，不在启动时复制和解码全部描述
+        self.autosaver = AnnotationAutosaver(self.journal, self.collect_node_annotations, parent=self)
+        self.autosaver.reset(self.persisted)
+        
+        # 标签和描述的倒排索引在第一次搜索时建立，之后随描述编辑增量更新
+        self.search_index = None
+        
+        # 路径查询的预处理结构（强连通分量缩点和可达性标签）在第一次查询时建立，图重新加载后作废
+        self.graph_query = None
+        self.path_dialog = None
+        
+        # 预览照片时优先使用 hitsz_assets.py 生成的缩小版本，清单在第一次预览时才读取
+        self.assets = None
         
         self.init_ui()
+        profile.mark("构建主界面")
+        
+        # 照片、描述和关系面板在第一帧画完之后构建
+        profile.watch_first_paint(self, self.build_detail_panels)
+        
+        # 监视DOT和标注文件，外部修改后只刷新变化的部分
+        watched = [self.annotations_file]
+        if self.graph.graph.get("dot_path"):
+            watched.append(self.graph.graph["dot_path"])
+        self.file_watcher = FileWatcher(watched, parent=self)
+        self.file_watcher.files_changed.connect(self.on_files_changed)
     
     def get_annotations_file_path(self):
         """获取标注文件的保存路径"""
@@ -214,52 +308,77 @@ class HITSZFlowViewer(QMainWindow):
         return os.path.join(current_dir, "node_annotations.json")
     
     def load_annotations(self):
-        """从JSON文件加载标注信息"""
-        if os.path.exists(self.annotations_file):
+        """从JSON快照加载标注信息，并重放日志中尚未折叠的编辑"""
+        if os.path.exists(self.annotations_file) or os.path.exists(self.journal.journal_path):
             try:
-                with open(self.annotations_file, 'r', encoding='utf-8') as f:
-                    annotations = json.load(f)
+                annotations = self.journal.load(self.graph.graph.get("annotations"))
+                self.persisted = annotations
                 
-                # 将标注信息应用到图中的节点
-                for node_id, node_data in annotations.items():
+                # 将照片等字段应用到图中的节点，描述等到显示时再解码
+                for node_id in annotations:
                     if node_id in self.graph.nodes:
-                        for key, value in node_data.items():
-                            self.graph.nodes[node_id][key] = value
+                        self.graph.nodes[node_id].update(annotations.fields(node_id))
                 
                 print(f"成功从 {self.annotations_file} 加载标注信息")
             except Exception as e:
                 print(f"加载标注信息时出错: {e}")
     
+    def node_description(self, node_id):
+        """节点描述，第一次用到时从标注存储解码并放到图节点属性里"""
+        attrs = self.graph.nodes[node_id]
+        if 'description' not in attrs:
+            description = self.persisted.description(node_id)
+            if description is not None:
+                attrs['description'] = description
+        return attrs.get('description', '')
+    
+    def get_search_index(self):
+        """建立索引需要全部描述，推迟到第一次搜索"""
+        if self.search_index is None:
+            self.search_index = build_index(
+                (node_id, attrs.get('label', node_id), self.node_description(node_id))
+                for node_id, attrs in self.graph.nodes(data=True))
+        return self.search_index
+    
+    def get_graph_query(self):
+        """建立路径查询结构需要遍历全部边，推迟到第一次查询"""
+        if self.graph_query is None:
+            QApplication.setOverrideCursor(QCursor(Qt.WaitCursor))
+            try:
+                self.graph_query = GraphQuery(self.graph.graph["model"])
+            finally:
+                QApplication.restoreOverrideCursor()
+        return self.graph_query
+    
+    def display_label(self, node_id):
+        """节点显示标签，节点已删除时用ID"""
+        if node_id in self.graph.nodes:
+            return self.graph.nodes[node_id].get('label', node_id)
+        return node_id
+    
+    def collect_node_annotations(self, node_id):
+        """收集单个节点需要保存的标注属性"""
+        node_data = {}
+        if node_id in self.graph.nodes:
+            # 描述可能还没解码，先加载，避免被当成删除
+            self.node_description(node_id)
+        attrs = self.graph.nodes[node_id] if node_id in self.graph.nodes else {}
+        # 只保存标注相关的属性
+        if 'description' in attrs:
+            node_data['description'] = attrs['description']
+        if 'photo_paths' in attrs:
+            node_data['photo_paths'] = list(attrs['photo_paths'])
+        if 'photo_path' in attrs:
+            node_data['photo_path'] = attrs['photo_path']
+        return node_data
+    
+    @instrumented()
     def save_annotations(self):
-        """将所有节点的标注信息保存到JSON文件"""
-        try:
-            # 创建一个字典保存所有节点的标注
-            annotations = {}
-            
-            # 遍历图中的所有节点
-            for node_id in self.graph.nodes:
-                node_data = {}
-                # 只保存标注相关的属性
-                if 'description' in self.graph.nodes[node_id]:
-                    node_data['description'] = self.graph.nodes[node_id]['description']
-                if 'photo_paths' in self.graph.nodes[node_id]:
-                    node_data['photo_paths'] = self.graph.nodes[node_id]['photo_paths']
-                if 'photo_path' in self.graph.nodes[node_id]:
-                    node_data['photo_path'] = self.graph.nodes[node_id]['photo_path']
-                
-                # 如果节点有标注数据，添加到字典中
-                if node_data:
-                    annotations[node_id] = node_data
-            
-            # 写入JSON文件
-            with open(self.annotations_file, 'w', encoding='utf-8') as f:
-                json.dump(annotations, f, ensure_ascii=False, indent=4)
-            
+        """立即把所有未保存的标注同步写入JSON文件，并清空日志"""
+        if self.autosaver.flush(compact=True):
             print(f"标注信息已保存到 {self.annotations_file}")
             return True
-        except Exception as e:
-            print(f"保存标注信息时出错: {e}")
-            return False
+        return False
     
     def init_ui(self):
         self.setWindowTitle('哈工大(深圳)发展历程浏览器')
@@ -280,13 +399,26 @@ class HITSZFlowViewer(QMainWindow):
         category_label.setFont(QFont("SimSun", 12, QFont.Bold))
         category_layout.addWidget(category_label)
         
+        # 搜索框，结果显示在类别列表上方
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜索节点标签或描述...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.on_search_text_changed)
+        category_layout.addWidget(self.search_edit)
+        
+        self.search_model = NodeListModel([], self)
+        self.search_results = QListView()
+        self.search_results.setModel(self.search_model)
+        self.search_results.setEditTriggers(QListView.NoEditTriggers)
+        configure_large_list(self.search_results)
+        self.search_results.clicked.connect(self.on_search_result_clicked)
+        self.search_results.hide()
+        category_layout.addWidget(self.search_results)
+        
         self.category_list = QListWidget()
-        for category in NODE_TYPES:
-            if NODE_TYPES[category]["nodes"]:  # 只显示有节点的类别
-                item = QListWidgetItem(category)
-                color = NODE_TYPES[category]["color"]
-                item.setBackground(QColor(color))
-                self.category_list.addItem(item)
+        # 类别 -> 行号
+        self.category_rows = {}
+        self.fill_category_list()
         
         self.category_list.currentItemChanged.connect(self.on_category_changed)
         category_layout.addWidget(self.category_list)
@@ -299,10 +431,22 @@ class HITSZFlowViewer(QMainWindow):
         self.node_label.setFont(QFont("SimSun", 12, QFont.Bold))
         node_layout.addWidget(self.node_label)
         
-        self.node_list = QListWidget()
-        self.node_list.currentItemChanged.connect(self.on_node_changed)
+        self.node_list = QListView()
+        self.node_list.setEditTriggers(QListView.NoEditTriggers)
+        # 每行一个标签，行高一致，布局分批完成
+        configure_large_list(self.node_list)
         node_layout.addWidget(self.node_list)
         
+        # 大类别的节点列表和关系列表先显示首屏，其余行在事件循环空闲时分批插入
+        self.node_loader = IncrementalLoader(self)
+        self.relation_loader = IncrementalLoader(self)
+        
+        # 每个类别的节点列表模型只构建一次，切换类别时直接换模型；
+        # 节点所在的类别和行号由类型索引维护，跳转时不再线性扫描两个列表
+        self.category_models = {}
+        # 跳转到指定节点时切换类别，不需要先选中类别的第一个节点
+        self.selecting_node = False
+        
         # 创建右侧详情面板
         detail_widget = QWidget()
         detail_layout = QVBoxLayout(detail_widget)
@@ -319,6 +463,75 @@ class HITSZFlowViewer(QMainWindow):
         self.node_info.setStyleSheet("background-color: #f0f0f0; padding: 10px; border-radius: 5px;")
         detail_layout.addWidget(self.node_info)
         
+        # 照片、描述和关系面板在第一次绘制之后才构建，先放一个占位
+        self.detail_layout = detail_layout
+        self.detail_placeholder = QLabel("加载中...")
+        self.detail_placeholder.setAlignment(Qt.AlignCenter)
+        self.detail_placeholder.setStyleSheet("color: gray;")
+        detail_layout.addWidget(self.detail_placeholder, 1)
+        self.detail_panels_built = False
+        self.type_colors = {}
+        
+        # 创建导航按钮
+        nav_layout = QHBoxLayout()
+        
+        self.back_button = QPushButton("返回")
+        self.back_button.setEnabled(False)
+        self.back_button.clicked.connect(self.go_back)
+        nav_layout.addWidget(self.back_button)
+        
+        self.home_button = QPushButton("首页")
+        self.home_button.clicked.connect(self.go_home)
+        nav_layout.addWidget(self.home_button)
+        
+        self.path_button = QPushButton("路径到...")
+        self.path_button.clicked.connect(self.show_path_dialog)
+        nav_layout.addWidget(self.path_button)
+        
+        self.canvas_button = QPushButton("图概览")
+        self.canvas_button.setCheckable(True)
+        self.canvas_button.toggled.connect(self.toggle_graph_canvas)
+        nav_layout.addWidget(self.canvas_button)
+        
+        self.save_button = QPushButton("保存所有标注")
+        self.save_button.clicked.connect(self.on_save_button_clicked)
+        nav_layout.addWidget(self.save_button)
+        
+        detail_layout.addLayout(nav_layout)
+        
+        # 创建分割器来调整各部分宽度
+        splitter1 = QSplitter(Qt.Horizontal)
+        splitter1.addWidget(category_widget)
+        splitter1.addWidget(node_widget)
+        
+        splitter2 = QSplitter(Qt.Horizontal)
+        splitter2.addWidget(splitter1)
+        splitter2.addWidget(detail_widget)
+        
+        # 设置分割器的初始尺寸比例
+        splitter1.setSizes([200, 300])
+        splitter2.setSizes([500, 700])
+        
+        main_layout.addWidget(splitter2)
+        # 图概览画布第一次打开时才创建，放在详情面板右侧
+        self.main_splitter = splitter2
+        self.graph_canvas = None
+        
+        # 历史记录
+        self.history = []
+        
+        # 默认选择第一个类别
+        if self.category_list.count() > 0:
+            self.category_list.setCurrentRow(0)
+    
+    def build_detail_panels(self):
+        """构建照片、描述和关系面板，并显示当前节点的这部分内容"""
+        if self.detail_panels_built:
+            return
+        self.detail_panels_built = True
+        # 三个面板依次放在占位的位置上
+        index = self.detail_layout.indexOf(self.detail_placeholder)
+        
         # 创建照片路径输入区域
         photo_group = QGroupBox("节点照片")
         photo_group.setFont(QFont("SimSun", 12))
@@ -329,9 +542,12 @@ class HITSZFlowViewer(QMainWindow):
         photo_layout.addWidget(self.photo_path_label)
         
         # 创建照片路径列表
-        self.photo_path_list = QListWidget()
+        self.photo_model = PhotoPathModel(self)
+        self.photo_path_list = QListView()
+        self.photo_path_list.setModel(self.photo_model)
+        self.photo_path_list.setEditTriggers(QListView.NoEditTriggers)
         self.photo_path_list.setMinimumHeight(80)
-        self.photo_path_list.itemDoubleClicked.connect(self.preview_photo)
+        self.photo_path_list.doubleClicked.connect(self.preview_photo)
         photo_layout.addWidget(self.photo_path_list)
         
         # 创建照片路径操作按钮布局
@@ -364,7 +580,7 @@ class HITSZFlowViewer(QMainWindow):
         self.photo_path_edit.setPlaceholderText("输入照片路径...")
         photo_layout.addWidget(self.photo_path_edit)
         
-        detail_layout.addWidget(photo_group)
+        self.detail_layout.insertWidget(index, photo_group)
         
         # 创建节点文字信息输入区域
         text_group = QGroupBox("节点描述")
@@ -380,7 +596,7 @@ class HITSZFlowViewer(QMainWindow):
         self.node_text_edit.textChanged.connect(self.on_node_text_changed)
         text_layout.addWidget(self.node_text_edit)
         
-        detail_layout.addWidget(text_group)
+        self.detail_layout.insertWidget(index + 1, text_group)
         
         # 创建关系面板
         relations_group = QGroupBox("关系")
@@ -395,8 +611,13 @@ class HITSZFlowViewer(QMainWindow):
         in_label = QLabel("入边节点")
         in_label.setFont(QFont("SimSun", 11, QFont.Bold))
         in_layout.addWidget(in_label)
-        self.in_list = QListWidget()
-        self.in_list.itemClicked.connect(self.on_relation_node_clicked)
+        # 入边/出边列表只保存相邻节点ID，文本和颜色在显示时才生成
+        self.in_model = RelationListModel(self.graph, self.node_color, True, self)
+        self.in_list = QListView()
+        self.in_list.setModel(self.in_model)
+        self.in_list.setEditTriggers(QListView.NoEditTriggers)
+        configure_large_list(self.in_list)
+        self.in_list.clicked.connect(self.on_relation_node_clicked)
         in_layout.addWidget(self.in_list)
         
         out_widget = QWidget()
@@ -404,76 +625,102 @@ class HITSZFlowViewer(QMainWindow):
         out_label = QLabel("出边节点")
         out_label.setFont(QFont("SimSun", 11, QFont.Bold))
         out_layout.addWidget(out_label)
-        self.out_list = QListWidget()
-        self.out_list.itemClicked.connect(self.on_relation_node_clicked)
+        self.out_model = RelationListModel(self.graph, self.node_color, False, self)
+        self.out_list = QListView()
+        self.out_list.setModel(self.out_model)
+        self.out_list.setEditTriggers(QListView.NoEditTriggers)
+        configure_large_list(self.out_list)
+        self.out_list.clicked.connect(self.on_relation_node_clicked)
         out_layout.addWidget(self.out_list)
         
         in_out_layout.addWidget(in_widget)
         in_out_layout.addWidget(out_widget)
         relations_layout.addLayout(in_out_layout)
         
-        detail_layout.addWidget(relations_group)
-        
-        # 创建导航按钮
-        nav_layout = QHBoxLayout()
-        
-        self.back_button = QPushButton("返回")
-        self.back_button.setEnabled(False)
-        self.back_button.clicked.connect(self.go_back)
-        nav_layout.addWidget(self.back_button)
-        
-        self.home_button = QPushButton("首页")
-        self.home_button.clicked.connect(self.go_home)
-        nav_layout.addWidget(self.home_button)
-        
-        self.save_button = QPushButton("保存所有标注")
-        self.save_button.clicked.connect(self.on_save_button_clicked)
-        nav_layout.addWidget(self.save_button)
+        self.detail_layout.insertWidget(index + 2, relations_group)
         
-        detail_layout.addLayout(nav_layout)
-        
-        # 创建分割器来调整各部分宽度
-        splitter1 = QSplitter(Qt.Horizontal)
-        splitter1.addWidget(category_widget)
-        splitter1.addWidget(node_widget)
-        
-        splitter2 = QSplitter(Qt.Horizontal)
-        splitter2.addWidget(splitter1)
-        splitter2.addWidget(detail_widget)
-        
-        # 设置分割器的初始尺寸比例
-        splitter1.setSizes([200, 300])
-        splitter2.setSizes([500, 700])
-        
-        main_layout.addWidget(splitter2)
-        
-        # 历史记录
-        self.history = []
-        
-        # 默认选择第一个类别
-        if self.category_list.count() > 0:
-            self.category_list.setCurrentRow(0)
+        self.detail_layout.removeWidget(self.detail_placeholder)
+        self.detail_placeholder.deleteLater()
+        profile.mark("构建详情面板")
+        if self.current_node:
+            self.fill_detail_panels(self.current_node)
+    
+    def fill_category_list(self):
+        """按类型索引填充类别列表，只显示有节点的类别"""
+        self.category_list.clear()
+        self.category_rows = {}
+        for category in self.types.categories():
+            item = QListWidgetItem(category)
+            item.setBackground(QColor(self.types.color(category)))
+            self.category_rows[category] = self.category_list.count()
+            self.category_list.addItem(item)
+    
+    def get_category_model(self, category):
+        """获取类别的节点列表模型，第一次访问时构建并缓存"""
+        model = self.category_models.get(category)
+        if model is None:
+            # 模型直接引用类别的节点序列，不为每个节点创建列表项
+            model = NodeListModel(self.types.nodes[category], self)
+            self.category_models[category] = model
+        return model
+    
+    def node_color(self, node_id):
+        """节点类型对应的背景色，同一类型共用一个QColor"""
+        node_type = self.types.node_type.get(node_id)
+        if node_type is None:
+            return None
+        color = self.type_colors.get(node_type)
+        if color is None:
+            color = QColor(self.types.color(node_type))
+            self.type_colors[node_type] = color
+        return color
     
+    @instrumented()
     def on_category_changed(self, current, previous):
         if current:
             category = current.text()
-            self.node_list.clear()
             self.node_label.setText(f"{category}节点列表")
             
-            # 填充节点列表
-            for node_id, label in NODE_TYPES[category]["nodes"]:
-                item = QListWidgetItem(label)
-                item.setData(Qt.UserRole, node_id)
-                self.node_list.addItem(item)
+            # 换上该类别的节点列表模型，旧的选择模型随之作废
+            model = self.get_category_model(category)
+            old_selection = self.node_list.selectionModel()
+            self.node_list.setModel(model)
+            if old_selection is not None:
+                old_selection.deleteLater()
+            self.node_list.selectionModel().currentChanged.connect(self.on_node_changed)
+            # 上一个类别没填完的行不再继续插入，切回来时接着填
+            self.node_loader.start(model)
             
-            if self.node_list.count() > 0:
-                self.node_list.setCurrentRow(0)
+            if not self.selecting_node and model.rowCount() > 0:
+                self.node_list.setCurrentIndex(model.index(0, 0))
     
     def on_node_changed(self, current, previous):
-        if current:
-            node_id = current.data(Qt.UserRole)
+        if current.isValid():
+            node_id = current.data(NODE_ID_ROLE)
             self.show_node_detail(node_id)
     
+    def select_node(self, node_id):
+        """通过索引直接定位节点所在的类别和行"""
+        location = self.types.locate(node_id)
+        if location is None:
+            return
+        category, row = location
+        category_row = self.category_rows.get(category)
+        if category_row is None:
+            return
+        
+        # 选择对应的类别
+        if self.category_list.currentRow() != category_row:
+            self.selecting_node = True
+            try:
+                self.category_list.setCurrentRow(category_row)
+            finally:
+                self.selecting_node = False
+        
+        # 在节点列表中选择对应的节点，这一行可能还没插入
+        self.node_list.setCurrentIndex(self.node_list.model().row_index(row))
+    
+    @instrumented()
     def show_node_detail(self, node_id):
         if node_id in self.graph.nodes:
             # 更新当前节点
@@ -485,100 +732,72 @@ class HITSZFlowViewer(QMainWindow):
                 self.history.append(old_node)
                 self.back_button.setEnabled(True)
             
-            # 获取节点属性
-            node_attrs = self.graph.nodes[node_id]
-            label = node_attrs.get('label', node_id)
-            node_type = NODE_TO_TYPE.get(node_id, "未知类型")
-            shape = node_attrs.get('shape', "默认形状")
-            color = node_attrs.get('color', "默认颜色")
-            
             # 更新节点信息
-            self.detail_label.setText(f"节点详情: {label}")
-            self.node_info.setText(f"ID: {node_id}\n类型: {node_type}\n标签: {label}\n形状: {shape}\n颜色: {color}")
-            self.node_info.setStyleSheet(f"background-color: {color}; padding: 10px; border-radius: 5px;")
-            
-            # 更新照片路径列表
-            self.photo_path_list.clear()
-            photo_paths = node_attrs.get('photo_paths', [])
-            # 兼容旧版本单路径数据
-            old_path = node_attrs.get('photo_path', '')
-            if old_path and old_path not in photo_paths:
-                photo_paths.append(old_path)
-                
-            for path in photo_paths:
-                item = QListWidgetItem(path)
-                item.setToolTip("双击预览照片")
-                self.photo_path_list.addItem(item)
-            
-            self.photo_path_edit.clear()
-            
-            # 更新节点描述
-            self.node_text_edit.blockSignals(True)
-            self.node_text_edit.setText(node_attrs.get('description', ''))
-            self.node_text_edit.blockSignals(False)
+            self.show_node_info(node_id)
             
-            # 更新入边列表
-            self.in_list.clear()
-            for pred in self.graph.predecessors(node_id):
-                edge_data = self.graph.get_edge_data(pred, node_id)
-                pred_label = self.graph.nodes[pred].get('label', pred)
-                edge_label = edge_data.get('label', '')
-                
-                if edge_label:
-                    item_text = f"{pred_label} ({edge_label})"
-                else:
-                    item_text = pred_label
-                
-                item = QListWidgetItem(item_text)
-                item.setData(Qt.UserRole, pred)
-                
-                # 设置颜色
-                if pred in NODE_TO_TYPE:
-                    pred_type = NODE_TO_TYPE[pred]
-                    item.setBackground(QColor(NODE_TYPES[pred_type]["color"]))
-                
-                self.in_list.addItem(item)
+            # 详情面板还没构建时，构建完成后再填充
+            if self.detail_panels_built:
+                self.fill_detail_panels(node_id)
             
-            # 更新出边列表
-            self.out_list.clear()
-            for succ in self.graph.successors(node_id):
-                edge_data = self.graph.get_edge_data(node_id, succ)
-                succ_label = self.graph.nodes[succ].get('label', succ)
-                edge_label = edge_data.get('label', '')
-                
-                if edge_label:
-                    item_text = f"{succ_label} ({edge_label})"
-                else:
-                    item_text = succ_label
-                
-                item = QListWidgetItem(item_text)
-                item.setData(Qt.UserRole, succ)
-                
-                # 设置颜色
-                if succ in NODE_TO_TYPE:
-                    succ_type = NODE_TO_TYPE[succ]
-                    item.setBackground(QColor(NODE_TYPES[succ_type]["color"]))
-                
-                self.out_list.addItem(item)
+            if self.graph_canvas is not None:
+                self.graph_canvas.highlight(node_id)
     
-    def on_relation_node_clicked(self, item):
-        node_id = item.data(Qt.UserRole)
+    def fill_detail_panels(self, node_id):
+        """更新照片、描述和关系面板"""
+        node_attrs = self.graph.nodes[node_id]
         
-        # 找到节点类型并选择相应的类别
-        if node_id in NODE_TO_TYPE:
-            node_type = NODE_TO_TYPE[node_id]
-            
-            # 选择对应的类别
-            for i in range(self.category_list.count()):
-                if self.category_list.item(i).text() == node_type:
-                    self.category_list.setCurrentRow(i)
-                    break
+        # 更新照片路径列表
+        photo_paths = node_attrs.get('photo_paths', [])
+        # 兼容旧版本单路径数据
+        old_path = node_attrs.get('photo_path', '')
+        if old_path and old_path not in photo_paths:
+            photo_paths.append(old_path)
             
-            # 在节点列表中选择对应的节点
-            for i in range(self.node_list.count()):
-                if self.node_list.item(i).data(Qt.UserRole) == node_id:
-                    self.node_list.setCurrentRow(i)
-                    break
+        self.photo_model.set_paths(photo_paths)
+        
+        self.photo_path_edit.clear()
+        
+        # 更新节点描述
+        self.node_text_edit.blockSignals(True)
+        self.node_text_edit.setText(self.node_description(node_id))
+        self.node_text_edit.blockSignals(False)
+        
+        # 更新入边和出边列表，行内容由模型按需生成，相邻节点很多时分批插入
+        self.in_model.set_node(node_id)
+        self.out_model.set_node(node_id)
+        self.relation_loader.start(self.in_model, self.out_model)
+    
+    def show_node_info(self, node_id):
+        """更新节点详情标题和基本信息"""
+        node_attrs = self.graph.nodes[node_id]
+        label = node_attrs.get('label', node_id)
+        node_type = self.types.node_type.get(node_id, "未知类型")
+        shape = node_attrs.get('shape', "默认形状")
+        color = node_attrs.get('color', "默认颜色")
+        
+        self.detail_label.setText(f"节点详情: {label}")
+        self.node_info.setText(f"ID: {node_id}\n类型: {node_type}\n标签: {label}\n形状: {shape}\n颜色: {color}")
+        self.node_info.setStyleSheet(f"background-color: {color}; padding: 10px; border-radius: 5px;")
+    
+    def on_relation_node_clicked(self, index):
+        node_id = index.data(NODE_ID_ROLE)
+        
+        # 找到节点所在的类别和行并选中
+        self.select_node(node_id)
+    
+    def on_search_text_changed(self, text):
+        """每次按键重新查询，结果按得分排序"""
+        if not text.strip():
+            self.search_model.set_nodes([])
+            self.search_results.hide()
+            return
+        hits = self.get_search_index().search(text)
+        self.search_model.set_nodes(
+            [(node_id, self.graph.nodes[node_id].get('label', node_id)) for node_id, _ in hits])
+        self.search_results.show()
+    
+    def on_search_result_clicked(self, index):
+        self.select_node(index.data(NODE_ID_ROLE))
     
     def go_back(self):
         if self.history:
@@ -589,21 +808,8 @@ class HITSZFlowViewer(QMainWindow):
             if not self.history:
                 self.back_button.setEnabled(False)
             
-            # 找到节点类型并选择相应的类别
-            if previous_node in NODE_TO_TYPE:
-                node_type = NODE_TO_TYPE[previous_node]
-                
-                # 选择对应的类别
-                for i in range(self.category_list.count()):
-                    if self.category_list.item(i).text() == node_type:
-                        self.category_list.setCurrentRow(i)
-                        break
-                
-                # 在节点列表中选择对应的节点
-                for i in range(self.node_list.count()):
-                    if self.node_list.item(i).data(Qt.UserRole) == previous_node:
-                        self.node_list.setCurrentRow(i)
-                        break
+            # 找到节点所在的类别和行并选中
+            self.select_node(previous_node)
     
     def go_home(self):
         # 清空历史记录
@@ -614,13 +820,212 @@ class HITSZFlowViewer(QMainWindow):
         if self.category_list.count() > 0:
             self.category_list.setCurrentRow(0)
 
+    def show_path_dialog(self):
+        """以当前节点为起点打开路径查询对话框"""
+        if self.current_node is None:
+            return
+        if self.path_dialog is None:
+            self.path_dialog = PathDialog(self)
+        self.path_dialog.set_source(self.current_node)
+        self.path_dialog.show()
+        self.path_dialog.raise_()
+
+    def toggle_graph_canvas(self, checked):
+        """显示或隐藏图概览；布局在后台计算，算好后和图放在一起，重新打开时不再计算"""
+        if self.graph_canvas is None:
+            if not checked:
+                return
+            from hitsz_canvas import GraphCanvas
+            self.graph_canvas = GraphCanvas(self.node_color, self)
+            self.graph_canvas.node_clicked.connect(self.select_node)
+            self.graph_canvas.layout_finished.connect(self.on_layout_finished)
+            self.main_splitter.addWidget(self.graph_canvas)
+            total = sum(self.main_splitter.sizes())
+            self.main_splitter.setSizes([total * 3 // 10, total * 3 // 10, total * 4 // 10])
+            self.graph_canvas.set_model(self.graph.graph["model"], self.graph.graph.get("dot_path"),
+                                        self.graph.graph.get("layout"))
+            if self.current_node:
+                self.graph_canvas.highlight(self.current_node)
+        self.graph_canvas.setVisible(checked)
+    
+    def on_layout_finished(self, layout):
+        self.graph.graph["layout"] = layout
+
+    def on_files_changed(self, paths):
+        """被监视的文件发生变化（已合并连续保存）"""
+        dot_path = self.graph.graph.get("dot_path")
+        if dot_path and os.path.abspath(dot_path) in paths:
+            self.reload_graph()
+        if os.path.abspath(self.annotations_file) in paths:
+            self.reload_annotations()
+    
+    def reload_graph(self):
+        """DOT文件变化：重新解析，只把与当前图的差异应用到图和界面"""
+        dot_path = self.graph.graph["dot_path"]
+        invalidate_compiled(dot_path)
+        try:
+            model = load_compiled(dot_path).model
+            diff = diff_models(self.graph.graph["model"], model)
+        except Exception as e:
+            # 文件可能还没写完，等下一次变化通知
+            print(f"重新加载图出错: {e}")
+            return
+        self.graph.graph["model"] = model
+        self.graph_query = None
+        if diff.is_empty():
+            return
+        print(f"图已更新: {diff}")
+        self.apply_graph_diff(model, diff)
+        # 节点编号变了，布局重新计算（DOT文件已变，磁盘上的布局缓存也会失效）
+        self.graph.graph.pop("layout", None)
+        if self.graph_canvas is not None:
+            self.graph_canvas.set_model(model, dot_path)
+            if self.current_node in self.graph:
+                self.graph_canvas.highlight(self.current_node)
+    
+    def apply_graph_diff(self, model, diff):
+        """把差异应用到图、类型索引、搜索索引，只刷新受影响的列表行和当前节点"""
+        G = self.graph
+        classifier = G.graph["classifier"]
+        reset_categories = set()
+        relabeled = []
+        
+        for node_id in diff.removed_nodes:
+            G.remove_node(node_id)
+            if self.search_index is not None:
+                self.search_index.remove(node_id)
+            node_type = self.types.remove(node_id)
+            if node_type:
+                reset_categories.add(node_type)
+        
+        for node_id in diff.added_nodes + diff.changed_nodes:
+            i = model.index[node_id]
+            node_attrs = node_attributes(model, i)
+            if node_id in G:
+                G.nodes[node_id].update(node_attrs)
+            else:
+                G.add_node(node_id, **node_attrs)
+                # 新节点可能已经有标注
+                node_data = self.persisted.get(node_id) or {}
+                G.nodes[node_id].update(node_data)
+                self.autosaver.rebase(node_id, node_data)
+            if self.search_index is not None:
+                self.search_index.update(node_id, node_attrs["label"], self.node_description(node_id))
+            
+            old_type = self.types.node_type.get(node_id)
+            new_type = classifier.classify(node_id, model.attrs[i])
+            if old_type is not None and old_type == new_type:
+                relabeled.append(self.types.relabel(node_id, node_attrs["label"]))
+                continue
+            if old_type is not None:
+                self.types.remove(node_id)
+                reset_categories.add(old_type)
+            if new_type:
+                self.types.add(node_id, node_attrs["label"], new_type)
+                reset_categories.add(new_type)
+        
+        for source, target in diff.removed_edges:
+            if G.has_edge(source, target):
+                G.remove_edge(source, target)
+        for source, target, edge_label in diff.added_edges + diff.changed_edges:
+            G.add_edge(source, target, label=edge_label)
+        
+        self.refresh_category_views(reset_categories, relabeled)
+        
+        # 历史记录中去掉已删除的节点
+        self.history = [node_id for node_id in self.history if node_id in G]
+        self.back_button.setEnabled(bool(self.history))
+        if self.search_edit.text().strip():
+            self.on_search_text_changed(self.search_edit.text())
+        
+        # 当前节点被删除时回到首页，否则只刷新受影响的部分
+        if self.current_node not in G:
+            self.current_node = None
+            self.go_home()
+        elif not self.detail_panels_built:
+            self.show_node_info(self.current_node)
+        elif self.current_node in diff.touched_nodes():
+            self.show_node_info(self.current_node)
+            self.in_model.set_node(self.current_node)
+            self.out_model.set_node(self.current_node)
+            self.relation_loader.start(self.in_model, self.out_model)
+        else:
+            # 邻居的标签可能变了，通知关系列表重绘
+            for relation_model in (self.in_model, self.out_model):
+                if relation_model.rowCount():
+                    relation_model.dataChanged.emit(relation_model.index(0, 0),
+                                                    relation_model.index(relation_model.rowCount() - 1, 0))
+    
+    def refresh_category_views(self, reset_categories, relabeled):
+        """节点增删过的类别重置列表模型，只改了标签的节点只重绘对应行"""
+        for category, row in relabeled:
+            model = self.category_models.get(category)
+            if model is not None and category not in reset_categories:
+                model.refresh_row(row)
+        
+        current_item = self.category_list.currentItem()
+        current_category = current_item.text() if current_item else None
+        for category in reset_categories:
+            model = self.category_models.get(category)
+            if model is not None:
+                model.set_nodes(self.types.nodes.get(category, []))
+        
+        # 有类别变空或新出现时才重建类别列表
+        if list(self.category_rows) != self.types.categories():
+            self.category_list.blockSignals(True)
+            self.fill_category_list()
+            row = self.category_rows.get(current_category)
+            if row is not None:
+                self.category_list.setCurrentRow(row)
+            self.category_list.blockSignals(False)
+            if row is None and self.category_list.count() > 0:
+                self.category_list.setCurrentRow(0)
+                return
+        
+        # 重置后的当前类别列表恢复选中当前节点，不重新加载详情
+        if current_category in reset_categories and self.current_node:
+            location = self.types.locate(self.current_node)
+            if location and location[0] == current_category:
+                selection = self.node_list.selectionModel()
+                selection.blockSignals(True)
+                self.node_list.setCurrentIndex(self.node_list.model().row_index(location[1]))
+                selection.blockSignals(False)
+    
+    def reload_annotations(self):
+        """标注文件变化：只更新被外部修改过的节点"""
+        # 先把本进程尚未写盘的编辑写完，此后文件内容与已落盘快照的差别就是外部修改
+        if self.autosaver.has_pending():
+            self.autosaver.flush()
+        try:
+            persisted = self.journal.load()
+        except (OSError, ValueError) as e:
+            print(f"重新加载标注信息出错: {e}")
+            return
+        self.persisted = persisted
+        
+        # 未改动的条目直接比较存储中的原始字节，不解码
+        changed = changed_nodes(self.autosaver.annotations, persisted)
+        for node_id in changed:
+            node_data = persisted.get(node_id) or {}
+            self.autosaver.rebase(node_id, node_data)
+            if node_id in self.graph.nodes:
+                node_attrs = self.graph.nodes[node_id]
+                for key in ('description', 'photo_paths', 'photo_path'):
+                    node_attrs.pop(key, None)
+                node_attrs.update(node_data)
+                if self.search_index is not None:
+                    self.search_index.update(node_id, description=node_attrs.get('description', ''))
+        
+        if changed:
+            print(f"标注已更新: {len(changed)} 个节点")
+        if self.current_node in changed:
+            self.show_node_detail(self.current_node)
+    
     def add_photo_path(self):
         """添加照片路径到列表"""
         path = self.photo_path_edit.text().strip()
         if path and self.current_node:
-            item = QListWidgetItem(path)
-            item.setToolTip("双击预览照片")
-            self.photo_path_list.addItem(item)
+            self.photo_model.append_path(path)
             self.photo_path_edit.clear()
             self.save_photo_paths()
             
@@ -643,21 +1048,18 @@ class HITSZFlowViewer(QMainWindow):
     
     def remove_photo_path(self):
         """从列表中删除选中的照片路径"""
-        selected_items = self.photo_path_list.selectedItems()
-        for item in selected_items:
-            self.photo_path_list.takeItem(self.photo_path_list.row(item))
+        selected = self.photo_path_list.selectionModel().selectedIndexes()
+        self.photo_model.remove_rows(index.row() for index in selected)
         self.save_photo_paths()
     
     def save_photo_paths(self):
         """保存当前节点的所有照片路径"""
         if self.current_node and self.current_node in self.graph.nodes:
-            paths = []
-            for i in range(self.photo_path_list.count()):
-                paths.append(self.photo_path_list.item(i).text())
+            paths = self.photo_model.paths()
             self.graph.nodes[self.current_node]['photo_paths'] = paths
             
-            # 保存到JSON文件
-            self.save_annotations()
+            # 标记为待保存，由自动保存器追加到标注日志
+            self.autosaver.mark_dirty(self.current_node)
     
     def on_node_text_changed(self):
         """当节点描述文本更改时保存"""
@@ -665,9 +1067,11 @@ class HITSZFlowViewer(QMainWindow):
             node_text = self.node_text_edit.toPlainText().strip()
             if self.current_node in self.graph.nodes:
                 self.graph.nodes[self.current_node]['description'] = node_text
+                if self.search_index is not None:
+                    self.search_index.update(self.current_node, description=node_text)
                 
-                # 保存到JSON文件
-                self.save_annotations()
+                # 标记为待保存，连续输入会被合并成一次后台写盘
+                self.autosaver.mark_dirty(self.current_node)
 
     def on_save_button_clicked(self):
         """保存按钮点击事件处理"""
@@ -697,18 +1101,23 @@ class HITSZFlowViewer(QMainWindow):
                     event.ignore()
                     return
         
+        # 等待后台写操作结束，并把最后一次防抖窗口内的编辑同步写入日志；
+        # 选择不保存只是跳过整体重写快照，已输入的内容不会丢失
+        self.file_watcher.stop()
+        self.autosaver.shutdown(compact=(reply == QMessageBox.Yes))
+        print(f"自动保存统计: {self.autosaver.get_stats()}")
         event.accept()
 
-    def preview_photo(self, item):
+    def preview_photo(self, index):
         """预览列表中的照片"""
-        photo_path = item.text()
+        photo_path = index.data(NODE_ID_ROLE)
         self.show_photo_preview(photo_path)
     
     def preview_selected_photo(self):
         """预览选中的照片"""
-        selected_items = self.photo_path_list.selectedItems()
-        if selected_items:
-            photo_path = selected_items[0].text()
+        selected = self.photo_path_list.selectionModel().selectedIndexes()
+        if selected:
+            photo_path = selected[0].data(NODE_ID_ROLE)
             self.show_photo_preview(photo_path)
         else:
             QMessageBox.information(self, "提示", "请先选择一个照片路径")
@@ -719,11 +1128,18 @@ class HITSZFlowViewer(QMainWindow):
             QMessageBox.warning(self, "文件不存在", f"找不到照片文件:\n{photo_path}")
             return
             
-        dialog = PhotoPreviewDialog(photo_path, self)
+        if self.assets is None:
+            self.assets = AssetManifest.load(PHOTO_DIR)
+        dialog = PhotoPreviewDialog(photo_path, self, self.assets)
         dialog.exec_()
 
 def main():
+    # --startup-profile：打印从进程启动到第一次绘制的分阶段耗时
+    enable_from_argv(STARTUP_CLOCK)
+    profile.mark("导入模块")
     app = QApplication(sys.argv)
+    # --instrument：记录热点函数耗时和事件循环卡顿，Ctrl+Shift+D 查看
+    instrument_from_argv()
     
     # 设置应用程序样式
     app.setStyle("Fusion")
@@ -747,13 +1163,27 @@ def main():
         QMessageBox.critical(None, "错误", f"找不到文件 {dot_file_path}")
         return
     
+    # 可选的节点分类配置，没有时使用默认的命名前缀规则
+    classifier = None
+    types_config = os.path.join(current_dir, "node_types.json")
+    if os.path.exists(types_config):
+        try:
+            classifier = load_classifier(types_config)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"加载节点分类配置出错: {e}")
+    
+    profile.mark("创建QApplication")
+    
     # 构建图
-    graph = build_graph_from_dot(dot_file_path)
+    graph = build_graph_from_dot(dot_file_path, os.path.join(current_dir, "node_annotations.json"), classifier)
+    profile.mark("构建图")
     
     if graph:
         # 创建并显示主窗口
         window = HITSZFlowViewer(graph)
+        install_debug_shortcut(window)
         window.show()
+        profile.mark("显示窗口")
         
         sys.exit(app.exec_())
     else:
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import time
+from PyQt5.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+
+# 最后一次变化之后等待这么久（毫秒）才通知，连续保存合并成一次
+DEFAULT_DEBOUNCE_MS = 300
+# 持续有变化时最多推迟这么多个等待周期
+MAX_DEBOUNCE_ROUNDS = 5
+
+
+def file_signature(path):
+    """(mtime_ns, 大小)，文件不存在时为None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class FileWatcher(QObject):
+    """监视一组文件，合并连续的保存后发出 files_changed(变化的路径集合)
+
+    很多编辑器保存时先写临时文件再替换，原文件的监视会因此失效，
+    所以同时监视所在目录，并在文件重新出现时重新加入监视。
+    只有 mtime 或大小真正变化的文件才会被通知。
+    """
+
+    files_changed = pyqtSignal(object)
+
+    def __init__(self, paths, debounce_ms=DEFAULT_DEBOUNCE_MS, parent=None):
+        super().__init__(parent)
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.signatures = {path: file_signature(path) for path in self.paths}
+        self.pending = set()
+        self.first_pending = None
+        self.debounce_ms = debounce_ms
+
+        self.watcher = QFileSystemWatcher(self)
+        existing = [path for path in self.paths if os.path.exists(path)]
+        directories = sorted({os.path.dirname(path) for path in self.paths})
+        if existing:
+            self.watcher.addPaths(existing)
+        self.watcher.addPaths(directories)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(debounce_ms)
+        self.timer.timeout.connect(self.on_timer)
+
+    def schedule(self, path):
+        if not self.pending:
+            self.first_pending = time.monotonic()
+        self.pending.add(path)
+        # 每次变化都重新计时，但不能因为持续写入而无限推迟
+        waited_ms = (time.monotonic() - self.first_pending) * 1000
+        if not self.timer.isActive() or waited_ms < self.debounce_ms * MAX_DEBOUNCE_ROUNDS:
+            self.timer.start()
+
+    def on_file_changed(self, path):
+        if path in self.signatures:
+            self.schedule(path)
+
+    def on_directory_changed(self, directory):
+        # 目录变化可能是无关文件，只关心被监视的文件是否被替换或重新创建
+        for path in self.paths:
+            if os.path.dirname(path) == directory and file_signature(path) != self.signatures[path]:
+                self.schedule(path)
+
+    def on_timer(self):
+        watched = set(self.watcher.files())
+        changed = set()
+        for path in self.pending:
+            if path not in watched and os.path.exists(path):
+                self.watcher.addPath(path)
+            signature = file_signature(path)
+            if signature != self.signatures[path]:
+                self.signatures[path] = signature
+                changed.add(path)
+        self.pending.clear()
+        self.first_pending = None
+        if changed:
+            self.files_changed.emit(changed)
+
+    def stop(self):
+        self.timer.stop()
+        self.pending.clear()
+        paths = self.watcher.files() + self.watcher.directories()
+        if paths:
+            self.watcher.removePaths(paths)
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+class WidgetPool:
+    """可复用控件池：数量只增不减，多余的控件隐藏而不是销毁
+
+    factory(index) 负责创建第 index 个控件并放进布局，只在池子不够用时调用一次。
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.widgets = []
+        self.created = 0
+
+    def acquire(self, count):
+        """返回前count个控件并显示，其余隐藏"""
+        while len(self.widgets) < count:
+            self.widgets.append(self.factory(len(self.widgets)))
+            self.created += 1
+        for widget in self.widgets[count:]:
+            if not widget.isHidden():
+                widget.hide()
+        active = self.widgets[:count]
+        for widget in active:
+            if widget.isHidden():
+                widget.show()
+        return active
+
+    def release_all(self):
+        """隐藏全部控件"""
+        return self.acquire(0)
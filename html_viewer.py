@@ -1,7 +1,15 @@
-from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton, QFileDialog
-from PyQt5.QtWebEngineWidgets import QWebEngineView
-from PyQt5.QtCore import QUrl
+import os
 import sys
+import time
+# 启动计时起点，要在导入PyQt之前记录
+STARTUP_CLOCK = time.perf_counter()
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton, QFileDialog,
+                             QLabel, QMessageBox)
+from PyQt5.QtCore import QUrl, Qt, QCoreApplication
+from hitsz_startup import profile, enable_from_argv
+
+# 本地数据服务的网页根目录；这里的网页通过服务打开，数据和照片按显示需要请求
+SERVER_ROOT = os.path.dirname(os.path.abspath(__file__))
 
 
 class HTMLViewer(QMainWindow):
@@ -20,9 +28,26 @@ class HTMLViewer(QMainWindow):
         self.load_button.clicked.connect(self.load_html_file)
         layout.addWidget(self.load_button)
 
-        # 创建网页视图组件
-        self.web_view = QWebEngineView()
-        layout.addWidget(self.web_view)
+        # 网页视图要加载 QtWebEngine（启动Chromium进程），选择文件之后才创建，先放一个提示
+        self.main_layout = layout
+        self.web_view = None
+        self.placeholder = QLabel('请选择要查看的HTML文件')
+        self.placeholder.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.placeholder, 1)
+        self.server = None
+
+    def ensure_web_view(self):
+        """第一次加载文件时才导入 QtWebEngineWidgets 并创建网页视图"""
+        if self.web_view is None:
+            try:
+                from PyQt5.QtWebEngineWidgets import QWebEngineView
+            except ImportError as e:
+                QMessageBox.warning(self, '无法加载', f'缺少 QtWebEngine: {e}')
+                return False
+            self.web_view = QWebEngineView()
+            self.main_layout.replaceWidget(self.placeholder, self.web_view)
+            self.placeholder.deleteLater()
+        return True
 
     def load_html_file(self):
         # 打开文件选择对话框
@@ -33,15 +58,57 @@ class HTMLViewer(QMainWindow):
             "HTML文件 (*.html);;所有文件 (*.*)"
         )
 
-        if file_name:
-            # 将文件路径转换为URL并加载
-            url = QUrl.fromLocalFile(file_name)
-            self.web_view.setUrl(url)
+        if file_name and self.ensure_web_view():
+            self.web_view.setUrl(self.page_url(file_name))
+
+    def ensure_server(self):
+        """第一次打开服务目录下的网页时在后台线程启动本地数据服务
+
+        端口已被占用时认为其他展台已经启动了共用的服务，直接使用它。
+        """
+        if self.server is None:
+            from hitsz_server import ServerThread
+            server = ServerThread(root=SERVER_ROOT)
+            server.start()
+            server.ready.wait()
+            if server.error is not None and not server.address_in_use():
+                print(f"启动本地数据服务出错: {server.error}")
+                QMessageBox.warning(self, '无法启动本地数据服务', f'{server.error}\n\n网页将按本地文件打开。')
+                return False
+            self.server = server
+        return True
+
+    def page_url(self, file_name):
+        """服务根目录下的网页用服务地址打开，其他文件按本地文件打开"""
+        try:
+            relative = os.path.relpath(os.path.abspath(file_name), SERVER_ROOT)
+        except ValueError:
+            # Windows 上不同盘符之间没有相对路径
+            relative = os.pardir
+        if relative.startswith(os.pardir) or not self.ensure_server():
+            return QUrl.fromLocalFile(file_name)
+        url = QUrl(f"http://{self.server.host}:{self.server.port}/")
+        url.setPath("/" + relative.replace(os.sep, "/"))
+        return url
+
+    def closeEvent(self, event):
+        if self.server is not None:
+            self.server.stop()
+        super().closeEvent(event)
 
 def main():
+    # --startup-profile：打印从进程启动到第一次绘制的分阶段耗时
+    enable_from_argv(STARTUP_CLOCK)
+    profile.mark("导入模块")
+    # QtWebEngineWidgets 在 QApplication 创建之后才导入，需要先打开共享OpenGL上下文
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
     app = QApplication(sys.argv)
+    profile.mark("创建QApplication")
     viewer = HTMLViewer()
+    profile.mark("构建主界面")
+    profile.watch_first_paint(viewer)
     viewer.show()
+    profile.mark("显示窗口")
     sys.exit(app.exec_())
 
 if __name__ == '__main__':
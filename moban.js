@@ -1,14 +1,72 @@
 let nodeData = {}; // 存储 JSON 数据
 let nodeKeys = []; // 存储节点的顺序
 let currentIndex = 0; // 当前节点索引
+let assetManifest = {}; // 照片缩小版本清单（hitsz_assets.py 生成），没有时使用原图
+// 本地数据服务（hitsz_server.py）不带跨域头，只有页面由服务提供时才能请求；本地打开时读取完整的标注文件
+const API_BASE = '';
+const THUMB_TIERS = [160, 320, 640, 960, 1280]; // 与 hitsz_server.THUMB_TIERS 一致
+let useApi = false; // 服务可用时按节点请求数据和缩略图，否则读取完整的标注文件
+
+// 加载照片缩小版本清单
+async function loadAssetManifest() {
+    try {
+        const response = await fetch('picture/_derived/manifest.json');
+        if (response.ok) {
+            assetManifest = (await response.json()).photos || {};
+        }
+    } catch (error) {
+        console.warn('没有照片缩小版本清单，使用原图');
+    }
+}
+
+// 服务上照片缩略图的地址，路径逐段编码
+function thumbUrl(path, width) {
+    return `${API_BASE}/thumb/${width}/${path.split('/').map(encodeURIComponent).join('/')}`;
+}
+
+// 用各档位填充srcset，浏览器按显示宽度选择能覆盖它的最小档位
+function setPhotoSource(img, path, displayWidth) {
+    if (useApi) {
+        img.sizes = `${displayWidth}px`;
+        img.srcset = THUMB_TIERS.map(width => `${thumbUrl(path, width)} ${width}w`).join(', ');
+        img.src = thumbUrl(path, THUMB_TIERS[THUMB_TIERS.length - 1]);
+        return;
+    }
+    const entry = assetManifest[path];
+    if (!entry || !entry.variants.length) {
+        img.removeAttribute('srcset');
+        img.src = `picture/${path}`;
+        return;
+    }
+    const candidates = entry.variants.map(v => `picture/${v.webp || v.jpg || v.png} ${v.width}w`);
+    const largest = entry.variants[entry.variants.length - 1];
+    if (entry.width > largest.width) {
+        // 比最大档位还宽的显示区域才会用到原图
+        candidates.push(`picture/${path} ${entry.width}w`);
+    }
+    img.sizes = `${displayWidth}px`;
+    img.srcset = candidates.join(', ');
+    img.src = `picture/${largest.jpg || largest.png || largest.webp}`;
+}
 
-// 加载 JSON 数据
+// 加载节点顺序：优先向服务请求节点列表，节点数据在显示时再逐个请求
 async function loadNodeData() {
     try {
-        const response = await fetch('node_annotations2.json');
-        nodeData = await response.json();
-        nodeKeys = Object.keys(nodeData); // 获取节点的顺序
-        console.log('节点数据:', nodeData);
+        const response = await fetch(`${API_BASE}/api/nodes`);
+        if (response.ok) {
+            const list = await response.json();
+            nodeKeys = list.nodes.filter(node => node.annotated).map(node => node.id);
+            useApi = true;
+        }
+    } catch (error) {
+        console.warn('本地数据服务不可用，读取完整的标注文件');
+    }
+    try {
+        if (!useApi) {
+            const [response] = await Promise.all([fetch('node_annotations2.json'), loadAssetManifest()]);
+            nodeData = await response.json();
+            nodeKeys = Object.keys(nodeData); // 获取节点的顺序
+        }
         console.log('节点顺序:', nodeKeys);
         updateDisplay(currentIndex); // 初始化显示第一个节点
     } catch (error) {
@@ -16,12 +74,27 @@ async function loadNodeData() {
     }
 }
 
+// 取单个节点的数据，使用服务时按需请求，请求过的保留在 nodeData 中
+async function getNodeData(nodeId) {
+    if (useApi && !(nodeId in nodeData)) {
+        nodeData[nodeId] = fetch(`${API_BASE}/api/nodes/${encodeURIComponent(nodeId)}`)
+            .then(response => response.ok ? response.json() : {})
+            .catch(() => {
+                delete nodeData[nodeId]; // 请求失败时下次重试
+                return {};
+            });
+    }
+    return (await nodeData[nodeId]) || {};
+}
+
 // 更新界面显示
-function updateDisplay(index) {
+async function updateDisplay(index) {
     if (index < 0 || index >= nodeKeys.length) return; // 防止越界
 
+    currentIndex = index;
     const nodeId = nodeKeys[index];
-    const data = nodeData[nodeId];
+    const data = await getNodeData(nodeId);
+    if (currentIndex !== index) return; // 等待数据期间已经切换到别的节点
 
     // 更新文本框内容
     const textInput = document.querySelector('.text-box input');
@@ -33,7 +106,7 @@ function updateDisplay(index) {
     const photoContainer = document.querySelector('.photo-container img');
     const photoSection = document.querySelector('.photo-container');
     if (photoContainer && data.photo_paths && data.photo_paths.length > 0) {
-        photoContainer.src = `picture/${data.photo_paths[0]}`;
+        setPhotoSource(photoContainer, data.photo_paths[0], photoSection.clientWidth);
         photoContainer.onload = () => {
             // 确保图片加载完成后调整大小
             const containerWidth = photoSection.clientWidth; // 获取背景容器的宽度
@@ -51,13 +124,15 @@ function updateDisplay(index) {
         const img = section.querySelector('img');
         const label = section.querySelector('.name-label');
         if (img && label) {
-            const fileName = img.getAttribute('src').split('/').pop();
+            const fileName = decodeURIComponent(img.getAttribute('src').split('/').pop());
             label.textContent = fileName;
         }
     });
 
-    // 更新当前索引
-    currentIndex = index;
+    // 预取下一个节点的数据
+    if (useApi && index + 1 < nodeKeys.length) {
+        getNodeData(nodeKeys[index + 1]);
+    }
 }
 
 // 更新照片容器的图片
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""DOT分词和解析的回归测试"""
+
+import os
+import sys
+import time
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hitsz_graph import parse_dot, DotSyntaxError
+
+
+def test_attribute_lists_with_quoted_brackets():
+    model = parse_dot('digraph G { a [label="a]b", color=red]; a -> b [label="x\\"y"]; }')
+    assert model.attrs[model.index["a"]] == {"label": "a]b", "color": "red"}
+    assert model.successors(model.index["a"]) == [(model.index["b"], 'x"y')]
+
+
+def test_unclosed_attribute_list_fails_fast():
+    # 以前列表内部的嵌套量词在缺少 ] 时指数级回溯，n=20 就要几十秒
+    text = 'digraph G {\n  a -> b;\n  c [label="x", ' + 'b' * 100000
+    start = time.perf_counter()
+    with pytest.raises(DotSyntaxError, match="第 3 行"):
+        parse_dot(text)
+    assert time.perf_counter() - start < 1.0
+
+
+def test_unclosed_quote_in_attribute_list_fails_fast():
+    text = 'digraph G {\n  c [label="' + 'b' * 100000
+    start = time.perf_counter()
+    with pytest.raises(DotSyntaxError):
+        parse_dot(text)
+    assert time.perf_counter() - start < 1.0
+
+
+def test_unclosed_attribute_list_mid_file_is_rejected():
+    # 缺少 ] 的列表不能把下一条语句当成属性吞掉
+    text = 'digraph G {\n a [label="x", \n b [label="y"];\n c -> d;\n}'
+    with pytest.raises(DotSyntaxError, match="第 2 行"):
+        parse_dot(text)
+
+
+@pytest.mark.parametrize("text", [
+    'digraph G { a -> b; "oops }',
+    'digraph G { a -> b]; }',
+    'digraph G { a - b; }',
+])
+def test_unrecognized_characters_are_rejected(text):
+    with pytest.raises(DotSyntaxError):
+        parse_dot(text)
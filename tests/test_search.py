@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""节点搜索索引的回归测试"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hitsz_search import build_index, SCATTERED_SCORE
+
+
+def make_index():
+    return build_index([
+        ("a", "计算机科学与技术学院", "学院介绍"),
+        ("b", "机械工程学院", "机器人方向"),
+        ("c", "图书馆", "开放时间"),
+    ])
+
+
+def test_exact_label_match_ranks_first():
+    results = make_index().search("机械工程")
+    assert results[0][0] == "b"
+    assert results[0][1] > SCATTERED_SCORE
+
+
+def test_query_with_typo_falls_back_to_partial_matches():
+    # "计算机科雪" 的二元组 "科雪" 不在任何文档中，按命中比例返回近似结果
+    results = make_index().search("计算机科雪")
+    assert [node_id for node_id, _ in results] == ["a"]
+    assert 0 < results[0][1] < SCATTERED_SCORE
+
+
+def test_unrelated_query_returns_nothing():
+    assert make_index().search("体育场馆") == []